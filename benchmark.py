@@ -1,17 +1,239 @@
-from pypoker import Poker
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import statistics
+import sys
 import time
-poker = Poker('plo5', 6)
-num_iterations = 1000
-t = 0
 
-for i in range(num_iterations):
-    t1 = time.time()
+from pypoker import Deck, Evaluator, Poker
+from pypoker.batch import np
+from pypoker.misc import HOLECARDS_COUNT
+
+VARIANTS = ('nlh', 'plo4', 'plo5', 'plo6')
+PLAYER_COUNTS = range(2, 10)
+# Number of pre-dealt inputs every case cycles through
+POOL_SIZE = 256
+
+
+def percentile(values: list, q: float) -> float:
+    """
+    q-th percentile (0 - 100) of values with linear interpolation
+    """
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def measure(func, repeats: int, min_time: float, warmup: float) -> dict:
+    """
+    Time func() and return per call statistics in microseconds
+
+    func is warmed up for warmup seconds, then called in loops of `number` calls, number being calibrated
+    so that a loop lasts at least min_time. The statistics are computed over the repeats loops.
+    """
+    end = time.perf_counter() + warmup
+    while time.perf_counter() < end:
+        func()
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2
+
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                func()
+            samples.append((time.perf_counter_ns() - start) / number / 1000)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return {
+        'number': number,
+        'repeats': repeats,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if repeats > 1 else 0.0,
+        'p5': percentile(samples, 5),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'ops_per_sec': 1e6 / statistics.median(samples),
+    }
+
+
+def cycle(inputs: list, call):
+    """
+    Function calling call(item) on the next input of the pool at every call
+    """
+    state = [0]
+    size = len(inputs)
+
+    def run():
+        i = state[0]
+        state[0] = (i + 1) % size
+        call(inputs[i])
+    return run
+
+
+def max_players(variant: str) -> int:
+    """
+    Largest table a single deck can deal
+    """
+    return min(max(PLAYER_COUNTS), (52 - 5) // HOLECARDS_COUNT[variant])
+
+
+def build_cases(engine: str, variants: list, player_counts: list) -> dict:
+    """
+    Benchmark cases by name, every case is a function without arguments doing one operation
+    """
+    deck = Deck(rng=1)
+    evaluator = Evaluator(engine)
+    cases = {}
+
+    def deck_case(method):
+        def run():
+            method()
+            deck.reset_deck()
+        return run
+
+    cases['Deck.get_community_cards'] = deck_case(deck.get_community_cards)
+    cases['Deck.get_unique_card_sets[5x5]'] = deck_case(lambda: deck.get_unique_card_sets(5, 5))
+    cases['Deck.get_random_cards[7]'] = deck_case(lambda: deck.get_random_cards(7))
+    cases['Deck.knockout_cards[4]'] = deck_case(lambda: deck.knockout_cards('AsKdQhJc'))
+    cases['Deck.reset_deck'] = deck.reset_deck
+
+    five_cards = []
+    for _ in range(POOL_SIZE):
+        five_cards.append(deck.get_unique_card_sets(1, 5, 'list')[0])
+        deck.reset_deck()
+    cases['Evaluator.card_strength_evaluator'] = cycle(five_cards, evaluator.card_strength_evaluator)
+
+    for variant in variants:
+        for num_players in player_counts:
+            if num_players > max_players(variant):
+                continue
+            tag = '[{},{}p]'.format(variant, num_players)
+            cases['Deck.deal_poker_hands' + tag] = lambda v=variant, n=num_players: deck.deal_poker_hands(v, n)
+            if np is not None:
+                cases['Deck.deal_batch[x1000]' + tag] = lambda v=variant, n=num_players: deck.deal_batch(v, n, 1000)
+
+            deals = [deck.deal_poker_hands(variant, num_players) for _ in range(POOL_SIZE)]
+            cases['Evaluator.declare_winner' + tag] = cycle(
+                deals, lambda d: evaluator.declare_winner(d['player_cards'], d['community_cards'])
+            )
+            if num_players == 2:
+                cases['Evaluator.strength_evaluation[{}]'.format(variant)] = cycle(
+                    deals, lambda d, v=variant: evaluator.strength_evaluation(
+                        d['player_cards']['p1'], d['community_cards'], v)
+                )
+
+            poker = Poker(variant, num_players, engine=engine, rng=1)
+            cases['Poker.deal+declare_winner' + tag] = lambda p=poker: p.declare_winner(**_deal(p))
+    return cases
+
+
+def _deal(poker: Poker) -> dict:
     cards = poker.deal()
-    winner = poker.declare_winner(
-        player_cards=cards['player_cards'],
-        community_cards=cards['community_cards']
-    )
-    t2 = time.time()
-    t += t2 - t1
-
-print("Total time taken for {} iterations: {:.2f} s".format(num_iterations, t))
+    return {'player_cards': cards['player_cards'], 'community_cards': cards['community_cards']}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare the medians of results with a baseline
+
+    A case regresses when its median is more than threshold (a fraction) slower than the baseline median
+    and its fastest repeat is slower than the slowest usual repeat (p95) of the baseline, so that noise
+    alone is not reported. Returns the list of (case, baseline median, median, ratio, regressed).
+    """
+    rows = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = stats['median'] / base['median']
+        regressed = ratio > 1 + threshold and stats['min'] > base['p95']
+        rows.append((name, base['median'], stats['median'], ratio, regressed))
+    return rows
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="pypoker benchmark suite")
+    parser.add_argument("--engine", default="default", choices=Evaluator.engines, help="evaluator engine")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=VARIANTS)
+    parser.add_argument("--players", nargs="+", type=int, default=list(PLAYER_COUNTS), help="player counts")
+    parser.add_argument("--filter", default=None, help="only run the cases matching this regular expression")
+    parser.add_argument("--repeats", type=int, default=15, help="timed loops per case")
+    parser.add_argument("--min-time", type=float, default=0.02, help="minimum seconds of a timed loop")
+    parser.add_argument("--warmup", type=float, default=0.05, help="warm-up seconds per case")
+    parser.add_argument("--output", default=None, help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown reported as a regression")
+    parser.add_argument("--quick", action="store_true", help="fewer repeats and shorter loops")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.repeats, args.min_time, args.warmup = 5, 0.005, 0.01
+
+    cases = build_cases(args.engine, args.variants, args.players)
+    if args.filter:
+        pattern = re.compile(args.filter)
+        cases = {name: case for name, case in cases.items() if pattern.search(name)}
+
+    results = {}
+    for name, case in cases.items():
+        results[name] = stats = measure(case, args.repeats, args.min_time, args.warmup)
+        print("{:<50}{:>12.2f} us  (p5 {:.2f}, p95 {:.2f}, {:.0f} ops/s)".format(
+            name, stats['median'], stats['p5'], stats['p95'], stats['ops_per_sec']), flush=True)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'engine': args.engine,
+            'repeats': args.repeats,
+            'min_time': args.min_time,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        rows = compare(results, baseline, args.threshold)
+        print()
+        print("{:<50}{:>12}{:>12}{:>9}".format("case", "baseline", "current", "ratio"))
+        for name, base, current, ratio, regressed in rows:
+            print("{:<50}{:>12.2f}{:>12.2f}{:>8.2f}x{}".format(
+                name, base, current, ratio, "  REGRESSION" if regressed else ""))
+        regressions = [row for row in rows if row[4]]
+        report['regressions'] = [row[0] for row in regressions]
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        if regressions:
+            print("{} regression(s) over {:.0%}".format(len(regressions), args.threshold))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
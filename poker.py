@@ -1,3 +1,6 @@
+import os
+import tempfile
+
 from pypoker import Poker, Simulator
 from pprint import pprint
 
@@ -11,6 +14,8 @@ from pprint import pprint
 # pprint(winner)
 
 simulator = Simulator('plo4')
-sim_results = simulator.simulate('2s3s4s5s', '2h3h4h5h', 10000)
+# A new store every run, reopening an existing one would append to it
+output = os.path.join(tempfile.mkdtemp(prefix='pypoker-'), 'sim_results')
+sim_results = simulator.simulate('2s3s4s5s', '2h3h4h5h', 10000, output=output)
 print(sim_results[0] * 100, sim_results[1] * 100)
-sim_results[2].to_csv('sim_results.csv')
+print(len(sim_results[2]), sim_results[2].columns, output)
@@ -1,3 +1,8 @@
 from pypoker.deck import Deck
 from pypoker.evaluator import Evaluator
 from pypoker.game import Poker
+from pypoker.isomorphism import canonicalize
+from pypoker.simulator import Simulator
+from pypoker.ranges import Range
+from pypoker.table import Dealer, TableState
+from pypoker.selfplay import SelfPlay
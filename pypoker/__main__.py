@@ -0,0 +1,87 @@
+import argparse
+import json
+
+from .evaluator import Evaluator
+from .history import CHUNK_BYTES, analyze
+from .selfplay import POLICIES, SHARD_HANDS, SelfPlay, parse_policy
+from .server import BATCH_WINDOW, MAX_BATCH, MAX_PENDING, REQUEST_TIMEOUT, serve
+
+
+def _policy(spec: str):
+    try:
+        return parse_policy(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def main(argv: list = None) -> None:
+    """
+    Command line entry point: python -m pypoker serve|history|selfplay [options]
+    """
+    parser = argparse.ArgumentParser(prog="python -m pypoker")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    server = commands.add_parser("serve", help="run the JSON lines evaluation and equity server")
+    server.add_argument("--host", default="127.0.0.1", help="TCP host")
+    server.add_argument("--port", type=int, default=7462, help="TCP port")
+    server.add_argument("--unix", default=None, help="serve on this Unix socket instead of TCP")
+    server.add_argument("--processes", type=int, default=None, help="worker processes, defaults to the number of CPUs")
+    server.add_argument("--engine", default="lookup", choices=Evaluator.engines, help="evaluator engine of the workers")
+    server.add_argument("--max-pending", type=int, default=MAX_PENDING, help="queued requests before reading pauses")
+    server.add_argument("--max-batch", type=int, default=MAX_BATCH, help="largest batch sent to a worker")
+    server.add_argument("--batch-window", type=float, default=BATCH_WINDOW, help="seconds to wait to fill a batch")
+    server.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, help="default request timeout in seconds")
+
+    history = commands.add_parser("history", help="per starting hand statistics of hand history files")
+    history.add_argument("paths", nargs="+", help="hand history files")
+    history.add_argument("--processes", type=int, default=None, help="worker processes, defaults to the number of CPUs")
+    history.add_argument("--chunk-bytes", type=int, default=CHUNK_BYTES, help="bytes of a file parsed by one worker")
+    history.add_argument("--mmap", action="store_true", help="memory map the files instead of reading them")
+    history.add_argument("--output", default=None, help="write the statistics as JSON to this file")
+
+    selfplay = commands.add_parser("selfplay", help="play hands between bot policies")
+    selfplay.add_argument("policies", nargs="+", type=_policy, metavar="POLICY", help="policy of every seat: {}, "
+                          "with parameters after colons (random:0.1:0.3)".format(", ".join(sorted(POLICIES))))
+    selfplay.add_argument("--game", default="nlh", help="game type: nlh, plo4, plo5 or plo6")
+    selfplay.add_argument("--hands", type=int, default=100000, help="number of hands")
+    selfplay.add_argument("--blinds", type=int, nargs=2, default=(1, 2), help="small and big blind")
+    selfplay.add_argument("--stack", type=int, default=100, help="starting stack in big blinds")
+    selfplay.add_argument("--processes", type=int, default=None, help="worker processes, defaults to the number of CPUs")
+    selfplay.add_argument("--shard-hands", type=int, default=SHARD_HANDS, help="hands per worker task")
+    selfplay.add_argument("--seed", type=int, default=None, help="seed making the run reproducible")
+    selfplay.add_argument("--early-stop", action="store_true", help="stop once the result of seat 0 is significant")
+    selfplay.add_argument("--log", default=None, help="write every hand as JSON lines to this file")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        serve(
+            args.host, args.port, args.unix,
+            processes=args.processes, engine=args.engine, max_pending=args.max_pending,
+            max_batch=args.max_batch, batch_window=args.batch_window, timeout=args.timeout
+        )
+    elif args.command == "selfplay":
+        harness = SelfPlay(args.game, args.policies, args.blinds[0], args.blinds[1], args.stack,
+                           processes=args.processes, seed=args.seed)
+        for summary in harness.iter_play(args.hands, args.shard_hands, early_stop=args.early_stop, log=args.log):
+            print("{} hands, {:.1f} s: {}".format(summary['hands'], summary['elapsed'], ", ".join(
+                "{} {:+.2f} +/- {:.2f} bb/100".format(p['policy'], p['bb_per_100'], p['ci'])
+                for p in summary['players'])), flush=True)
+    elif args.command == "history":
+        stats = analyze(args.paths, args.processes, args.chunk_bytes, args.mmap)
+        result = stats.to_dict()
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(result, f, indent=2)
+        print("{} hands, {} errors".format(stats.num_hands, stats.errors))
+        for game_type, hands in result.items():
+            print(game_type)
+            print("{:<14}{:>8}{:>10}{:>10}{:>12}{:>14}".format(
+                "hand", "hands", "showdowns", "win rate", "net", "preflop loss"))
+            for key, row in sorted(hands.items(), key=lambda item: item[1]['net']):
+                win_rate = "{:.3f}".format(row['win_rate']) if row['win_rate'] is not None else "-"
+                print("{:<14}{:>8}{:>10}{:>10}{:>12.2f}{:>14.2f}".format(
+                    key, row['hands'], row['showdowns'], win_rate, row['net'], row['preflop_losses']))
+
+
+if __name__ == '__main__':
+    main()
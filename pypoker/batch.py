@@ -0,0 +1,131 @@
+from itertools import combinations
+
+from .card import parse_cards
+from .lookup import OFFSETS, MULTISET_BASE
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Number of hands evaluated at once, bounds the size of the temporary arrays
+CHUNK_SIZE = 1 << 16
+
+
+def _require_numpy():
+    """
+    Raise an ImportError if NumPy is not installed
+    """
+    if np is None:
+        raise ImportError("NumPy is required for batch evaluation, install it with 'pip install numpy'")
+
+
+def cards_to_array(hands: list) -> "np.ndarray":
+    """
+    Convert a list of hands (strings such as 'AsKdQhJcTs' or lists of cards) to an int64 array of encoded cards
+
+    All hands must have the same number of cards
+    """
+    _require_numpy()
+    return np.array([parse_cards(hand) for hand in hands], dtype=np.int64)
+
+
+def split_deals(deals, num_players: int):
+    """
+    Split an array returned by Deck.deal_batch into boards and hole cards
+
+    Returns a tuple with the (N, 5) community cards and the (N, num_players, H) hole cards
+    """
+    _require_numpy()
+    deals = np.asarray(deals)
+    return deals[:, -5:], deals[:, :-5].reshape(len(deals), num_players, -1)
+
+
+def evaluate_batch(hands, lookup) -> "np.ndarray":
+    """
+    Vectorized strength evaluation of an (N, 5), (N, 6) or (N, 7) array of encoded cards
+
+    Returns an int32 array of N hand strengths (1 - 7462, higher is better)
+    """
+    _require_numpy()
+    hands = np.asarray(hands, dtype=np.int64)
+    if hands.ndim != 2 or hands.shape[1] not in MULTISET_BASE:
+        raise ValueError("hands must be an (N, 5), (N, 6) or (N, 7) array, got shape {}".format(hands.shape))
+
+    table = np.frombuffer(lookup.table, dtype=np.uint16)
+    offsets = np.array(OFFSETS, dtype=np.int64).reshape(7, 13)
+    num_cards = hands.shape[1]
+    positions = np.arange(num_cards)
+    base = MULTISET_BASE[num_cards]
+
+    result = np.empty(len(hands), dtype=np.int32)
+    for start in range(0, len(hands), CHUNK_SIZE):
+        chunk = hands[start: start + CHUNK_SIZE]
+        ranks = (chunk >> 8) & 0xF
+        suits = (chunk >> 12) & 0xF
+        rank_bits = chunk >> 16
+
+        ranks.sort(axis=1)
+        strength = table[base + offsets[positions, ranks].sum(axis=1)]
+
+        for suit in (1, 2, 4, 8):
+            in_suit = suits == suit
+            suit_mask = np.bitwise_or.reduce(np.where(in_suit, rank_bits, 0), axis=1)
+            flush = table[suit_mask]
+            strength = np.where((in_suit.sum(axis=1) >= 5) & (flush > 0), flush, strength)
+
+        result[start: start + CHUNK_SIZE] = strength
+    return result
+
+
+def strength_batch(community_cards, player_cards, lookup) -> "np.ndarray":
+    """
+    Best hand strength of every player on every board
+
+    community_cards: (N, 5) array of encoded board cards
+    player_cards: (N, P, H) array of encoded hole cards, H = 2 for Hold'em and 4 - 6 for Omaha
+
+    Returns an (N, P) int32 array of hand strengths
+    """
+    _require_numpy()
+    boards = np.asarray(community_cards, dtype=np.int64)
+    players = np.asarray(player_cards, dtype=np.int64)
+    if boards.ndim != 2 or players.ndim != 3 or len(boards) != len(players):
+        raise ValueError("Expected (N, 5) boards and (N, P, H) player cards, got {} and {}".format(
+            boards.shape, players.shape))
+
+    num_boards, num_players, num_holecards = players.shape
+
+    if num_holecards == 2:
+        hands = np.concatenate([
+            players,
+            np.broadcast_to(boards[:, None, :], (num_boards, num_players, boards.shape[1]))
+        ], axis=2)
+        return evaluate_batch(hands.reshape(-1, hands.shape[2]), lookup).reshape(num_boards, num_players)
+
+    # Omaha: every pair of hole cards with every triple of board cards
+    hole_pairs = np.array(list(combinations(range(num_holecards), 2)))
+    board_triples = np.array(list(combinations(range(boards.shape[1]), 3)))
+    num_combos = len(hole_pairs) * len(board_triples)
+
+    # Keep the (boards, players, combos, 5) temporary below CHUNK_SIZE hands
+    rows = max(1, CHUNK_SIZE // (num_players * num_combos))
+    result = np.empty((num_boards, num_players), dtype=np.int32)
+    for start in range(0, num_boards, rows):
+        hole = players[start: start + rows][:, :, hole_pairs]
+        board = boards[start: start + rows][:, board_triples]
+        n = len(hole)
+        combos = np.concatenate([
+            np.broadcast_to(
+                hole[:, :, :, None, :],
+                (n, num_players, len(hole_pairs), len(board_triples), 2)
+            ),
+            np.broadcast_to(
+                board[:, None, None, :, :],
+                (n, num_players, len(hole_pairs), len(board_triples), 3)
+            )
+        ], axis=4)
+        strengths = evaluate_batch(combos.reshape(-1, 5), lookup).reshape(n, num_players, num_combos)
+        result[start: start + rows] = strengths.max(axis=2)
+    return result
+
@@ -0,0 +1,98 @@
+import sys
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Size bounded cache evicting the least recently used entries, with hit rate statistics
+    """
+
+    def __init__(self, maxsize: int = 65536) -> None:
+        """
+        Initialize an empty cache holding at most maxsize entries
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._entry_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def get(self, key, default=None):
+        """
+        Return the value stored for key and mark it as recently used, default if it is missing
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value) -> None:
+        """
+        Store value for key, evicting the least recently used entry if the cache is full
+        """
+        data = self._data
+        if key in data:
+            self._entry_bytes -= sys.getsizeof(data[key])
+            data.move_to_end(key)
+        else:
+            if len(data) >= self.maxsize:
+                old_key, old_value = data.popitem(last=False)
+                self._entry_bytes -= sys.getsizeof(old_key) + sys.getsizeof(old_value)
+                self.evictions += 1
+            self._entry_bytes += sys.getsizeof(key)
+        data[key] = value
+        self._entry_bytes += sys.getsizeof(value)
+
+    def clear(self) -> None:
+        """
+        Remove every entry and reset the statistics
+        """
+        self._data.clear()
+        self._entry_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        Return the cache statistics
+
+        Dictionary contains the following key-value pairs:
+
+            'hits': number of lookups that found an entry
+
+            'misses': number of lookups that did not
+
+            'hit_rate': hits / (hits + misses)
+
+            'evictions': number of entries dropped to stay within maxsize
+
+            'size': current number of entries
+
+            'maxsize': maximum number of entries
+
+            'memory_bytes': approximate memory used by the cache and its entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'memory_bytes': sys.getsizeof(self._data) + self._entry_bytes
+        }
@@ -0,0 +1,104 @@
+RANKS = "23456789TJQKA"
+SUITS = "shdc"
+PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def _encode(rank: int, suit: int) -> int:
+    """
+    Pack a card into a single integer
+
+    Layout (most significant bit first):
+
+        xxxbbbbb bbbbbbbb cdhsrrrr xxpppppp
+
+        b: one bit per rank (2 - A)
+        cdhs: one bit per suit
+        r: rank index (0 - 12)
+        p: prime number of the rank
+    """
+    return (1 << (16 + rank)) | (1 << (12 + suit)) | (rank << 8) | PRIMES[rank]
+
+
+CARD_TO_INT = {
+    r + s: _encode(i, j)
+    for i, r in enumerate(RANKS)
+    for j, s in enumerate(SUITS)
+}
+INT_TO_CARD = {v: k for k, v in CARD_TO_INT.items()}
+
+
+def card_to_int(card: str) -> int:
+    """
+    Convert a card string such as 'As' to its integer encoding
+    """
+    try:
+        return CARD_TO_INT[card]
+    except KeyError:
+        raise ValueError("Invalid card: {}".format(card))
+
+
+def int_to_card(card: int) -> str:
+    """
+    Convert an integer encoded card back to its string form
+    """
+    try:
+        return INT_TO_CARD[card]
+    except KeyError:
+        raise ValueError("Invalid card integer: {}".format(card))
+
+
+def parse_cards(cards) -> list:
+    """
+    Convert cards to a list of integers
+
+    Accepts a string of concatenated cards ('AsKd'), a list of card strings or a list of integers
+    """
+    if isinstance(cards, str):
+        try:
+            return [CARD_TO_INT[cards[i: i + 2]] for i in range(0, len(cards), 2)]
+        except KeyError:
+            raise ValueError("Invalid cards: {}".format(cards))
+    return [c if isinstance(c, int) else card_to_int(c) for c in cards]
+
+
+def cards_to_str(cards) -> str:
+    """
+    Convert a list of integer encoded cards to a string of concatenated cards
+    """
+    return "".join(INT_TO_CARD[c] for c in cards)
+
+
+def rank_of(card: int) -> int:
+    """
+    Rank index of an encoded card (0 for deuce, 12 for ace)
+    """
+    return (card >> 8) & 0xF
+
+
+def suit_of(card: int) -> int:
+    """
+    Suit bit of an encoded card (1: spades, 2: hearts, 4: diamonds, 8: clubs)
+    """
+    return (card >> 12) & 0xF
+
+
+def prime_of(card: int) -> int:
+    """
+    Prime number associated with the rank of an encoded card
+    """
+    return card & 0x3F
+
+
+# Position of each suit bit within a rank, used to number cards from 0 to 51
+_SUIT_INDEX = [-1, 0, 1, -1, 2, -1, -1, -1, 3]
+
+INDEX_TO_INT = [_encode(i // 4, i % 4) for i in range(52)]
+INDEX_TO_CARD = [RANKS[i // 4] + SUITS[i % 4] for i in range(52)]
+CARD_TO_INDEX = {card: i for i, card in enumerate(INDEX_TO_CARD)}
+
+
+def card_index(card: int) -> int:
+    """
+    Position of an encoded card in a 52 card deck ordered by rank then suit (0 for 2s, 51 for Ac)
+    """
+    return ((card >> 8) & 0xF) * 4 + _SUIT_INDEX[(card >> 12) & 0xF]
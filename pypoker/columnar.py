@@ -0,0 +1,192 @@
+import json
+import os
+import re
+
+from . import batch
+from .card import INDEX_TO_INT, card_index
+
+_INDEX_FILE = "index.json"
+_COLUMN_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _chunk_file(chunk: int, column: str) -> str:
+    return "{:06d}.{}.npy".format(chunk, column)
+
+
+class ColumnWriter(object):
+    """
+    Append only columnar store of NumPy arrays
+
+    A store is a directory holding one .npy file per column and chunk plus a small JSON index of the
+    columns (dtype and row shape) and of the number of rows of every chunk. Appending writes a new chunk
+    and then replaces the index, so readers never see a partial chunk and an existing store can be
+    reopened to append more rows.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open the store at path, creating it if needed
+
+        A new store is written at once with an empty index, so it can be read before any rows are appended
+        """
+        batch._require_numpy()
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        index_path = os.path.join(path, _INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self.index = json.load(f)
+        else:
+            self.index = {'columns': None, 'chunks': []}
+            self._write_index()
+
+    def __len__(self) -> int:
+        return sum(self.index['chunks'])
+
+    def append(self, columns: dict) -> None:
+        """
+        Append a chunk of rows given as a dictionary of arrays with the same number of rows
+
+        The first chunk sets the columns of the store, even without rows, the next ones must have the same
+        columns, dtypes and row shapes.
+        """
+        np = batch.np
+        arrays = {name: np.ascontiguousarray(values) for name, values in columns.items()}
+        schema = {
+            name: {'dtype': values.dtype.str, 'shape': list(values.shape[1:])}
+            for name, values in arrays.items()
+        }
+        lengths = set(len(values) for values in arrays.values())
+        if len(lengths) != 1:
+            raise ValueError("Columns must have the same number of rows")
+        for name in arrays:
+            if not _COLUMN_NAME.match(name):
+                raise ValueError("Invalid column name: {}".format(name))
+        if self.index['columns'] is None:
+            self.index['columns'] = schema
+        elif schema != self.index['columns']:
+            raise ValueError("Columns do not match the store: {} != {}".format(schema, self.index['columns']))
+
+        rows = lengths.pop()
+        if rows:
+            chunk = len(self.index['chunks'])
+            for name, values in arrays.items():
+                np.save(os.path.join(self.path, _chunk_file(chunk, name)), values)
+            self.index['chunks'].append(rows)
+        self._write_index()
+
+    def _write_index(self) -> None:
+        """
+        Replace the index atomically
+        """
+        index_path = os.path.join(self.path, _INDEX_FILE)
+        tmp_path = "{}.{}.tmp".format(index_path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, index_path)
+
+
+class ColumnReader(object):
+    """
+    Lazy reader of a store written by ColumnWriter
+
+    Chunks are memory mapped, nothing is parsed and only the columns used are touched.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open the store at path
+        """
+        batch._require_numpy()
+        self.path = path
+        with open(os.path.join(path, _INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.columns = list(self.index['columns'] or {})
+
+    def __len__(self) -> int:
+        return sum(self.index['chunks'])
+
+    def _check(self, name: str) -> None:
+        if name not in self.columns:
+            raise KeyError("Unknown column: {}".format(name))
+
+    def chunk(self, chunk: int, name: str):
+        """
+        Memory mapped array of a column in one chunk
+        """
+        self._check(name)
+        return batch.np.load(os.path.join(self.path, _chunk_file(chunk, name)), mmap_mode='r')
+
+    def iter_chunks(self, columns: list = None):
+        """
+        Lazily yield a dictionary of memory mapped arrays for every chunk, for all columns or the given ones
+        """
+        columns = self.columns if columns is None else columns
+        for chunk in range(len(self.index['chunks'])):
+            yield {name: self.chunk(chunk, name) for name in columns}
+
+    def column(self, name: str):
+        """
+        Whole column as an array, memory mapped when the store has a single chunk
+        """
+        self._check(name)
+        np = batch.np
+        chunks = [self.chunk(i, name) for i in range(len(self.index['chunks']))]
+        if len(chunks) == 1:
+            return chunks[0]
+        if not chunks:
+            spec = self.index['columns'][name]
+            return np.empty([0] + spec['shape'], dtype=spec['dtype'])
+        return np.concatenate(chunks)
+
+    def __getitem__(self, name: str):
+        return self.column(name)
+
+
+def records_to_columns(records: list, num_players: int = 0, num_holecards: int = 0) -> dict:
+    """
+    Convert Simulator trial records to columns, num_players and num_holecards give the row shapes when
+    there are no records
+
+    Returns a dictionary of arrays:
+        'board': (N, 5) uint8 card indexes (see pypoker.card)
+        'holecards': (N, players, holecards) uint8 card indexes
+        'strengths': (N, players) uint16 hand strengths
+        'shares': (N, players) float32 pot shares
+    """
+    batch._require_numpy()
+    np = batch.np
+    if not len(records):
+        return {
+            'board': np.empty((0, 5), dtype=np.uint8),
+            'holecards': np.empty((0, num_players, num_holecards), dtype=np.uint8),
+            'strengths': np.empty((0, num_players), dtype=np.uint16),
+            'shares': np.empty((0, num_players), dtype=np.float32),
+        }
+    boards = np.array([[card_index(c) for c in board] for board, _, _ in records], dtype=np.uint8)
+    hands = np.array(
+        [[[card_index(c) for c in hand] for hand in hands] for _, hands, _ in records], dtype=np.uint8
+    )
+    strengths = np.array([s for _, _, s in records], dtype=np.uint16)
+    top = strengths.max(axis=1, keepdims=True)
+    winners = strengths == top
+    shares = (winners / winners.sum(axis=1, keepdims=True)).astype(np.float32)
+    return {'board': boards, 'holecards': hands, 'strengths': strengths, 'shares': shares}
+
+
+def decode_cards(indexes):
+    """
+    Convert an array of card indexes back to an int64 array of encoded cards (see pypoker.card)
+    """
+    np = batch.np
+    return np.array(INDEX_TO_INT, dtype=np.int64)[np.asarray(indexes)]
+
+
+def encode_cards(cards):
+    """
+    Convert an array of encoded cards (e.g. from Deck.deal_batch) to uint8 card indexes for storage
+    """
+    np = batch.np
+    ints = np.array(INDEX_TO_INT, dtype=np.int64)
+    order = np.argsort(ints)
+    return order[np.searchsorted(ints[order], np.asarray(cards))].astype(np.uint8)
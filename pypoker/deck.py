@@ -1,113 +1,168 @@
 import random
 
+from . import batch
+from .card import CARD_TO_INDEX, INDEX_TO_CARD, INDEX_TO_INT
+from .misc import HOLECARDS_COUNT
+from .rng import SeedSequence, make_rng
+
+# Order of the cards in the dictionary returned by Deck.deck
+_DICT_ORDER = [
+    CARD_TO_INDEX[rank + suit]
+    for suit in "scdh"
+    for rank in "23456789TJQKA"
+]
+
 
 class Deck(object):
     """
     Emulates a deck of cards
+
+    The cards are held as card indexes (see pypoker.card) in a bytearray. The cards before self.dealt
+    are out of the deck (dealt or knocked out), the rest are still available. Dealing k cards is a
+    partial Fisher-Yates shuffle of k swaps and resetting the deck only resets the dealt pointer.
     """
 
-    def __init__(self, num_decks=1) -> None:
+    def __init__(self, num_decks=1, rng=None) -> None:
         """
         Initialize the deck
+
+        rng is the source of randomness (see pypoker.rng.make_rng): None for the global random module,
+        an integer seed or a SeedSequence for reproducible dealing, 'secure' for a cryptographically
+        secure generator, or a random.Random instance
         """
         self.num_decks = num_decks
-        self.deck = {
-            "2s": self.num_decks,
-            "3s": self.num_decks,
-            "4s": self.num_decks,
-            "5s": self.num_decks,
-            "6s": self.num_decks,
-            "7s": self.num_decks,
-            "8s": self.num_decks,
-            "9s": self.num_decks,
-            "Ts": self.num_decks,
-            "Js": self.num_decks,
-            "Qs": self.num_decks,
-            "Ks": self.num_decks,
-            "As": self.num_decks,
-            "2c": self.num_decks,
-            "3c": self.num_decks,
-            "4c": self.num_decks,
-            "5c": self.num_decks,
-            "6c": self.num_decks,
-            "7c": self.num_decks,
-            "8c": self.num_decks,
-            "9c": self.num_decks,
-            "Tc": self.num_decks,
-            "Jc": self.num_decks,
-            "Qc": self.num_decks,
-            "Kc": self.num_decks,
-            "Ac": self.num_decks,
-            "2d": self.num_decks,
-            "3d": self.num_decks,
-            "4d": self.num_decks,
-            "5d": self.num_decks,
-            "6d": self.num_decks,
-            "7d": self.num_decks,
-            "8d": self.num_decks,
-            "9d": self.num_decks,
-            "Td": self.num_decks,
-            "Jd": self.num_decks,
-            "Qd": self.num_decks,
-            "Kd": self.num_decks,
-            "Ad": self.num_decks,
-            "2h": self.num_decks,
-            "3h": self.num_decks,
-            "4h": self.num_decks,
-            "5h": self.num_decks,
-            "6h": self.num_decks,
-            "7h": self.num_decks,
-            "8h": self.num_decks,
-            "9h": self.num_decks,
-            "Th": self.num_decks,
-            "Jh": self.num_decks,
-            "Qh": self.num_decks,
-            "Kh": self.num_decks,
-            "Ah": self.num_decks,
-        }
+        self.rng = make_rng(rng)
+        self.seed_sequence = rng if isinstance(rng, SeedSequence) else None
+        if isinstance(rng, int) and not isinstance(rng, bool):
+            self.seed_sequence = SeedSequence(rng)
+        # The secure generator draws exact integers, the others scale a float for speed
+        self.secure = isinstance(self.rng, random.SystemRandom)
+        self.cards = bytearray(range(52)) * num_decks
+        self.dealt = 0
+
+    def __len__(self) -> int:
+        """
+        Number of cards left in the deck
+        """
+        return len(self.cards) - self.dealt
+
+    @property
+    def deck(self) -> dict:
+        """
+        Dictionary of the number of copies of every card left in the deck
+        """
+        counts = [0] * 52
+        cards = self.cards
+        for i in range(self.dealt, len(cards)):
+            counts[cards[i]] += 1
+        return {INDEX_TO_CARD[i]: counts[i] for i in _DICT_ORDER}
+
+    @deck.setter
+    def deck(self, deck: dict) -> None:
+        """
+        Set the cards left in the deck from a dictionary of card counts, missing cards are out of the deck
+        """
+        live = bytearray()
+        for card, times in deck.items():
+            if not 0 <= times <= self.num_decks:
+                raise ValueError("Invalid count for {}: {}".format(card, times))
+            live += bytes([CARD_TO_INDEX[card]]) * times
+        out = bytearray()
+        for i in range(52):
+            out += bytes([i]) * (self.num_decks - live.count(i))
+        self.cards = out + live
+        self.dealt = len(out)
+
+    def _draw(self, num_cards: int, remove: bool = True) -> bytearray:
+        """
+        Draw num_cards random card indexes with a partial Fisher-Yates shuffle of the cards left
+
+        When remove is False the cards stay in the deck
+        """
+        cards = self.cards
+        start = self.dealt
+        end = len(cards)
+        if num_cards > end - start:
+            raise ValueError("Not enough cards in the deck.")
+        if self.secure:
+            randrange = self.rng.randrange
+            for i in range(start, start + num_cards):
+                j = randrange(i, end)
+                cards[i], cards[j] = cards[j], cards[i]
+        else:
+            rand = self.rng.random
+            for i in range(start, start + num_cards):
+                j = i + int(rand() * (end - i))
+                cards[i], cards[j] = cards[j], cards[i]
+        if remove:
+            self.dealt = start + num_cards
+        return cards[start: start + num_cards]
+
+    def spawn(self, num_children: int) -> list:
+        """
+        Create decks with statistically independent random streams, e.g. one per worker process
+
+        Children of a deck seeded with an integer or a SeedSequence are reproducible, children of a
+        secure deck are secure.
+        """
+        if self.secure:
+            return [Deck(self.num_decks, 'secure') for _ in range(num_children)]
+        if self.seed_sequence is None:
+            self.seed_sequence = SeedSequence(self.rng.getrandbits(128))
+        return [Deck(self.num_decks, child) for child in self.seed_sequence.spawn(num_children)]
+
+    def _draw_ints(self, num_cards: int) -> list:
+        """
+        Draw num_cards random encoded cards (see pypoker.card) that stay in the deck
+        """
+        return [INDEX_TO_INT[i] for i in self._draw(num_cards, remove=False)]
+
+    def _remove_index(self, index: int) -> None:
+        """
+        Take a specific card, given by its card index, out of the deck
+        """
+        try:
+            i = self.cards.index(index, self.dealt)
+        except ValueError:
+            raise ValueError("Card not in the deck: {}".format(INDEX_TO_CARD[index]))
+        cards = self.cards
+        cards[i], cards[self.dealt] = cards[self.dealt], cards[i]
+        self.dealt += 1
+
+    def _remove(self, card: str) -> None:
+        """
+        Take a specific card out of the deck
+        """
+        if card not in CARD_TO_INDEX:
+            raise ValueError("Card not in the deck: {}".format(card))
+        self._remove_index(CARD_TO_INDEX[card])
 
     def get_unique_card_sets(self, num_sets: int, set_length: int, output_format: str = 'str', deck: dict = None) -> list:
         """
         Get a list of unique card sets
         """
+        if output_format not in ('str', 'list'):
+            raise ValueError("Invalid output format.")
         if deck is not None:
             self.deck = deck
-        if num_sets * set_length > sum(self.deck.values()):
-            raise ValueError("Not enough cards in the deck.")
-        cards = []
-        for card, times in self.deck.items():
-            for _ in range(times):
-                cards.append(card)
-        sample = random.sample(cards, num_sets * set_length)
-
-        for s in sample:
-            self.deck[s] -= 1
+        sample = [INDEX_TO_CARD[i] for i in self._draw(num_sets * set_length)]
 
         if output_format == 'str':
             return [
                 ''.join(sample[i:i + set_length])
                 for i in range(0, len(sample), set_length)
             ]
-        elif output_format == 'list':
+        else:
             return [
                 sample[i:i + set_length]
                 for i in range(0, len(sample), set_length)
             ]
-        else:
-            raise ValueError("Invalid output format.")
-
-    # def get_random_cards(self, n) -> list:
 
     def get_community_cards(self) -> list:
         """
         Get a list of community cards
         """
-        remaining_deck = {
-            k: v
-            for k, v in self.deck.items()
-            if v > 0
-        }
-        return self.get_unique_card_sets(1, 5, output_format='list', deck=remaining_deck)[0]
+        return [INDEX_TO_CARD[i] for i in self._draw(5)]
 
     def deal_poker_hands(self, game_variant: str, num_players: int) -> dict:
         """
@@ -127,19 +182,18 @@ class Deck(object):
 
             'river': string of river card
         """
-        if game_variant == 'nlh':
-            player_cards = self.get_unique_card_sets(num_players, 2)
-        elif game_variant == 'plo4':
-            player_cards = self.get_unique_card_sets(num_players, 4)
-        elif game_variant == 'plo5':
-            player_cards = self.get_unique_card_sets(num_players, 5)
-        elif game_variant == 'plo6':
-            player_cards = self.get_unique_card_sets(num_players, 6)
-        community_cards = self.get_community_cards()
+        if game_variant not in HOLECARDS_COUNT:
+            raise ValueError("Unknown game variant: {}".format(game_variant))
+        num_holecards = HOLECARDS_COUNT[game_variant]
+
+        # Hole cards and community cards are dealt in a single draw
+        sample = [INDEX_TO_CARD[i] for i in self._draw(num_players * num_holecards + 5)]
+        community_cards = sample[-5:]
         dic = {
             'variant': game_variant,
             'player_cards': {
-                'p{}'.format(i+1): player_cards[i] for i in range(num_players)
+                'p{}'.format(i + 1): ''.join(sample[i * num_holecards: (i + 1) * num_holecards])
+                for i in range(num_players)
             },
             'flop': community_cards[0] + community_cards[1] + community_cards[2],
             'turn': community_cards[3],
@@ -149,82 +203,83 @@ class Deck(object):
         self.reset_deck()
         return dic
 
+    def _numpy_generator(self):
+        """
+        NumPy generator seeded from the random stream of the deck
+        """
+        if self.secure:
+            raise ValueError("Batch dealing uses NumPy's generator which is not cryptographically secure, "
+                             "use deal_poker_hands with a secure deck instead.")
+        return batch.np.random.default_rng(self.rng.getrandbits(128))
+
+    def deal_batch(self, game_variant: str, num_players: int, n: int, generator=None):
+        """
+        Deal n hands at once with NumPy
+
+        Every row is a random permutation prefix of the cards left in the deck, so cards taken out with
+        knockout_cards are never dealt. The deck itself is left unchanged.
+
+        Returns an (n, num_players * holecards + 5) int64 array of encoded cards (see pypoker.card):
+        the hole cards of p1, p2... pn followed by the 5 community cards
+        """
+        batch._require_numpy()
+        np = batch.np
+        if game_variant not in HOLECARDS_COUNT:
+            raise ValueError("Unknown game variant: {}".format(game_variant))
+        num_cards = num_players * HOLECARDS_COUNT[game_variant] + 5
+        live = np.array([INDEX_TO_INT[i] for i in self.cards[self.dealt:]], dtype=np.int64)
+        if num_cards > len(live):
+            raise ValueError("Not enough cards in the deck.")
+        if generator is None:
+            generator = self._numpy_generator()
+
+        deals = np.empty((n, num_cards), dtype=np.int64)
+        for start in range(0, n, batch.CHUNK_SIZE):
+            rows = min(batch.CHUNK_SIZE, n - start)
+            # Sorting random keys gives a uniform permutation of the live cards on every row
+            order = np.argsort(generator.random((rows, len(live))), axis=1)[:, :num_cards]
+            deals[start: start + rows] = live[order]
+        return deals
+
+    def iter_deals(self, game_variant: str, num_players: int, chunk_size: int = 65536, n: int = None):
+        """
+        Lazily deal hands in arrays of chunk_size rows (see deal_batch)
+
+        Deals n hands in total, or an unbounded stream if n is None. The arguments are checked at the call,
+        not when the first chunk is requested.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        if n is not None and n < 0:
+            raise ValueError("n must not be negative")
+        return self._iter_deals(game_variant, num_players, chunk_size, n)
+
+    def _iter_deals(self, game_variant: str, num_players: int, chunk_size: int, n: int):
+        generator = self._numpy_generator()
+        dealt = 0
+        while n is None or dealt < n:
+            rows = chunk_size if n is None else min(chunk_size, n - dealt)
+            yield self.deal_batch(game_variant, num_players, rows, generator)
+            dealt += rows
+
     def reset_deck(self):
         """
         Reset the deck to the full count
         """
-        self.deck = {
-            "2s": self.num_decks,
-            "3s": self.num_decks,
-            "4s": self.num_decks,
-            "5s": self.num_decks,
-            "6s": self.num_decks,
-            "7s": self.num_decks,
-            "8s": self.num_decks,
-            "9s": self.num_decks,
-            "Ts": self.num_decks,
-            "Js": self.num_decks,
-            "Qs": self.num_decks,
-            "Ks": self.num_decks,
-            "As": self.num_decks,
-            "2c": self.num_decks,
-            "3c": self.num_decks,
-            "4c": self.num_decks,
-            "5c": self.num_decks,
-            "6c": self.num_decks,
-            "7c": self.num_decks,
-            "8c": self.num_decks,
-            "9c": self.num_decks,
-            "Tc": self.num_decks,
-            "Jc": self.num_decks,
-            "Qc": self.num_decks,
-            "Kc": self.num_decks,
-            "Ac": self.num_decks,
-            "2d": self.num_decks,
-            "3d": self.num_decks,
-            "4d": self.num_decks,
-            "5d": self.num_decks,
-            "6d": self.num_decks,
-            "7d": self.num_decks,
-            "8d": self.num_decks,
-            "9d": self.num_decks,
-            "Td": self.num_decks,
-            "Jd": self.num_decks,
-            "Qd": self.num_decks,
-            "Kd": self.num_decks,
-            "Ad": self.num_decks,
-            "2h": self.num_decks,
-            "3h": self.num_decks,
-            "4h": self.num_decks,
-            "5h": self.num_decks,
-            "6h": self.num_decks,
-            "7h": self.num_decks,
-            "8h": self.num_decks,
-            "9h": self.num_decks,
-            "Th": self.num_decks,
-            "Jh": self.num_decks,
-            "Qh": self.num_decks,
-            "Kh": self.num_decks,
-            "Ah": self.num_decks,
-        }
+        self.dealt = 0
 
     def knock_cards(self, list_of_cards):
         """
         Remove cards from the deck
         """
         for card in list_of_cards:
-            self.deck[card] -= 1
+            self._remove(card)
 
-    def get_random_cards(self, num_cards) -> str:
+    def get_random_cards(self, num_cards) -> list:
         """
-        Get random cards
+        Get random cards, the cards stay in the deck
         """
-        remaining_deck = []
-        for card, times in self.deck.items():
-            for _ in range(times):
-                remaining_deck.append(card)
-        return random.sample(remaining_deck, num_cards)
-        pass
+        return [INDEX_TO_CARD[i] for i in self._draw(num_cards, remove=False)]
 
     def knockout_cards(self, deadcards: str):
         """
@@ -236,7 +291,7 @@ class Deck(object):
             deadcards = [deadcards[i: i+2]
                          for i in range(0, len(deadcards), 2)]
         for card in deadcards:
-            self.deck[card] -= 1
+            self._remove(card)
 
 
 if __name__ == '__main__':
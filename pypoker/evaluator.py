@@ -1,12 +1,40 @@
+from array import array
 from itertools import combinations
 
+from . import batch
+from .cache import LRUCache
+from .card import CARD_TO_INT, card_index, cards_to_str, parse_cards
+from .lookup import get_five_card_evaluator, get_lookup_evaluator
+from .omaha import OmahaBoard
+from .preflop import get_preflop_table
+from .result import ShowdownResult
+
 
 class Evaluator(object):
 
-    def __init__(self):
+    engines = ('default', 'lookup')
+
+    def __init__(self, engine: str = 'default', cache_size: int = None):
         """
         Initialize the class
+
+        engine selects how strength_evaluation finds the best hand:
+            'default': evaluate every 5 card combination, in memory
+            'lookup': table driven evaluation, Hold'em hands are evaluated with a single lookup and
+                      Omaha boards are preprocessed once and shared by all players. The table is
+                      built and saved to disk on first use (see pypoker.lookup.default_table_path)
+
+        The NumPy batch methods always use the lookup table.
+
+        cache_size enables an LRU cache of five card evaluations holding at most cache_size entries
         """
+        if engine not in self.engines:
+            raise ValueError("Unknown engine: {}".format(engine))
+        self.engine = engine
+        self.cache = LRUCache(cache_size) if cache_size else None
+        self._lookup = None
+        self._five_card = None
+        self._omaha_board = None
         self.card_strengths = {
             1: "Royal Flush",
             2: "Straight Flush",
@@ -36,6 +64,33 @@ class Evaluator(object):
             "3s", "3d", "3c", "3h",
             "2s", "2d", "2c", "2h"
         ]
+        # Position of each encoded card in rank_and_suites, used to order the cards of a combination
+        self.display_order = {
+            CARD_TO_INT[card]: i for i, card in enumerate(self.rank_and_suites)
+        }
+
+    def _rank_counts(self, cards: list) -> dict:
+        """
+        Count the number of cards of each rank index in a list of encoded cards
+        """
+        counts = {}
+        for card in cards:
+            rank = (card >> 8) & 0xF
+            counts[rank] = counts.get(rank, 0) + 1
+        return counts
+
+    def _straight_high(self, rank_mask: int) -> int:
+        """
+        Return the rank index of the highest card of the best straight in a rank bitmask, -1 if there is none
+        """
+        for high in range(12, 3, -1):
+            window = 0x1F << (high - 4)
+            if rank_mask & window == window:
+                return high
+        # Ace plays low in the wheel (A2345)
+        if rank_mask & 0x100F == 0x100F:
+            return 3
+        return -1
 
     def _is_royal_flush(self, cards: list) -> tuple:
         """
@@ -45,8 +100,7 @@ class Evaluator(object):
         2. The index of the highest card
         3. The highest card
         """
-        if isinstance(cards, str):
-            cards = [cards[i: i + 2] for i in range(0, len(cards), 2)]
+        cards = parse_cards(cards)
 
         is_royal = self._is_royal(cards)
 
@@ -63,8 +117,7 @@ class Evaluator(object):
         2. The index of the highest card
         3. The highest card
         """
-        if isinstance(cards, str):
-            cards = [cards[i: i + 2] for i in range(0, len(cards), 2)]
+        cards = parse_cards(cards)
 
         is_straight = self._is_straight(cards)
         is_flush = self._is_flush(cards)
@@ -83,8 +136,7 @@ class Evaluator(object):
         2. The index of the Ace
         3. The Ace
         """
-        if isinstance(cards, str):
-            cards = [cards[i: i + 2] for i in range(0, len(cards), 2)]
+        cards = parse_cards(cards)
 
         is_straight = self._is_straight(cards)
         is_flush = self._is_flush(cards)
@@ -103,15 +155,16 @@ class Evaluator(object):
         2. The index of the highest card
         3. The highest card
         """
-        if isinstance(cards, str):
-            cards = [cards[i: i + 2] for i in range(0, len(cards), 2)]
+        cards = parse_cards(cards)
 
-        suites = [card[1] for card in cards]
+        suit = 0xF000
+        for card in cards:
+            suit &= card
 
-        if len(set(suites)) == 1:
-            # sorted_ranks = sorted(cards, key=lambda x: self.ranks.index(x[0]))[-1][0]
-            sorted_ranks = [card for x in self.ranks for card in cards if card[0] == x][-1][0]
-            return True, self.ranks.index(sorted_ranks[-1]), sorted_ranks[-1]
+        if suit:
+            # Encoded cards are ordered by rank, so the largest integer is the highest card
+            high = (max(cards) >> 8) & 0xF
+            return True, high, self.ranks[high]
 
         return False, -1, None
 
@@ -123,32 +176,18 @@ class Evaluator(object):
         2. The index of the highest card
         3. The highest card
         """
-        if isinstance(cards, str):
-            cards = [cards[i: i + 2] for i in range(0, len(cards), 2)]
-
-        ranks_list = [card[0] for card in cards]
-
-        # ranks_list = sorted(ranks_list, key=lambda x: self.ranks.index(x))
-        ranks_list = [card for x in self.ranks for card in ranks_list if card[0] == x]
-
-        if ranks_list[-1] == "A":
-            if all([i in ranks_list for i in ["2", "3", "4", "5"]]):
-                return True, self.ranks.index("5"), "5"
+        cards = parse_cards(cards)
 
-            elif all([i in ranks_list for i in ["T", "J", "Q", "K"]]):
-                return True, self.ranks.index("A"), "A"
+        rank_mask = 0
+        for card in cards:
+            rank_mask |= card >> 16
 
-            else:
-                return False, -1, None
-
-        else:
-            start = self.ranks.index(ranks_list[0])
+        high = self._straight_high(rank_mask)
 
-            for i in range(start, start + 5):
-                if self.ranks[i] not in ranks_list:
-                    return False, -1, None
+        if high == -1:
+            return False, -1, None
 
-            return True, self.ranks.index(ranks_list[-1]), ranks_list[-1]
+        return True, high, self.ranks[high]
 
     def _is_four_of_a_kind(self, cards: list) -> tuple:
         """
@@ -158,20 +197,11 @@ class Evaluator(object):
         2. The index of the highest card
         3. The highest card
         """
-        if isinstance(cards, str):
-            cards = [cards[i: i + 2] for i in range(0, len(cards), 2)]
-
-        ranks = [card[0] for card in cards]
+        cards = parse_cards(cards)
 
-        counts = {
-            rank: ranks.count(rank)
-            for rank in ranks
-        }
-
-        if 4 in counts.values():
-            for rank, count in counts.items():
-                if count == 4:
-                    return True, self.ranks.index(rank), rank
+        for rank, count in self._rank_counts(cards).items():
+            if count == 4:
+                return True, rank, self.ranks[rank]
 
         return False, -1, None
 
@@ -185,19 +215,18 @@ class Evaluator(object):
         4. The index of the second highest card
         5. The second highest card
         """
-        if isinstance(cards, str):
-            cards = [cards[i: i + 2] for i in range(0, len(cards), 2)]
+        cards = parse_cards(cards)
 
-        list_of_ranks = list(set([card[0] for card in cards]))
+        counts = self._rank_counts(cards)
 
-        if len(list_of_ranks) == 2:
-            ranks = [card[0] for card in cards]
+        if len(counts) == 2:
+            (rank1, count1), (rank2, count2) = counts.items()
 
-            if ranks.count(list_of_ranks[0]) == 2 and ranks.count(list_of_ranks[1]) == 3:
-                return True, self.ranks.index(list_of_ranks[1]), list_of_ranks[1], self.ranks.index(list_of_ranks[0]), list_of_ranks[0]
+            if count1 == 2 and count2 == 3:
+                return True, rank2, self.ranks[rank2], rank1, self.ranks[rank1]
 
-            elif ranks.count(list_of_ranks[0]) == 3 and ranks.count(list_of_ranks[1]) == 2:
-                return True, self.ranks.index(list_of_ranks[0]), list_of_ranks[0], self.ranks.index(list_of_ranks[1]), list_of_ranks[1]
+            elif count1 == 3 and count2 == 2:
+                return True, rank1, self.ranks[rank1], rank2, self.ranks[rank2]
 
         return False, -1, None, -1, None
 
@@ -209,20 +238,11 @@ class Evaluator(object):
         2. The index of the highest card
         3. The highest card
         """
-        if isinstance(cards, str):
-            cards = [cards[i: i + 2] for i in range(0, len(cards), 2)]
-
-        ranks = [card[0] for card in cards]
+        cards = parse_cards(cards)
 
-        counts = {
-            rank: ranks.count(rank)
-            for rank in ranks
-        }
-
-        if 3 in counts.values():
-            for rank, count in counts.items():
-                if count == 3:
-                    return True, self.ranks.index(rank), rank
+        for rank, count in self._rank_counts(cards).items():
+            if count == 3:
+                return True, rank, self.ranks[rank]
 
         return False, -1, None
 
@@ -236,33 +256,17 @@ class Evaluator(object):
         4. The index of the second highest card
         5. The second highest card
         """
-        if isinstance(cards, str):
-            cards = [cards[i: i + 2] for i in range(0, len(cards), 2)]
-
-        ranks = [card[0] for card in cards]
+        cards = parse_cards(cards)
 
-        counts = {
-            rank: ranks.count(rank) for rank in ranks
-        }
-
-        pair_counts = sum([1 for count in counts.values() if count == 2])
+        pairs = sorted(
+            [rank for rank, count in self._rank_counts(cards).items() if count == 2],
+            reverse=True
+        )
 
-        if pair_counts != 2:
+        if len(pairs) != 2:
             return False, -1, None, -1, None
 
-        else:
-            current_highest = -1
-            current_second_highest = -1
-
-            for rank, count in counts.items():
-                if count == 2 and self.ranks.index(rank) > current_highest:
-                    current_highest = self.ranks.index(rank)
-
-                elif count == 2 and self.ranks.index(rank) > current_second_highest:
-                    current_second_highest = self.ranks.index(rank)
-
-            return True, current_highest, self.ranks[current_highest], current_second_highest, self.ranks[
-                current_second_highest]
+        return True, pairs[0], self.ranks[pairs[0]], pairs[1], self.ranks[pairs[1]]
 
     def _is_one_pair(self, cards: list) -> tuple:
         """
@@ -272,24 +276,70 @@ class Evaluator(object):
         2. The index of the highest card
         3. The highest card
         """
-        if isinstance(cards, str):
-            cards = [cards[i: i + 2] for i in range(0, len(cards), 2)]
-
-        ranks = [card[0] for card in cards]
+        cards = parse_cards(cards)
 
-        counts = {
-            rank: ranks.count(rank) for rank in ranks
-        }
         current_highest = -1
 
-        for rank, count in counts.items():
-            if count == 2 and self.ranks.index(rank) > current_highest:
-                current_highest = self.ranks.index(rank)
+        for rank, count in self._rank_counts(cards).items():
+            if count == 2 and rank > current_highest:
+                current_highest = rank
+
         if current_highest == -1:
             return False, -1, None
         else:
             return True, current_highest, self.ranks[current_highest]
 
+    def _evaluate_ints(self, cards: list) -> tuple:
+        """
+        Evaluate exactly 5 encoded cards
+
+        All the checks of card_strength_evaluator are done on a single pass over the card integers
+        """
+        c1, c2, c3, c4, c5 = cards
+        is_flush = c1 & c2 & c3 & c4 & c5 & 0xF000
+        rank_mask = (c1 | c2 | c3 | c4 | c5) >> 16
+        straight_high = self._straight_high(rank_mask)
+
+        if is_flush and straight_high != -1:
+            if straight_high == 12:
+                return "Royal Flush", 10, straight_high, self.ranks[straight_high]
+            return "Straight Flush", 9, straight_high, self.ranks[straight_high]
+
+        counts = self._rank_counts(cards)
+
+        if len(counts) == 2:
+            # Either four of a kind or a full house
+            for rank, count in counts.items():
+                if count == 4:
+                    return "Four of a Kind", 8, rank, self.ranks[rank]
+                if count == 3:
+                    return "Full House", 7, rank, self.ranks[rank]
+
+        high = (max(cards) >> 8) & 0xF
+
+        if is_flush:
+            return "Flush", 6, high, self.ranks[high]
+
+        if straight_high != -1:
+            return "Straight", 5, straight_high, self.ranks[straight_high]
+
+        if len(counts) == 3:
+            # Either three of a kind or two pair
+            pair_high = -1
+            for rank, count in counts.items():
+                if count == 3:
+                    return "Three of a Kind", 4, rank, self.ranks[rank]
+                if count == 2 and rank > pair_high:
+                    pair_high = rank
+            return "Two Pair", 3, pair_high, self.ranks[pair_high]
+
+        if len(counts) == 4:
+            for rank, count in counts.items():
+                if count == 2:
+                    return "One Pair", 2, rank, self.ranks[rank]
+
+        return "High Card", 1, high, self.ranks[high]
+
     def card_strength_evaluator(self, cards: list) -> tuple:
         """
         Given a set of cards, evaluate their strength and return the relevant information about it.
@@ -301,102 +351,216 @@ class Evaluator(object):
             3. Rank of the highest card in the combination
             4. Name of the highest card in the combination
         """
-        if isinstance(cards, str):
-            cards = [cards[i: i + 2] for i in range(0, len(cards), 2)]
+        cards = parse_cards(cards)
 
         if len(cards) != 5:
             raise ValueError("You must provide 5 cards")
 
-        cards = sorted(cards, key=lambda x: self.rank_and_suites.index(x), reverse=True)
+        return self._evaluate_ints(cards)
 
-        # check for royal flush
-        tup = self._is_royal_flush(cards)
-        if tup[0]:
-            return "Royal Flush", 10, tup[1], tup[2]
+    def _card_combos(self, holecards: list, community_cards: list, game_type: str):
+        """
+        Yield every 5 card combination of encoded cards allowed by the game type
+        """
+        if game_type == 'nlh':
+            yield from combinations(holecards + community_cards, 5)
 
-        # check for straight flush
-        tup = self._is_straight_flush(cards)
-        if tup[0]:
-            return "Straight Flush", 9, tup[1], tup[2]
+        else:
+            board_triples = list(combinations(community_cards, 3))
+            for hc in combinations(holecards, 2):
+                for cc in board_triples:
+                    yield hc + cc
 
-        # check for four of a kind
-        tup = self._is_four_of_a_kind(cards)
-        if tup[0]:
-            return "Four of a Kind", 8, tup[1], tup[2]
+    def get_possible_card_combos(self, holecards: str, community_cards: str, game_type: str) -> list:
+        """
+        Since two cards must be used in PLO games, we need to set constraints for it
 
-        # check for full house
-        tup = self._is_full_house(cards)
-        if tup[0]:
-            return "Full House", 7, tup[1], tup[2]
+        Returns a list of possible combinations of 5 card sets that can be made from the holecards and community cards
+        """
+        holecards = parse_cards(holecards)
+        community_cards = parse_cards(community_cards)
 
-        # check for flush
-        tup = self._is_flush(cards)
-        if tup[0]:
-            return "Flush", 6, tup[1], tup[2]
+        return [cards_to_str(i) for i in self._card_combos(holecards, community_cards, game_type)]
 
-        # check for straight
-        tup = self._is_straight(cards)
-        if tup[0]:
-            return "Straight", 5, tup[1], tup[2]
+    def _get_lookup(self):
+        """
+        Lookup table evaluator, loaded on first use
+        """
+        if self._lookup is None:
+            self._lookup = get_lookup_evaluator()
+        return self._lookup
 
-        # check for three of a kind
-        tup = self._is_three_of_a_kind(cards)
-        if tup[0]:
-            return "Three of a Kind", 4, tup[1], tup[2]
+    def _get_five_card(self):
+        """
+        In memory five card evaluator, built on first use
+        """
+        if self._five_card is None:
+            self._five_card = get_five_card_evaluator()
+        return self._five_card
 
-        # check for two pair
-        tup = self._is_two_pair(cards)
-        if tup[0]:
-            return "Two Pair", 3, tup[1], tup[2]
+    def _get_omaha_board(self, community_cards: list) -> OmahaBoard:
+        """
+        Omaha board data for the community cards, reused while the board does not change
+        """
+        board = self._omaha_board
+        if board is None or board.cards != tuple(community_cards):
+            board = self._omaha_board = OmahaBoard(community_cards, self._get_lookup())
+        return board
 
-        # check for one pair
-        tup = self._is_one_pair(cards)
-        if tup[0]:
-            return "One Pair", 2, tup[1], tup[2]
+    def _player_strength(self, holecards: list, community_cards: list, game_type: str, engine: str) -> int:
+        """
+        Strength of the best 5 card hand, without finding the cards that make it when possible
+        """
+        if engine == 'lookup' and game_type == 'nlh':
+            return self._get_lookup().evaluate(holecards + community_cards)
+        return self._best_hand(holecards, community_cards, game_type, engine)[0]
 
-        return "High Card", 1, self.ranks.index(cards[-1][0]), cards[-1][0]
+    def _five_card_strength(self, cards) -> int:
+        """
+        Strength of exactly 5 encoded cards, memoized when the evaluator has a cache
 
-    def get_possible_card_combos(self, holecards: str, community_cards: str, game_type: str) -> list:
+        The cache key is the product of the rank primes (the sorted ranks) and a flush flag (the only
+        thing suits change), so every suit permutation of a combination shares one entry.
         """
-        Since two cards must be used in PLO games, we need to set constraints for it
+        cache = self.cache
+        if cache is None:
+            return self._get_five_card().evaluate(cards)
 
-        Returns a list of possible combinations of 5 card sets that can be made from the holecards and community cards
+        c1, c2, c3, c4, c5 = cards
+        key = ((c1 & 0x3F) * (c2 & 0x3F) * (c3 & 0x3F) * (c4 & 0x3F) * (c5 & 0x3F)) << 1
+        if c1 & c2 & c3 & c4 & c5 & 0xF000:
+            key |= 1
+
+        strength = cache.get(key)
+        if strength is None:
+            strength = self._get_five_card().evaluate(cards)
+            cache.put(key, strength)
+        return strength
+
+    def cache_stats(self) -> dict:
         """
-        possible_cards = []
+        Statistics of the five card evaluation cache (see LRUCache.stats), None if caching is disabled
+        """
+        if self.cache is None:
+            return None
+        return self.cache.stats()
 
-        if isinstance(holecards, str):
-            holecards = [holecards[i: i + 2] for i in range(0, len(holecards), 2)]
+    def preflop_equity(self, holecards, opponent=None, num_players: int = 2, path: str = None) -> float:
+        """
+        All-in preflop equity of Hold'em hole cards from the precomputed tables (see pypoker.preflop)
 
-        if game_type == 'nlh':
-            return ["".join(i) for i in combinations(holecards + community_cards, 5)]
+        Inputs:
+            holecards: Hole cards ('AsKs') or starting hand class ('AKs')
+            opponent: Hole cards or class of a single opponent, None for random opponents
+            num_players: Number of players when the opponents are random (2 - 9)
+            path: Table file, defaults to pypoker.preflop.default_preflop_path()
 
-        else:
-            for hc in combinations(holecards, 2):
-                for cc in combinations(community_cards, 3):
-                    possible_cards.append(hc + cc)
+        The tables are memory mapped once per process, a query is a single read.
+        """
+        table = get_preflop_table(path)
+        if opponent is not None:
+            return table.headsup(holecards, opponent)
+        return table.multiway(holecards, num_players)
+
+    def hand_strength(self, cards: list) -> int:
+        """
+        Strength of the best 5 card hand out of 5 to 7 cards
+
+        Strengths range from 1 (7-5-4-3-2 offsuit) to 7462 (Royal Flush) and order hands completely,
+        kickers included. Two hands have the same strength only if they split the pot.
+        """
+        cards = parse_cards(cards)
+
+        if not 5 <= len(cards) <= 7:
+            raise ValueError("You must provide 5 to 7 cards")
+
+        if len(cards) == 5:
+            return self._five_card_strength(cards)
+        if self.engine == 'lookup':
+            return self._get_lookup().evaluate(cards)
+        return max(self._five_card_strength(combo) for combo in combinations(cards, 5))
+
+    def _best_hand(self, holecards: list, community_cards: list, game_type: str, engine: str) -> tuple:
+        """
+        Find the best 5 card hand out of encoded hole cards and community cards
+
+        Returns a tuple with the strength of the hand and its encoded cards
+        """
+        if engine == 'lookup' and game_type == 'nlh':
+            lookup = self._get_lookup()
+            cards = holecards + community_cards
+            strength = lookup.evaluate(cards)
+            return strength, lookup.best_five(cards, strength)
 
-            return ["".join(i) for i in possible_cards]
+        if engine == 'lookup':
+            return self._get_omaha_board(community_cards).evaluate(holecards)
 
-    def strength_evaluation(self, holecards: list, community_cards: list, game_type: str) -> tuple:
+        best_combo = None
+        strength = 0
+
+        for combo in self._card_combos(holecards, community_cards, game_type):
+            value = self._five_card_strength(combo)
+            if value > strength:
+                best_combo, strength = combo, value
+
+        return strength, best_combo
+
+    def strength_evaluation(self, holecards: list, community_cards: list, game_type: str, engine: str = None) -> tuple:
         """
         Perform a pairwise comparison of cards
+
+        engine overrides the engine the evaluator was created with
+
+        Returns a tuple with following items
+
+            1. Best combination of cards
+            2. Name of the combination
+            3. Rank of the combination (1 - 10)
+            4. Rank of the highest card in the combination
+            5. Name of the highest card in the combination
+            6. Strength of the combination (1 - 7462), see hand_strength
         """
-        if isinstance(holecards, str):
-            holecards = [holecards[i:i + 2] for i in range(0, len(holecards), 2)]
+        engine = engine or self.engine
+        if engine not in self.engines:
+            raise ValueError("Unknown engine: {}".format(engine))
+
+        holecards = parse_cards(holecards)
+        community_cards = parse_cards(community_cards)
+
+        strength, best_combo = self._best_hand(holecards, community_cards, game_type, engine)
+
+        name, combo_rank, high_rank, high_rank_card = self._get_five_card().describe(strength)
+        sorted_cards = sorted(best_combo, key=self.display_order.__getitem__)
 
-        if isinstance(community_cards, str):
-            community_cards = [community_cards[i:i + 2] for i in range(0, len(community_cards), 2)]
+        return cards_to_str(sorted_cards), name, combo_rank, high_rank, high_rank_card, strength
 
-        all_cards = self.get_possible_card_combos(holecards, community_cards, game_type)
+    def evaluate_batch(self, hands):
+        """
+        Evaluate many hands at once with NumPy
 
-        combos = {i: self.card_strength_evaluator(i) for i in all_cards}
+        Inputs:
+            hands: (N, 5), (N, 6) or (N, 7) integer array of encoded cards (see pypoker.card)
 
-        values = sorted(combos.items(), key=lambda x: (x[1][1], x[1][2]), reverse=True)[0]
+        Returns an int32 array of N hand strengths (1 - 7462, higher is better)
+        """
+        return batch.evaluate_batch(hands, self._get_lookup())
+
+    def declare_winner_batch(self, community_cards, player_cards, return_strengths: bool = False):
+        """
+        Determine the winners of N boards at once with NumPy
 
-        cards = [values[0][i:i + 2] for i in range(0, len(values[0]), 2)]
-        sorted_cards = sorted(cards, key=lambda x: self.rank_and_suites.index(x))
+        Inputs:
+            community_cards: (N, 5) integer array of encoded community cards
+            player_cards: (N, P, H) integer array of encoded hole cards (H = 2 for nlh, 4 - 6 for plo)
+            return_strengths: Also return the (N, P) array of hand strengths
 
-        return ''.join(sorted_cards), values[1][0], values[1][1], values[1][2], values[1][3]
+        Returns an (N, P) boolean array, True for every player holding the best hand on the board
+        """
+        strengths = batch.strength_batch(community_cards, player_cards, self._get_lookup())
+        winners = strengths == strengths.max(axis=1, keepdims=True)
+        if return_strengths:
+            return winners, strengths
+        return winners
 
     def get_playerwise_evaluation(self, holecards: str, community_cards: str, game_type: str) -> list:
         """
@@ -409,11 +573,12 @@ class Evaluator(object):
             3. Rank of the winning combination
             4. Name of the highest card in the winning combination
             5. Rank of the highest card in the winning combination
+            6. Strength of the winning combination (1 - 7462)
         """
-        winning_combo, winning_combo_name, winning_combo_rank, high_card_rank, high_card_name = self.strength_evaluation(
+        winning_combo, winning_combo_name, winning_combo_rank, high_card_rank, high_card_name, strength = self.strength_evaluation(
             holecards, community_cards, game_type)
 
-        return [winning_combo, winning_combo_name, winning_combo_rank, high_card_name, high_card_rank]
+        return [winning_combo, winning_combo_name, winning_combo_rank, high_card_name, high_card_rank, strength]
 
     def find_intersection(self, cards1, cards2) -> str:
         """
@@ -430,6 +595,26 @@ class Evaluator(object):
 
         return "".join(set1.intersection(set2))
 
+    def detect_game_type(self, player_cards: dict) -> str:
+        """
+        Determine the game type from the length of the hole cards
+
+        Returns 'nlh', 'plo4', 'plo5', 'plo6' or 'undefined'
+        """
+        # Get holecards length to define game_type
+        cards_len = [len(card) for card in player_cards.values()]
+
+        if all(4 == _ for _ in cards_len):
+            return 'nlh'
+        elif all(8 == _ for _ in cards_len):
+            return 'plo4'
+        elif all(10 == _ for _ in cards_len):
+            return 'plo5'
+        elif all(12 == _ for _ in cards_len):
+            return 'plo6'
+        else:
+            return 'undefined'
+
     def declare_winner(self, player_cards: dict, community_cards: str, return_type: str = 'list') -> list:
         """
         Given a set of cards, determine the winner
@@ -446,88 +631,48 @@ class Evaluator(object):
             'community_cards_used': Community cards used in making the best combination
             'high_rank': Highest rank of the best combination
             'high_rank_card': Name of the card with the highest rank
-            'game_type': String type of game 'nlh', 'plo4', 'plo5', 'undefined'
+            'strength': Strength of the best combination (1 - 7462), kickers included
+            'game_type': String type of game 'nlh', 'plo4', 'plo5', 'plo6', 'undefined'
             'holecards': Hole cards
             'holecards_used': Hole cards used in making the best combination
             'player': Player number (p1 - p9)
             'winner': Boolean value indicating whether the player is the winner
+
+        With return_type='compact', returns a ShowdownResult holding only the winner indexes, the
+        strengths and the cards used as bitmasks, the fields above are derived on demand.
         """
 
-        # Get holecards length to define game_type
-        cards_len = [len(card) for card in player_cards.values()]
+        if return_type not in ('list', 'dict', 'compact'):
+            raise ValueError("Invalid return type: {}".format(return_type))
 
-        if all(4 == _ for _ in cards_len):
-            game_type = 'nlh'
-        elif all(8 == _ for _ in cards_len):
-            game_type = 'plo4'
-        elif all(10 == _ for _ in cards_len):
-            game_type = 'plo5'
-        else:
-            game_type = 'undefined'
+        game_type = self.detect_game_type(player_cards)
 
-        strengths = {}
+        board = parse_cards(community_cards)
+        players = list(player_cards)
+        holecards = [parse_cards(player_cards[k]) for k in players]
 
-        for k, holecard in player_cards.items():
-            strengths[k] = self.get_playerwise_evaluation(holecard, community_cards=community_cards, game_type=game_type)
-
-            holecards_used = self.find_intersection(holecard, strengths[k][0])
-            community_cards_used = self.find_intersection(community_cards, strengths[k][0])
-
-            strengths[k].append(holecard)
-            strengths[k].append(holecards_used)
-            strengths[k].append(community_cards_used)
-            strengths[k].append(game_type)
-
-        return_dict = {}
-
-        highest_combo = []
-        highest_rank = []
-
-        for k in strengths:
-            return_dict[k] = {
-                'best_combo': strengths[k][0],
-                'best_combo_rank': strengths[k][2],
-                'best_combo_name': strengths[k][1],
-                'holecards': strengths[k][5],
-                'community_cards': community_cards,
-                'holecards_used': strengths[k][6],
-                'community_cards_used': strengths[k][7],
-                'high_rank': strengths[k][4],
-                'high_rank_card': strengths[k][3],
-                'game_type': strengths[k][8]
-            }
-
-            highest_combo.append(strengths[k][2])
-            highest_rank.append(strengths[k][4])
-
-        # Collect top combo rank
-        top_combo = sorted(highest_combo)[-1:]
-
-        # Collect top cards from top combos and getting highest to compare equal combos
-        top_combo_cards = sorted([v['high_rank'] for k, v in return_dict.items() if v['best_combo_rank'] in top_combo])[-1:]
-
-        for k, v in return_dict.items():
-            # Compare current rank with top
-            if v["best_combo_rank"] in top_combo:
-
-                # Compare current high card with top from top combo, if player have too top combo
-                if v["high_rank"] in top_combo_cards:
-                    v.update({
-                        "player": k,
-                        "winner": True
-                    })
-
-                # Else, if player have top combo, but not high card, return winner: False
-                else:
-                    v.update({
-                        "player": k,
-                        "winner": False
-                    })
-            else:
-                v.update({
-                    "player": k,
-                    "winner": False
-                })
+        strengths = array('H')
+        used_cards = []
+
+        for hole in holecards:
+            strength, combo = self._best_hand(hole, board, game_type, self.engine)
+            strengths.append(strength)
+
+            mask = 0
+            for card in combo:
+                mask |= 1 << card_index(card)
+            used_cards.append(mask)
+
+        # Strengths order hands completely, every player holding the top strength splits the pot
+        top_strength = max(strengths)
+        winners = tuple(i for i, strength in enumerate(strengths) if strength == top_strength)
+
+        result = ShowdownResult(self, players, holecards, board, game_type, strengths, used_cards, winners)
+
+        if return_type == 'compact':
+            return result
+
+        return_dict = result.to_dict()
 
         if return_type == 'list':
             return [_ for _ in return_dict.values()]
@@ -535,6 +680,138 @@ class Evaluator(object):
         elif return_type == 'dict':
             return return_dict
 
+    def declare_winner_runouts(self, player_cards: dict, boards, game_type: str = None) -> dict:
+        """
+        Determine the winners of the same hands on several boards, e.g. when running it twice
+
+        Inputs:
+            player_cards: Dictionary of player cards with player names (p1, p2... pn) as keys and card combinations as values
+            boards: Iterable of community cards (strings or lists of cards), or an (N, 5) NumPy array of encoded cards
+            game_type: Type of game, detected from the hole cards if not given
+
+        The hole cards are parsed once for all the boards.
+
+        Returns a dictionary with following keys
+            'winners': List with the tuple of winning players of every board
+            'wins': Dictionary of the number of boards won outright by every player
+            'ties': Dictionary of the number of boards split by every player
+            'equity': Dictionary of the average share of the pot won by every player
+            'num_boards': Number of boards
+        """
+        if game_type is None:
+            game_type = self.detect_game_type(player_cards)
+
+        players = list(player_cards)
+        holecards = [parse_cards(player_cards[k]) for k in players]
+
+        if batch.np is not None and isinstance(boards, batch.np.ndarray):
+            np = batch.np
+            player_array = np.array(holecards, dtype=np.int64)
+            all_strengths = batch.strength_batch(
+                boards,
+                np.broadcast_to(player_array, (len(boards),) + player_array.shape),
+                self._get_lookup()
+            ).tolist()
+        else:
+            all_strengths = (
+                [self._player_strength(hole, board, game_type, self.engine) for hole in holecards]
+                for board in map(parse_cards, boards)
+            )
+
+        winners = []
+        wins = dict.fromkeys(players, 0)
+        ties = dict.fromkeys(players, 0)
+        shares = dict.fromkeys(players, 0.0)
+
+        for strengths in all_strengths:
+            top_strength = max(strengths)
+            board_winners = tuple(players[i] for i, strength in enumerate(strengths) if strength == top_strength)
+            winners.append(board_winners)
+
+            counter = wins if len(board_winners) == 1 else ties
+            for player in board_winners:
+                counter[player] += 1
+                shares[player] += 1 / len(board_winners)
+
+        num_boards = len(winners)
+
+        return {
+            'winners': winners,
+            'wins': wins,
+            'ties': ties,
+            'equity': {k: v / num_boards if num_boards else 0.0 for k, v in shares.items()},
+            'num_boards': num_boards
+        }
+
+    def showdown(self, player_cards: dict, community_cards: str, contributions: dict, folded=(),
+                 order: list = None, game_type: str = None) -> dict:
+        """
+        Split the main pot and every side pot of a hand
+
+        Inputs:
+            player_cards: Dictionary of the hole cards of the players at showdown (folded players can be left out)
+            community_cards: String of community cards
+            contributions: Dictionary of the chips every player put in the pot during the hand, folded players included
+            folded: Players who folded, their chips stay in the pots but they cannot win them
+            order: Players in the order the odd chips of a split pot are given, one by one, starting with the
+                player closest to the left of the button. Defaults to the order of contributions
+            game_type: Type of game, detected from the hole cards if not given
+
+        The pots are layered by the contributions of the players at showdown: every pot is contested by the
+        players who put at least its level in, chips folded above the largest all-in go to the last pot.
+        Every hand is evaluated once whatever the number of side pots.
+
+        Returns a dictionary with following keys
+            'winnings': Dictionary of the chips won by every player of contributions
+            'pots': List of the pots from the main pot to the last side pot, dictionaries with the
+                'amount', the 'eligible' players and the 'winners'
+            'strengths': Dictionary of the hand strength (1 - 7462) of every player at showdown
+        """
+        folded = set(folded)
+        order = list(contributions) if order is None else list(order)
+        contenders = [p for p in contributions if p not in folded]
+        if not contenders:
+            raise ValueError("At least one player must not have folded")
+
+        strengths = {}
+        if len(contenders) > 1:
+            if game_type is None:
+                game_type = self.detect_game_type({p: player_cards[p] for p in contenders})
+            board = parse_cards(community_cards)
+            for player in contenders:
+                strengths[player] = self._player_strength(
+                    parse_cards(player_cards[player]), board, game_type, self.engine
+                )
+
+        levels = sorted(set(contributions[p] for p in contenders))
+        highest = max(contributions.values())
+        winnings = dict.fromkeys(contributions, 0)
+        pots = []
+        previous = 0
+        for i, level in enumerate(levels):
+            top = level if i < len(levels) - 1 else highest
+            amount = sum(min(c, top) - min(c, previous) for c in contributions.values())
+            previous = level
+            if not amount:
+                continue
+            eligible = [p for p in contenders if contributions[p] >= level]
+            best = max(strengths.get(p, 0) for p in eligible)
+            winners = [p for p in order if p in eligible and strengths.get(p, 0) == best]
+            # Players missing from order get the odd chips last
+            winners += [p for p in eligible if p not in winners and strengths.get(p, 0) == best]
+
+            if isinstance(amount, int):
+                share, odd = divmod(amount, len(winners))
+                for rank, player in enumerate(winners):
+                    winnings[player] += share + (1 if rank < odd else 0)
+            else:
+                for player in winners:
+                    winnings[player] += amount / len(winners)
+            pots.append({'amount': amount, 'eligible': eligible, 'winners': winners})
+
+        return {'winnings': winnings, 'pots': pots, 'strengths': strengths}
+
+
 if __name__ == '__main__':
     ev = Evaluator()
     one_pair = "AsAh8cTh9s"
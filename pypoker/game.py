@@ -4,9 +4,9 @@ from .misc import fuzzy_match_game_name
 
 class Poker(object):
 
-    def __init__(self, game_type, num_players, num_decks=1):
-        self.deck = Deck(num_decks)
-        self.evaluator = Evaluator()
+    def __init__(self, game_type, num_players, num_decks=1, engine='default', cache_size=None, rng=None):
+        self.deck = Deck(num_decks, rng)
+        self.evaluator = Evaluator(engine, cache_size)
         self.game_type = fuzzy_match_game_name(game_type)
         self.num_players = num_players
         self.num_decks = num_decks
@@ -17,11 +17,44 @@ class Poker(object):
         """
         return self.deck.deal_poker_hands(self.game_type, self.num_players)
 
-    def declare_winner(self, player_cards, community_cards):
+    def declare_winner(self, player_cards, community_cards, return_type='list'):
         """
         Declare winner
         """
         return self.evaluator.declare_winner(
             player_cards=player_cards,
-            community_cards=community_cards
+            community_cards=community_cards,
+            return_type=return_type
         )
+
+    def declare_winner_runouts(self, player_cards, boards):
+        """
+        Declare winners of the same hands on several boards (run it twice, all-in runouts)
+        """
+        return self.evaluator.declare_winner_runouts(
+            player_cards=player_cards,
+            boards=boards,
+            game_type=self.game_type
+        )
+
+    def showdown(self, player_cards, community_cards, contributions, folded=(), order=None):
+        """
+        Split the main pot and the side pots between the players at showdown
+        """
+        return self.evaluator.showdown(
+            player_cards=player_cards,
+            community_cards=community_cards,
+            contributions=contributions,
+            folded=folded,
+            order=order,
+            game_type=self.game_type
+        )
+
+    def preflop_equity(self, holecards, opponent=None):
+        """
+        All-in preflop equity of Hold'em hole cards against opponent, or against a random hand for every
+        other player at the table, from the precomputed tables
+        """
+        if self.game_type != 'nlh':
+            raise ValueError("Preflop tables are only available for nlh")
+        return self.evaluator.preflop_equity(holecards, opponent, self.num_players)
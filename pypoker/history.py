@@ -0,0 +1,319 @@
+import mmap
+import os
+import re
+from multiprocessing import Pool
+
+from .evaluator import Evaluator
+from .isomorphism import canonicalize
+from .preflop import HAND_CLASSES, hand_class
+
+# First line of a hand, e.g. "PokerStars Hand #2345: Hold'em No Limit ($0.50/$1.00 USD) - ..."
+_HAND_START = re.compile(rb'^[^:\r\n]*(?:Hand|Game) #\d+')
+_STREET = re.compile(r'^\*\*\* (HOLE CARDS|FLOP|TURN|RIVER|SHOW ?DOWN|SUMMARY) \*\*\*')
+_AMOUNT = r'[^\d\s]*([\d,]+(?:\.\d+)?)'
+_POST = re.compile(r'^(.+?): posts (small blind|big blind|small & big blinds|the ante) ' + _AMOUNT)
+_BET = re.compile(r'^(.+?): (?:bets|calls) ' + _AMOUNT)
+_RAISE = re.compile(r'^(.+?): raises ' + _AMOUNT + ' to ' + _AMOUNT)
+_FOLD = re.compile(r'^(.+?): folds')
+_UNCALLED = re.compile(r'^Uncalled bet \(' + _AMOUNT + r'\) returned to (.+)$')
+_COLLECTED = re.compile(r'^(.+?) collected ' + _AMOUNT + ' from')
+_DEALT = re.compile(r'^Dealt to (.+?) \[([^\]]+)\]')
+_SHOWS = re.compile(r'^(.+?): shows \[([^\]]+)\]')
+_BOARD = re.compile(r'^Board \[([^\]]+)\]')
+
+_GAME_TYPES = {2: 'nlh', 4: 'plo4', 5: 'plo5', 6: 'plo6'}
+
+# Bytes of a file handled by one worker, larger files are split on hand boundaries
+CHUNK_BYTES = 64 << 20
+
+
+def _amount(text: str) -> float:
+    return float(text.replace(',', ''))
+
+
+class Hand(object):
+    """
+    Money flow and known cards of one parsed hand
+    """
+
+    __slots__ = ('hand_id', 'game_type', 'board', 'holecards', 'shown', 'invested', 'won', 'preflop_folds')
+
+    def __init__(self, hand_id: str) -> None:
+        self.hand_id = hand_id
+        self.game_type = None
+        self.board = ''
+        # Hole cards known from "Dealt to" and "shows" lines, by player name
+        self.holecards = {}
+        # Players who showed their cards
+        self.shown = []
+        self.invested = {}
+        self.won = {}
+        self.preflop_folds = set()
+
+    def net(self, player: str) -> float:
+        """
+        Amount won minus amount put in the pot by a player
+        """
+        return self.won.get(player, 0.0) - self.invested.get(player, 0.0)
+
+
+def parse_hand(lines: list) -> Hand:
+    """
+    Parse the lines of one hand (PokerStars style text) into a Hand
+    """
+    hand = Hand(lines[0].split('#', 1)[1].split(':', 1)[0].strip())
+    street = 'PREFLOP'
+    committed = {}
+    street_bets = {}
+
+    def close_street():
+        for player, amount in street_bets.items():
+            committed[player] = committed.get(player, 0.0) + amount
+        street_bets.clear()
+
+    for line in lines[1:]:
+        line = line.strip()
+        if not line:
+            continue
+        match = _STREET.match(line)
+        if match:
+            # The blinds are posted before the hole cards marker, both belong to the preflop betting
+            if match.group(1) != 'HOLE CARDS':
+                close_street()
+            street = match.group(1)
+            continue
+
+        if street == 'SUMMARY':
+            match = _BOARD.match(line)
+            if match:
+                hand.board = match.group(1).replace(' ', '')
+            continue
+
+        match = _POST.match(line)
+        if match:
+            player, kind, amount = match.groups()
+            if kind == 'the ante':
+                committed[player] = committed.get(player, 0.0) + _amount(amount)
+            else:
+                street_bets[player] = street_bets.get(player, 0.0) + _amount(amount)
+            continue
+        match = _RAISE.match(line)
+        if match:
+            street_bets[match.group(1)] = _amount(match.group(3))
+            continue
+        match = _BET.match(line)
+        if match:
+            player = match.group(1)
+            street_bets[player] = street_bets.get(player, 0.0) + _amount(match.group(2))
+            continue
+        match = _UNCALLED.match(line)
+        if match:
+            player = match.group(2)
+            street_bets[player] = street_bets.get(player, 0.0) - _amount(match.group(1))
+            continue
+        match = _COLLECTED.match(line)
+        if match:
+            player = match.group(1)
+            hand.won[player] = hand.won.get(player, 0.0) + _amount(match.group(2))
+            continue
+        match = _FOLD.match(line)
+        if match:
+            if street in ('PREFLOP', 'HOLE CARDS'):
+                hand.preflop_folds.add(match.group(1))
+            continue
+        match = _SHOWS.match(line) or _DEALT.match(line)
+        if match:
+            player, cards = match.groups()
+            hand.holecards[player] = cards.replace(' ', '')
+            if line.startswith(player + ': shows') and player not in hand.shown:
+                hand.shown.append(player)
+
+    close_street()
+    hand.invested = committed
+    if hand.holecards:
+        num_cards = len(next(iter(hand.holecards.values()))) // 2
+        hand.game_type = _GAME_TYPES.get(num_cards)
+    return hand
+
+
+def iter_hand_lines(path: str, start: int = 0, end: int = None, use_mmap: bool = False):
+    """
+    Stream the hands of a hand history file as lists of text lines
+
+    Only the hands whose first line starts in the byte range [start, end) are returned, so a file can be
+    split in byte ranges processed independently. With use_mmap the file is memory mapped instead of
+    read through a buffer, in both cases it is never loaded whole.
+    """
+    with open(path, 'rb') as f:
+        if use_mmap:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            source = f
+        try:
+            position = start
+            if start > 0:
+                # Skip the line the range starts in, unless it starts exactly at the beginning of a line
+                source.seek(start - 1)
+                position = start - 1 + len(source.readline())
+            else:
+                source.seek(0)
+
+            lines = None
+            for line in iter(source.readline, b''):
+                if _HAND_START.match(line):
+                    if lines:
+                        yield lines
+                    if end is not None and position >= end:
+                        return
+                    lines = [line.decode('utf-8', 'replace')]
+                elif lines is not None:
+                    lines.append(line.decode('utf-8', 'replace'))
+                position += len(line)
+            if lines:
+                yield lines
+        finally:
+            if use_mmap:
+                source.close()
+
+
+def starting_hand(holecards: str, game_type: str) -> str:
+    """
+    Key of the starting hand statistics: the class ('AKs') in Hold'em, the suit isomorphic form in Omaha
+    """
+    if game_type == 'nlh':
+        return HAND_CLASSES[hand_class(holecards)]
+    return canonicalize(holecards)[0]
+
+
+class HandStats(object):
+    """
+    Per starting hand results, mergeable across files and processes
+
+    For every starting hand: the number of hands its cards were known, how many of them went to showdown
+    and were won outright or split (winners determined by Evaluator.declare_winner), the net amount won,
+    the amount lost in the losing hands and the amount lost folding preflop.
+    """
+
+    FIELDS = ('hands', 'showdowns', 'wins', 'ties', 'net', 'losses', 'preflop_folds', 'preflop_losses')
+
+    def __init__(self) -> None:
+        self.stats = {}
+        self.num_hands = 0
+        self.errors = 0
+
+    def _row(self, game_type: str, key: str) -> list:
+        row = self.stats.get((game_type, key))
+        if row is None:
+            row = self.stats[(game_type, key)] = [0] * len(self.FIELDS)
+        return row
+
+    def add(self, hand: Hand, evaluator: Evaluator) -> None:
+        """
+        Add the results of a parsed hand
+        """
+        self.num_hands += 1
+        game_type = hand.game_type
+        if game_type is None:
+            return
+
+        showdown = hand.shown
+        winners = ()
+        if len(showdown) >= 2 and len(hand.board) == 10:
+            result = evaluator.declare_winner(
+                {p: hand.holecards[p] for p in showdown}, hand.board, return_type='compact'
+            )
+            winners = tuple(showdown[i] for i in result.winners)
+
+        for player, cards in hand.holecards.items():
+            row = self._row(game_type, starting_hand(cards, game_type))
+            net = hand.net(player)
+            row[0] += 1
+            if player in showdown and winners:
+                row[1] += 1
+                if player in winners:
+                    row[2 if len(winners) == 1 else 3] += 1
+            row[4] += net
+            if net < 0:
+                row[5] -= net
+            if player in hand.preflop_folds:
+                row[6] += 1
+                row[7] -= net
+
+    def merge(self, other: 'HandStats') -> 'HandStats':
+        """
+        Add the statistics of other to these ones, returns self
+        """
+        for key, other_row in other.stats.items():
+            row = self.stats.get(key)
+            if row is None:
+                self.stats[key] = list(other_row)
+            else:
+                for i, value in enumerate(other_row):
+                    row[i] += value
+        self.num_hands += other.num_hands
+        self.errors += other.errors
+        return self
+
+    def __add__(self, other: 'HandStats') -> 'HandStats':
+        return HandStats().merge(self).merge(other)
+
+    def to_dict(self) -> dict:
+        """
+        Dictionary of the statistics of every (game type, starting hand) with its win rate at showdown
+        """
+        result = {}
+        for (game_type, key), row in self.stats.items():
+            entry = dict(zip(self.FIELDS, row))
+            entry['win_rate'] = (row[2] + row[3] / 2) / row[1] if row[1] else None
+            result.setdefault(game_type, {})[key] = entry
+        return result
+
+
+def analyze_file(path: str, start: int = 0, end: int = None, use_mmap: bool = False) -> HandStats:
+    """
+    Statistics of the hands of a file (or of the byte range [start, end) of a file)
+
+    Hands that cannot be parsed or evaluated are counted in HandStats.errors
+    """
+    evaluator = Evaluator('lookup')
+    stats = HandStats()
+    for lines in iter_hand_lines(path, start, end, use_mmap):
+        try:
+            hand = parse_hand(lines)
+            stats.add(hand, evaluator)
+        except (ValueError, KeyError, IndexError):
+            stats.errors += 1
+    return stats
+
+
+def _analyze_chunk(args: tuple) -> HandStats:
+    return analyze_file(*args)
+
+
+def analyze(paths, processes: int = None, chunk_bytes: int = CHUNK_BYTES, use_mmap: bool = False) -> HandStats:
+    """
+    Statistics of the hands of several hand history files
+
+    Files are split in chunks of about chunk_bytes which are parsed on a process pool, the partial
+    statistics are merged as they come back.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    tasks = []
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, max(size, 1), chunk_bytes):
+            tasks.append((path, start, start + chunk_bytes, use_mmap))
+
+    stats = HandStats()
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(tasks) <= 1:
+        for task in tasks:
+            stats.merge(_analyze_chunk(task))
+    else:
+        with Pool(min(processes, len(tasks))) as pool:
+            for partial in pool.imap_unordered(_analyze_chunk, tasks):
+                stats.merge(partial)
+    return stats
@@ -0,0 +1,106 @@
+from itertools import permutations
+
+from .card import RANKS, SUITS
+from .misc import HOLECARDS_COUNT
+
+_SUIT_PERMUTATIONS = list(permutations(range(4)))
+
+
+def _split(cards: str) -> list:
+    """
+    Split a string of cards into (rank index, suit index) tuples
+    """
+    try:
+        return [
+            (RANKS.index(cards[i]), SUITS.index(cards[i + 1]))
+            for i in range(0, len(cards), 2)
+        ]
+    except (ValueError, IndexError):
+        raise ValueError("Invalid cards: {}".format(cards))
+
+
+def _join(cards) -> str:
+    """
+    Join (rank index, suit index) tuples back into a string of cards
+    """
+    return "".join(RANKS[rank] + SUITS[suit] for rank, suit in cards)
+
+
+def _sort_group(cards) -> tuple:
+    """
+    Order cards whose order does not matter, highest rank first
+    """
+    return tuple(sorted(cards, key=lambda card: (-card[0], card[1])))
+
+
+def canonicalize(holecards, board: str = '', game_type: str = None) -> tuple:
+    """
+    Map a situation to the representative of its suit permutation class
+
+    Inputs:
+        holecards: String of hole cards, or a list of strings for several players (order is kept)
+        board: String of community cards dealt so far (nothing, flop, flop + turn or flop + turn + river)
+        game_type: Optional game type ('nlh', 'plo4', 'plo5', 'plo6') used to validate the hole cards
+
+    Situations that only differ by a renaming of suits (e.g. AsKs on 2s7h9d and AhKh on 2h7s9d) have
+    the same canonical form, which makes it suitable as a cache key.
+
+    Returns a tuple with 3 values:
+    1. Canonical hole cards, in the same shape as holecards
+    2. Canonical board
+    3. Permutation used, a dictionary mapping each original suit to its canonical suit
+    """
+    single = isinstance(holecards, str)
+    players = [holecards] if single else list(holecards)
+
+    if game_type is not None:
+        if game_type not in HOLECARDS_COUNT:
+            raise ValueError("Unknown game type: {}".format(game_type))
+        for hand in players:
+            if len(hand) != 2 * HOLECARDS_COUNT[game_type]:
+                raise ValueError("Invalid hole cards for {}: {}".format(game_type, hand))
+
+    if len(board) not in (0, 6, 8, 10):
+        raise ValueError("Board must have 0, 3, 4 or 5 cards: {}".format(board))
+
+    # Groups of cards whose internal order does not matter: each player's hand, the flop, the turn and the river
+    groups = [_split(hand) for hand in players]
+    board_cards = _split(board)
+    if board_cards:
+        groups.append(board_cards[:3])
+    groups += [[card] for card in board_cards[3:]]
+
+    best_key = None
+    best_permutation = None
+    for permutation in _SUIT_PERMUTATIONS:
+        key = tuple(
+            _sort_group([(rank, permutation[suit]) for rank, suit in group])
+            for group in groups
+        )
+        if best_key is None or key < best_key:
+            best_key, best_permutation = key, permutation
+
+    canonical_players = [_join(group) for group in best_key[:len(players)]]
+    canonical_board = "".join(_join(group) for group in best_key[len(players):])
+    mapping = {SUITS[i]: SUITS[best_permutation[i]] for i in range(4)}
+
+    return (canonical_players[0] if single else canonical_players), canonical_board, mapping
+
+
+def apply_permutation(cards, permutation: dict):
+    """
+    Rename the suits of cards (a string or a list of strings) with a permutation returned by canonicalize
+    """
+    if not isinstance(cards, str):
+        return [apply_permutation(hand, permutation) for hand in cards]
+    return "".join(
+        cards[i] + permutation[cards[i + 1]]
+        for i in range(0, len(cards), 2)
+    )
+
+
+def invert_permutation(permutation: dict) -> dict:
+    """
+    Return the permutation mapping canonical suits back to the original ones
+    """
+    return {v: k for k, v in permutation.items()}
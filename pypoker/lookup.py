@@ -0,0 +1,359 @@
+import mmap
+import os
+import sys
+from array import array
+from functools import lru_cache
+from itertools import combinations, combinations_with_replacement
+
+from .card import PRIMES, RANKS
+
+CATEGORY_NAMES = {
+    1: "High Card",
+    2: "One Pair",
+    3: "Two Pair",
+    4: "Three of a Kind",
+    5: "Straight",
+    6: "Flush",
+    7: "Full House",
+    8: "Four of a Kind",
+    9: "Straight Flush",
+    10: "Royal Flush"
+}
+
+NUM_CLASSES = 7462
+
+# Start of the rank multiset tables for 5, 6 and 7 cards, each holding C(13 + n - 1, n) entries
+MULTISET_BASE = {5: 8192, 6: 8192 + 6188, 7: 8192 + 6188 + 18564}
+_TABLE_SIZE = 8192 + 6188 + 18564 + 50388
+
+_MAGIC = b"PYPOKER-LUT-v1-" + (b"L" if sys.byteorder == "little" else b"B")
+_FILE_NAME = "hand_ranks.lut"
+
+
+def _binom(n: int, k: int) -> int:
+    """
+    Binomial coefficient, 0 when k > n
+    """
+    if k < 0 or k > n:
+        return 0
+    result = 1
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+# OFFSETS[i * 13 + r] is the contribution of the i-th smallest rank r to the multiset index
+OFFSETS = [_binom(r + i, i + 1) for i in range(7) for r in range(13)]
+
+_STRAIGHTS = [(high, high - 1, high - 2, high - 3, high - 4) for high in range(4, 13)]
+_WHEEL = (3, 2, 1, 0, 12)
+
+
+@lru_cache(maxsize=None)
+def _enumerate_classes() -> tuple:
+    """
+    Enumerate the 7462 distinct five card hand classes from the weakest to the strongest, once per process
+
+    Returns a tuple of (category, ranks) tuples. ranks holds the rank indexes of the five cards, grouped
+    by multiplicity and then ordered from high to low, e.g. (9, 9, 12, 5, 0) for a pair of jacks.
+    """
+    straights = set(tuple(sorted(s)) for s in _STRAIGHTS + [_WHEEL])
+    distinct = sorted(
+        [tuple(sorted(c, reverse=True)) for c in combinations(range(13), 5) if c not in straights]
+    )
+    ranks_high_to_low = list(range(12, -1, -1))
+
+    classes = [(1, c) for c in distinct]
+
+    pairs = []
+    for pair in range(13):
+        for kickers in combinations([r for r in ranks_high_to_low if r != pair], 3):
+            pairs.append((pair, pair) + kickers)
+    classes += [(2, c) for c in sorted(pairs)]
+
+    two_pairs = []
+    for low, high in combinations(range(13), 2):
+        for kicker in range(13):
+            if kicker not in (low, high):
+                two_pairs.append((high, high, low, low, kicker))
+    classes += [(3, c) for c in sorted(two_pairs)]
+
+    trips = []
+    for trip in range(13):
+        for kickers in combinations([r for r in ranks_high_to_low if r != trip], 2):
+            trips.append((trip, trip, trip) + kickers)
+    classes += [(4, c) for c in sorted(trips)]
+
+    classes += [(5, _WHEEL)] + [(5, s) for s in _STRAIGHTS]
+
+    classes += [(6, c) for c in distinct]
+
+    classes += sorted(
+        [(7, (trip, trip, trip, pair, pair)) for trip in range(13) for pair in range(13) if trip != pair]
+    )
+
+    classes += sorted(
+        [(8, (quad, quad, quad, quad, kicker)) for quad in range(13) for kicker in range(13) if quad != kicker]
+    )
+
+    classes += [(9, _WHEEL)] + [(9, s) for s in _STRAIGHTS[:-1]] + [(10, _STRAIGHTS[-1])]
+
+    return tuple(classes)
+
+
+def _multiset_index(sorted_ranks) -> int:
+    """
+    Index of an ascending sorted rank multiset within its table
+    """
+    index = 0
+    for i, rank in enumerate(sorted_ranks):
+        index += OFFSETS[i * 13 + rank]
+    return index
+
+
+def build_tables(classes: tuple = None) -> array:
+    """
+    Build the lookup table
+
+    The table is an array of unsigned 16 bit hand strengths (1 - 7462, higher is better) made of:
+
+        8192 entries indexed by the rank bitmask of a suit holding 5 or more cards (flushes)
+
+        One table per hand size (5, 6, 7) indexed by the rank multiset of the hand (everything else)
+
+    Each entry holds the strength of the best five card hand, so a 7 card hand is evaluated with a
+    single lookup instead of expanding its 21 combinations.
+    """
+    if classes is None:
+        classes = _enumerate_classes()
+
+    flush_strength = {}
+    plain_strength = {}
+    for strength, (category, ranks) in enumerate(classes, 1):
+        if category in (6, 9, 10):
+            mask = 0
+            for rank in ranks:
+                mask |= 1 << rank
+            flush_strength[mask] = strength
+        else:
+            plain_strength[tuple(sorted(ranks))] = strength
+
+    table = array("H", bytes(2 * _TABLE_SIZE))
+
+    for mask, strength in flush_strength.items():
+        table[mask] = strength
+    for size in (6, 7):
+        for ranks in combinations(range(13), size):
+            best = 0
+            for five in combinations(ranks, 5):
+                best = max(best, flush_strength[sum(1 << rank for rank in five)])
+            table[sum(1 << rank for rank in ranks)] = best
+
+    for size in (5, 6, 7):
+        base = MULTISET_BASE[size]
+        for ranks in combinations_with_replacement(range(13), size):
+            best = 0
+            for five in combinations(ranks, 5):
+                strength = plain_strength.get(five, 0)
+                if strength > best:
+                    best = strength
+            table[base + _multiset_index(ranks)] = best
+
+    return table
+
+
+def default_table_path() -> str:
+    """
+    Location of the lookup table on disk
+
+    Defaults to ~/.cache/pypoker, can be changed through the PYPOKER_TABLE_DIR environment variable
+    """
+    directory = os.environ.get("PYPOKER_TABLE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "pypoker")
+    return os.path.join(directory, _FILE_NAME)
+
+
+def save_tables(table: array, path: str) -> None:
+    """
+    Write the lookup table to disk
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC)
+        table.tofile(f)
+    os.replace(tmp_path, path)
+
+
+def load_tables(path: str):
+    """
+    Memory map the lookup table from disk
+
+    Returns a read only memoryview of unsigned 16 bit integers, or None if the file is missing or invalid
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(mapped) != len(_MAGIC) + 2 * _TABLE_SIZE or mapped[:len(_MAGIC)] != _MAGIC:
+        mapped.close()
+        return None
+    return memoryview(mapped)[len(_MAGIC):].cast("H")
+
+
+class FiveCardEvaluator(object):
+    """
+    In memory evaluator for hands of exactly 5 cards, nothing is read from or written to disk
+
+    Hand strengths range from 1 (7-5-4-3-2 offsuit) to 7462 (Royal Flush), every distinct hand class
+    has its own strength so two hands tie only if they split the pot.
+    """
+
+    def __init__(self) -> None:
+        self.classes = _enumerate_classes()
+        # Strength of every five card hand without a flush, keyed by the product of its rank primes
+        self.products = {}
+        # Strength of every flush, keyed by its rank bitmask
+        self.flushes = {}
+        for strength, (category, ranks) in enumerate(self.classes, 1):
+            if category in (6, 9, 10):
+                self.flushes[sum(1 << rank for rank in ranks)] = strength
+            else:
+                product = 1
+                for rank in ranks:
+                    product *= PRIMES[rank]
+                self.products[product] = strength
+        # Strength of the best flush that is not a straight flush
+        self.max_flush = max(i for i, (category, _) in enumerate(self.classes, 1) if category == 6)
+
+    def evaluate(self, cards: list) -> int:
+        """
+        Return the strength of exactly 5 encoded cards
+        """
+        c1, c2, c3, c4, c5 = cards
+        if c1 & c2 & c3 & c4 & c5 & 0xF000:
+            return self.flushes[(c1 | c2 | c3 | c4 | c5) >> 16]
+        return self.products[(c1 & 0x3F) * (c2 & 0x3F) * (c3 & 0x3F) * (c4 & 0x3F) * (c5 & 0x3F)]
+
+    def describe(self, strength: int) -> tuple:
+        """
+        Describe a hand strength the same way as Evaluator.card_strength_evaluator
+
+        Returns a tuple with following items
+
+            1. Name of the combination
+            2. Rank of the combination (1 - 10)
+            3. Rank of the highest card in the combination
+            4. Name of the highest card in the combination
+        """
+        category, ranks = self.classes[strength - 1]
+        return CATEGORY_NAMES[category], category, ranks[0], RANKS[ranks[0]]
+
+
+class LookupEvaluator(FiveCardEvaluator):
+    """
+    Table driven evaluator for hands of 5 to 7 cards, with the strengths of FiveCardEvaluator
+
+    The table is memory mapped from disk, it is built and written there on first use, and kept in memory
+    only when the directory cannot be written.
+    """
+
+    def __init__(self, path: str = None) -> None:
+        """
+        Load the lookup table from path, building and saving it first if needed
+        """
+        super().__init__()
+        self.path = path or default_table_path()
+        self.table = load_tables(self.path)
+        if self.table is None:
+            table = build_tables(self.classes)
+            try:
+                save_tables(table, self.path)
+            except OSError:
+                # Read only file system, keep the table in memory
+                self.table = table
+            else:
+                self.table = load_tables(self.path) or table
+
+    def evaluate(self, cards: list) -> int:
+        """
+        Return the strength of the best five card hand out of 5 to 7 encoded cards
+        """
+        table = self.table
+        suit_masks = [0] * 9
+        suit_counts = [0] * 9
+        ranks = []
+        for card in cards:
+            suit = (card >> 12) & 0xF
+            suit_masks[suit] |= card >> 16
+            suit_counts[suit] += 1
+            ranks.append((card >> 8) & 0xF)
+
+        for suit in (1, 2, 4, 8):
+            if suit_counts[suit] >= 5:
+                strength = table[suit_masks[suit]]
+                if strength:
+                    return strength
+
+        ranks.sort()
+        index = MULTISET_BASE[len(ranks)]
+        for i, rank in enumerate(ranks):
+            index += OFFSETS[i * 13 + rank]
+        return table[index]
+
+    def best_five(self, cards: list, strength: int = None) -> list:
+        """
+        Return the five encoded cards out of cards that make the hand of the given strength
+        """
+        if strength is None:
+            strength = self.evaluate(cards)
+        category, ranks = self.classes[strength - 1]
+
+        pool = list(cards)
+        if category in (6, 9, 10):
+            for suit in (0x1000, 0x2000, 0x4000, 0x8000):
+                suited = [card for card in pool if card & suit]
+                if len(suited) >= 5:
+                    pool = suited
+                    break
+
+        chosen = []
+        for rank in ranks:
+            for card in pool:
+                if (card >> 8) & 0xF == rank:
+                    chosen.append(card)
+                    pool.remove(card)
+                    break
+        return chosen
+
+
+_evaluators = {}
+_five_card_evaluator = None
+
+
+def get_five_card_evaluator() -> FiveCardEvaluator:
+    """
+    Return the in memory FiveCardEvaluator, built only once per process
+    """
+    global _five_card_evaluator
+    if _five_card_evaluator is None:
+        _five_card_evaluator = FiveCardEvaluator()
+    return _five_card_evaluator
+
+
+def get_lookup_evaluator(path: str = None) -> LookupEvaluator:
+    """
+    Return the LookupEvaluator for path, loading its table only once per process
+    """
+    path = path or default_table_path()
+    if path not in _evaluators:
+        _evaluators[path] = LookupEvaluator(path)
+    return _evaluators[path]
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else default_table_path()
+    save_tables(build_tables(), target)
+    print("Lookup table written to {}".format(target))
@@ -0,0 +1,482 @@
+import cProfile
+import functools
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from . import batch
+from .deck import Deck
+from .evaluator import Evaluator
+from .game import Poker
+from .lookup import LookupEvaluator
+from .misc import HOLECARDS_COUNT
+from .omaha import OmahaBoard
+
+# Upper bounds in seconds of the latency histogram buckets (1 us to 10 s), the last bucket is unbounded
+LATENCY_BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 1) for m in (1, 2, 5)) + (10.0,)
+
+_VARIANTS = {count: variant for variant, count in HOLECARDS_COUNT.items()}
+
+
+class Histogram(object):
+    """
+    Latency histogram with fixed logarithmic buckets
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max', 'five_card_evaluations')
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        # Five card evaluations done during the observed calls
+        self.five_card_evaluations = 0
+
+    def observe(self, seconds: float) -> None:
+        """
+        Add one measured duration
+        """
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the q-th percentile (0 - 100), the maximum for the last bucket
+        """
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(LATENCY_BUCKETS[i], self.max) if i < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        """
+        Summary of the histogram, durations in seconds
+
+        'buckets' lists the [upper bound, count] of the non empty buckets, None being unbounded
+        """
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'five_card_evaluations': self.five_card_evaluations,
+            'five_card_evaluations_per_call': self.five_card_evaluations / self.count if self.count else None,
+            'buckets': [
+                [LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else None, count]
+                for i, count in enumerate(self.counts) if count
+            ],
+        }
+
+
+class Metrics(object):
+    """
+    Counters and per method latency histograms collected while metrics are enabled
+
+    Counters:
+        'hands_evaluated': player hands evaluated by the Evaluator methods
+        'five_card_evaluations': five card hands evaluated, one per combination with the default engine,
+            one per board triple looked up for a new hole pair with the Omaha lookup engine
+        'table_evaluations': lookups of a 5 to 7 card hand in the lookup table
+        'cache_hits', 'cache_misses': five card evaluation cache of Evaluator (cache_size)
+        'board_cache_hits': hole pairs of an Omaha board already evaluated for another player
+
+    Histograms are keyed by method, game variant and number of players when the call has them.
+    """
+
+    def __init__(self) -> None:
+        self.exporters = []
+        self.export_interval = None
+        self.counters = dict.fromkeys(
+            ('hands_evaluated', 'five_card_evaluations', 'table_evaluations', 'cache_hits', 'cache_misses',
+             'board_cache_hits'), 0
+        )
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clear the counters and histograms
+        """
+        # In place, the wrappers installed by enable hold on to the counters dictionary
+        self.counters.update(dict.fromkeys(self.counters, 0))
+        self.histograms = {}
+        self.started = time.time()
+        self._last_export = time.perf_counter()
+
+    def observe(self, method: str, variant: str, num_players: int, seconds: float, five_card_evaluations: int) -> None:
+        """
+        Record one call of a method
+        """
+        key = (method, variant, num_players)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+        histogram.five_card_evaluations += five_card_evaluations
+
+    def snapshot(self) -> dict:
+        """
+        Dictionary of the counters and of the histograms by name ('Evaluator.declare_winner[plo5,6p]')
+        """
+        methods = {}
+        for (method, variant, num_players), histogram in self.histograms.items():
+            name = method
+            if variant is not None:
+                name += '[{}]'.format(variant if num_players is None else '{},{}p'.format(variant, num_players))
+            entry = histogram.to_dict()
+            entry.update({'method': method, 'variant': variant, 'players': num_players})
+            methods[name] = entry
+        return {
+            'started': self.started,
+            'time': time.time(),
+            'counters': dict(self.counters),
+            'methods': methods,
+        }
+
+    def export(self) -> dict:
+        """
+        Send a snapshot to every exporter, returns the snapshot
+        """
+        self._last_export = time.perf_counter()
+        snapshot = self.snapshot()
+        for exporter in self.exporters:
+            exporter(snapshot)
+        return snapshot
+
+
+class JsonLinesExporter(object):
+    """
+    Exporter appending every snapshot as a JSON line to a file
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def __call__(self, snapshot: dict) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(snapshot) + "\n")
+
+
+metrics = Metrics()
+_originals = {}
+
+
+def _arg(args: tuple, kwargs: dict, index: int, name: str, default=None):
+    """
+    Argument of a call by position (self included) or by name
+    """
+    if len(args) > index:
+        return args[index]
+    return kwargs.get(name, default)
+
+
+def _variant_of(holecards) -> str:
+    return _VARIANTS.get(len(holecards) // 2 if isinstance(holecards, str) else len(holecards))
+
+
+def _deal_labels(args, kwargs, result):
+    return _arg(args, kwargs, 1, 'game_variant'), _arg(args, kwargs, 2, 'num_players')
+
+
+def _poker_labels(args, kwargs, result):
+    return args[0].game_type, args[0].num_players
+
+
+def _showdown_labels(args, kwargs, result):
+    player_cards = _arg(args, kwargs, 1, 'player_cards')
+    variant = _variant_of(next(iter(player_cards.values()))) if player_cards else None
+    return variant, len(player_cards)
+
+
+def _pots_labels(args, kwargs, result):
+    player_cards = _arg(args, kwargs, 1, 'player_cards')
+    variant = _arg(args, kwargs, 6, 'game_type')
+    if variant is None and player_cards:
+        variant = _variant_of(next(iter(player_cards.values())))
+    return variant, len(_arg(args, kwargs, 3, 'contributions'))
+
+
+def _strength_labels(args, kwargs, result):
+    return _arg(args, kwargs, 3, 'game_type'), None
+
+
+def _batch_labels(args, kwargs, result):
+    # Arrays or nested lists
+    shape = batch.np.shape(_arg(args, kwargs, 2, 'player_cards'))
+    return _VARIANTS.get(shape[2]), shape[1]
+
+
+def _no_labels(args, kwargs, result):
+    return None, None
+
+
+def _showdown_hands(args, kwargs, result):
+    return len(_arg(args, kwargs, 1, 'player_cards'))
+
+
+def _runout_hands(args, kwargs, result):
+    return len(_arg(args, kwargs, 1, 'player_cards')) * result['num_boards']
+
+
+def _pots_hands(args, kwargs, result):
+    return len(result['strengths'])
+
+
+def _batch_hands(args, kwargs, result):
+    shape = batch.np.shape(_arg(args, kwargs, 2, 'player_cards'))
+    return shape[0] * shape[1]
+
+
+def _one_hand(args, kwargs, result):
+    return 1
+
+
+def _len_hands(args, kwargs, result):
+    return len(result)
+
+
+# Instrumented public methods: (labels, number of hands evaluated)
+_METHODS = {
+    Deck: {
+        'get_unique_card_sets': (_no_labels, None),
+        'get_community_cards': (_no_labels, None),
+        'deal_poker_hands': (_deal_labels, None),
+        'deal_batch': (_deal_labels, None),
+        'reset_deck': (_no_labels, None),
+        'knock_cards': (_no_labels, None),
+        'get_random_cards': (_no_labels, None),
+        'knockout_cards': (_no_labels, None),
+    },
+    Evaluator: {
+        'card_strength_evaluator': (_no_labels, _one_hand),
+        'hand_strength': (_no_labels, _one_hand),
+        'strength_evaluation': (_strength_labels, _one_hand),
+        'evaluate_batch': (_no_labels, _len_hands),
+        'declare_winner_batch': (_batch_labels, _batch_hands),
+        'declare_winner': (_showdown_labels, _showdown_hands),
+        'declare_winner_runouts': (_showdown_labels, _runout_hands),
+        'showdown': (_pots_labels, _pots_hands),
+        'preflop_equity': (_no_labels, None),
+    },
+    Poker: {
+        'deal': (_poker_labels, None),
+        'declare_winner': (_poker_labels, None),
+        'declare_winner_runouts': (_poker_labels, None),
+        'showdown': (_poker_labels, None),
+        'preflop_equity': (_poker_labels, None),
+    },
+}
+
+
+def _timed(method: str, original, labels, hands):
+    """
+    Wrap a public method to time it and count the hands it evaluates
+    """
+    counters = metrics.counters
+    perf_counter = time.perf_counter
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        evaluations = counters['five_card_evaluations']
+        start = perf_counter()
+        result = original(*args, **kwargs)
+        elapsed = perf_counter() - start
+        variant, num_players = labels(args, kwargs, result)
+        metrics.observe(method, variant, num_players, elapsed, counters['five_card_evaluations'] - evaluations)
+        if hands is not None:
+            counters['hands_evaluated'] += hands(args, kwargs, result)
+        if metrics.export_interval is not None and start - metrics._last_export >= metrics.export_interval:
+            metrics.export()
+        return result
+    return wrapper
+
+
+def _counted_five_card_strength(original):
+    counters = metrics.counters
+
+    @functools.wraps(original)
+    def wrapper(self, cards):
+        counters['five_card_evaluations'] += 1
+        cache = self.cache
+        if cache is None:
+            return original(self, cards)
+        hits = cache.hits
+        result = original(self, cards)
+        if cache.hits != hits:
+            counters['cache_hits'] += 1
+        else:
+            counters['cache_misses'] += 1
+        return result
+    return wrapper
+
+
+def _counted_table_evaluation(original):
+    counters = metrics.counters
+
+    @functools.wraps(original)
+    def wrapper(self, cards):
+        counters['table_evaluations'] += 1
+        return original(self, cards)
+    return wrapper
+
+
+def _counted_plain(original):
+    counters = metrics.counters
+
+    @functools.wraps(original)
+    def wrapper(self, product):
+        if product in self._plain_cache:
+            counters['board_cache_hits'] += 1
+        else:
+            counters['five_card_evaluations'] += len(self.triple_products)
+        return original(self, product)
+    return wrapper
+
+
+def _counted_flush(original):
+    counters = metrics.counters
+
+    @functools.wraps(original)
+    def wrapper(self, suit, rank_mask):
+        if (suit, rank_mask) in self._flush_cache:
+            counters['board_cache_hits'] += 1
+        else:
+            counters['five_card_evaluations'] += len(self.flush_triples[suit])
+        return original(self, suit, rank_mask)
+    return wrapper
+
+
+# Internal hot paths counted while metrics are enabled
+_COUNTED = {
+    Evaluator: {'_five_card_strength': _counted_five_card_strength},
+    LookupEvaluator: {'evaluate': _counted_table_evaluation},
+    OmahaBoard: {'_plain': _counted_plain, '_flush': _counted_flush},
+}
+
+
+def is_enabled() -> bool:
+    """
+    Whether the metrics are being collected
+    """
+    return bool(_originals)
+
+
+def enable(exporter=None, export_interval: float = None) -> Metrics:
+    """
+    Start collecting metrics
+
+    Inputs:
+        exporter: Callable receiving snapshot dictionaries (e.g. JsonLinesExporter), added to metrics.exporters
+        export_interval: Seconds between automatic exports, checked when an instrumented method is called
+
+    The methods of Deck, Evaluator and Poker are replaced by timed wrappers, so disabled metrics cost
+    nothing at all. Instances created before enabling are instrumented too. The metrics are per process
+    and not locked, calls from several threads may be miscounted.
+
+    Returns the Metrics collector
+    """
+    if exporter is not None:
+        metrics.exporters.append(exporter)
+    metrics.export_interval = export_interval
+    if _originals:
+        return metrics
+    for cls, methods in _METHODS.items():
+        for name, (labels, hands) in methods.items():
+            original = cls.__dict__[name]
+            _originals[(cls, name)] = original
+            setattr(cls, name, _timed('{}.{}'.format(cls.__name__, name), original, labels, hands))
+    for cls, methods in _COUNTED.items():
+        for name, wrap in methods.items():
+            original = cls.__dict__[name]
+            _originals[(cls, name)] = original
+            setattr(cls, name, wrap(original))
+    return metrics
+
+
+def disable() -> None:
+    """
+    Stop collecting metrics and restore the original methods, the collected metrics are kept
+    """
+    for (cls, name), original in _originals.items():
+        setattr(cls, name, original)
+    _originals.clear()
+
+
+def snapshot() -> dict:
+    """
+    Snapshot of the collected metrics (see Metrics.snapshot)
+    """
+    return metrics.snapshot()
+
+
+def reset() -> None:
+    """
+    Clear the collected metrics
+    """
+    metrics.reset()
+
+
+@contextmanager
+def profile(path: str = None, memory: bool = False, sort: str = 'cumulative', limit: int = 40):
+    """
+    Profile a block with cProfile, and tracemalloc if memory is True
+
+    Inputs:
+        path: File the report is written to, binary pstats data for a '.prof' file (for snakeviz or
+            pstats.Stats) and a text report otherwise
+        memory: Also trace memory allocations and report the largest allocation sites and the peak
+        sort: pstats sort key of the text report
+        limit: Number of functions (and allocation sites) in the text report
+
+    Yields a dictionary filled when the block exits: 'stats' (pstats.Stats), 'report' (text report) and
+    with memory, 'peak_memory' (bytes) and 'allocations' (tracemalloc statistics)
+    """
+    result = {}
+    profiler = cProfile.Profile()
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats(sort).print_stats(limit)
+        if memory:
+            allocations = tracemalloc.take_snapshot().statistics('lineno')
+            result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+            result['allocations'] = allocations
+            stream.write("Peak traced memory: {} bytes\n\n".format(result['peak_memory']))
+            for stat in allocations[:limit]:
+                stream.write("{}\n".format(stat))
+            if tracing:
+                tracemalloc.stop()
+        result['stats'] = stats
+        result['report'] = stream.getvalue()
+        if path is not None:
+            if path.endswith('.prof'):
+                stats.dump_stats(path)
+            else:
+                with open(path, "w") as f:
+                    f.write(result['report'])
@@ -1,3 +1,5 @@
+# Number of hole cards dealt to every player
+HOLECARDS_COUNT = {'nlh': 2, 'plo4': 4, 'plo5': 5, 'plo6': 6}
 
 
 def fuzzy_match_game_name(name: str) -> str:
@@ -35,7 +37,7 @@ def fuzzy_match_game_name(name: str) -> str:
         else:
             # Default to plo4
             return 'plo4'
-    elif 'hold' in name or 'texas' in name:
+    elif name == 'nlh' or 'hold' in name or 'texas' in name:
         return 'nlh'
     else:
         raise ValueError("Unknown game name: {}".format(name))
@@ -0,0 +1,126 @@
+from itertools import combinations
+
+from .lookup import NUM_CLASSES
+
+# Rank bitmasks of the ten straights, wheel included
+_STRAIGHT_WINDOWS = [0x1F << low for low in range(9)] + [0x100F]
+
+
+class OmahaBoard(object):
+    """
+    Community card data shared by every player of an Omaha showdown
+
+    Everything that only depends on the board is computed once: the board triples, the suits that can
+    make a flush and the straight windows. The best hand of each hole card pair is cached by ranks (and by
+    suit for flushes), so after the first player most hole pairs are dictionary lookups.
+    """
+
+    __slots__ = (
+        'cards', 'lookup', 'triples', 'triple_products', 'straight_windows',
+        'flush_triples', 'flush_caps', '_plain_cache', '_flush_cache'
+    )
+
+    def __init__(self, community_cards: list, lookup) -> None:
+        """
+        Precompute the board data
+
+        community_cards: list of encoded cards (3 to 5)
+        lookup: LookupEvaluator providing the hand strength tables
+        """
+        self.cards = tuple(community_cards)
+        self.lookup = lookup
+        self.triples = list(combinations(self.cards, 3))
+        self.triple_products = [(a & 0x3F) * (b & 0x3F) * (c & 0x3F) for a, b, c in self.triples]
+
+        rank_mask = 0
+        for card in self.cards:
+            rank_mask |= card >> 16
+        # Straights that can be completed with two hole cards
+        self.straight_windows = [w for w in _STRAIGHT_WINDOWS if bin(rank_mask & w).count('1') >= 3]
+
+        self.flush_triples = {}
+        self.flush_caps = {}
+        for suit in (0x1000, 0x2000, 0x4000, 0x8000):
+            suited = [
+                (i, (a | b | c) >> 16)
+                for i, (a, b, c) in enumerate(self.triples)
+                if a & b & c & suit
+            ]
+            if not suited:
+                continue
+            self.flush_triples[suit] = suited
+
+            suit_mask = 0
+            for card in self.cards:
+                if card & suit:
+                    suit_mask |= card >> 16
+            # Highest strength a flush of this suit can reach, used to skip hole pairs
+            if any(bin(suit_mask & w).count('1') >= 3 for w in self.straight_windows):
+                self.flush_caps[suit] = NUM_CLASSES
+            else:
+                self.flush_caps[suit] = lookup.max_flush
+
+        self._plain_cache = {}
+        self._flush_cache = {}
+
+    def _plain(self, product: int) -> tuple:
+        """
+        Best hand without a flush for a hole pair given by the product of its rank primes
+
+        Returns (strength, index of the board triple)
+        """
+        cached = self._plain_cache.get(product)
+        if cached is None:
+            products = self.lookup.products
+            best, best_triple = 0, -1
+            for i, triple_product in enumerate(self.triple_products):
+                strength = products.get(triple_product * product, 0)
+                if strength > best:
+                    best, best_triple = strength, i
+            cached = self._plain_cache[product] = (best, best_triple)
+        return cached
+
+    def _flush(self, suit: int, rank_mask: int) -> tuple:
+        """
+        Best flush or straight flush for a suited hole pair given by its suit bit and rank bitmask
+
+        Returns (strength, index of the board triple)
+        """
+        key = (suit, rank_mask)
+        cached = self._flush_cache.get(key)
+        if cached is None:
+            table = self.lookup.table
+            best, best_triple = 0, -1
+            for i, triple_mask in self.flush_triples[suit]:
+                strength = table[triple_mask | rank_mask]
+                if strength > best:
+                    best, best_triple = strength, i
+            cached = self._flush_cache[key] = (best, best_triple)
+        return cached
+
+    def evaluate(self, holecards: list) -> tuple:
+        """
+        Evaluate encoded Omaha hole cards against the board
+
+        Returns (strength, best five cards), exactly two hole cards and three board cards are used
+        """
+        best, best_combo = 0, None
+        seen = set()
+        flush_caps = self.flush_caps
+
+        for a, b in combinations(holecards, 2):
+            product = (a & 0x3F) * (b & 0x3F)
+            if product not in seen:
+                seen.add(product)
+                strength, triple = self._plain(product)
+                if strength > best:
+                    best, best_combo = strength, (a, b) + self.triples[triple]
+
+            suit = a & b & 0xF000
+            # Only pairs suited with a flush suit of the board that can still beat the best hand
+            if suit in flush_caps and best < flush_caps[suit]:
+                strength, triple = self._flush(suit, (a | b) >> 16)
+                if strength > best:
+                    best, best_combo = strength, (a, b) + self.triples[triple]
+
+        return best, best_combo
@@ -0,0 +1,249 @@
+import mmap
+import os
+import sys
+import time
+from array import array
+from math import isnan
+from multiprocessing import Pool
+
+from .card import RANKS, parse_cards, rank_of, suit_of
+from .lookup import default_table_path
+from .ranges import Range, _expand_shorthand
+from .rng import SeedSequence
+
+_MAGIC = b"PYPOKER-PRE-v1-" + (b"L" if sys.byteorder == "little" else b"B")
+_FILE_NAME = "preflop.eq"
+
+NUM_CLASSES = 169
+# Opponent counts of the tables against random hands: 2 to 9 players in total
+MAX_PLAYERS = 9
+_HEADSUP_SIZE = NUM_CLASSES * NUM_CLASSES
+_TABLE_SIZE = _HEADSUP_SIZE + NUM_CLASSES * (MAX_PLAYERS - 1)
+
+
+def _class_name(index: int) -> str:
+    """
+    Name of a starting hand class: pairs on the diagonal, suited hands above it, offsuit hands below
+    """
+    row, col = divmod(index, 13)
+    if row == col:
+        return RANKS[row] * 2
+    if row > col:
+        return RANKS[row] + RANKS[col] + 's'
+    return RANKS[col] + RANKS[row] + 'o'
+
+
+HAND_CLASSES = [_class_name(i) for i in range(NUM_CLASSES)]
+_CLASS_INDEX = {name: i for i, name in enumerate(HAND_CLASSES)}
+
+
+def hand_class(hand) -> int:
+    """
+    Index (0 - 168) of the starting hand class of Hold'em hole cards
+
+    hand can be two cards ('AsKs', a list of card strings or encoded cards) or a class name ('AKs', 'QQ')
+    """
+    if isinstance(hand, str) and hand in _CLASS_INDEX:
+        return _CLASS_INDEX[hand]
+    cards = parse_cards(hand)
+    if len(cards) != 2:
+        raise ValueError("Invalid Hold'em hole cards: {}".format(hand))
+    high, low = sorted((rank_of(c) for c in cards), reverse=True)
+    if high == low:
+        if cards[0] == cards[1]:
+            raise ValueError("Duplicate cards: {}".format(hand))
+        return high * 13 + high
+    if suit_of(cards[0]) == suit_of(cards[1]):
+        return high * 13 + low
+    return low * 13 + high
+
+
+def default_preflop_path() -> str:
+    """
+    Location of the preflop tables on disk, next to the lookup table
+    """
+    return os.path.join(os.path.dirname(default_table_path()), _FILE_NAME)
+
+
+def _headsup_entry(hero: int, villain: int) -> int:
+    return hero * NUM_CLASSES + villain
+
+
+def _multiway_entry(hero: int, num_players: int) -> int:
+    return _HEADSUP_SIZE + hero * (MAX_PLAYERS - 1) + num_players - 2
+
+
+def _build_entry(args: tuple) -> tuple:
+    """
+    Simulate one table entry, executed in the worker processes
+
+    Returns (entry, equity of the first player)
+    """
+    # Imported here, the simulator depends on the evaluator which uses these tables
+    from .simulator import Simulator
+
+    entry, num_trials, seed = args
+    simulator = Simulator('nlh', processes=1, seed=SeedSequence(seed).child(entry))
+    if entry < _HEADSUP_SIZE:
+        hero, villain = divmod(entry, NUM_CLASSES)
+        players = [Range(_expand_shorthand(HAND_CLASSES[hero])), Range(_expand_shorthand(HAND_CLASSES[villain]))]
+    else:
+        hero, opponents = divmod(entry - _HEADSUP_SIZE, MAX_PLAYERS - 1)
+        players = [Range(_expand_shorthand(HAND_CLASSES[hero]))] + [''] * (opponents + 1)
+    return entry, simulator.run(players, num_trials)['equity'][0]
+
+
+def _open_tables(path: str):
+    """
+    Open the table file for writing, creating an empty one (every entry NaN) if it is missing or invalid
+
+    Returns (mmap, writable memoryview of 32 bit floats)
+    """
+    valid = False
+    try:
+        with open(path, "rb") as f:
+            valid = f.read(len(_MAGIC)) == _MAGIC and os.fstat(f.fileno()).st_size == len(_MAGIC) + 4 * _TABLE_SIZE
+    except OSError:
+        pass
+    if not valid:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        empty = array("f", [float("nan")]) * _TABLE_SIZE
+        # Mirrored matchups have the same entries, a class against itself splits evenly
+        for i in range(NUM_CLASSES):
+            empty[_headsup_entry(i, i)] = 0.5
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            empty.tofile(f)
+        os.replace(tmp_path, path)
+    with open(path, "r+b") as f:
+        mapped = mmap.mmap(f.fileno(), 0)
+    return mapped, memoryview(mapped)[len(_MAGIC):].cast("f")
+
+
+def build_preflop_tables(path: str = None, num_trials: int = 20000, processes: int = None, seed: int = 0,
+                         flush_interval: float = 5.0, verbose: bool = False) -> str:
+    """
+    Build the preflop equity tables
+
+    Inputs:
+        path: Table file, defaults to default_preflop_path()
+        num_trials: Monte Carlo trials per entry
+        processes: Number of worker processes, defaults to the number of CPUs
+        seed: Seed of the simulations, every entry has its own stream so the result does not depend on
+            the pool size or on interruptions
+        flush_interval: Seconds between writes of the finished entries to disk
+        verbose: Print the progress
+
+    Entries are written in place as they are finished and missing entries are NaN, so an interrupted
+    build resumes where it stopped when it is run again.
+
+    Returns the path of the table file
+    """
+    path = path or default_preflop_path()
+    mapped, data = _open_tables(path)
+    try:
+        # Only one of two mirrored matchups is simulated
+        pending = [
+            _headsup_entry(hero, villain)
+            for hero in range(NUM_CLASSES) for villain in range(hero + 1, NUM_CLASSES)
+            if isnan(data[_headsup_entry(hero, villain)])
+        ]
+        pending += [
+            _multiway_entry(hero, num_players)
+            for hero in range(NUM_CLASSES) for num_players in range(2, MAX_PLAYERS + 1)
+            if isnan(data[_multiway_entry(hero, num_players)])
+        ]
+        tasks = [(entry, num_trials, seed) for entry in pending]
+        processes = processes or os.cpu_count() or 1
+
+        last_flush = time.perf_counter()
+        with Pool(processes) as pool:
+            for done, (entry, equity) in enumerate(pool.imap_unordered(_build_entry, tasks, chunksize=4), 1):
+                data[entry] = equity
+                if entry < _HEADSUP_SIZE:
+                    hero, villain = divmod(entry, NUM_CLASSES)
+                    data[_headsup_entry(villain, hero)] = 1 - equity
+                if time.perf_counter() - last_flush >= flush_interval:
+                    mapped.flush()
+                    last_flush = time.perf_counter()
+                    if verbose:
+                        print("{}/{} entries".format(done, len(tasks)))
+    finally:
+        data.release()
+        mapped.flush()
+        mapped.close()
+    return path
+
+
+class PreflopTable(object):
+    """
+    Memory mapped Hold'em preflop all-in equities
+
+    Two tables are stored: every starting hand class against every class heads-up (averaged over the
+    combos of both classes, card removal included) and every class against 1 to 8 random hands.
+    """
+
+    def __init__(self, path: str = None) -> None:
+        """
+        Memory map the tables from path, they are built with build_preflop_tables
+        """
+        self.path = path or default_preflop_path()
+        try:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            raise FileNotFoundError("Preflop tables not found at {}, build them with "
+                                    "'python -m pypoker.preflop'".format(self.path))
+        if len(mapped) != len(_MAGIC) + 4 * _TABLE_SIZE or mapped[:len(_MAGIC)] != _MAGIC:
+            mapped.close()
+            raise ValueError("Invalid preflop table file: {}".format(self.path))
+        self.table = memoryview(mapped)[len(_MAGIC):].cast("f")
+
+    def _get(self, entry: int) -> float:
+        equity = self.table[entry]
+        if isnan(equity):
+            raise ValueError("Preflop table entry not built yet, resume the build with 'python -m pypoker.preflop'")
+        return equity
+
+    def headsup(self, hand, opponent) -> float:
+        """
+        Equity of hand against opponent, both given as hole cards or class names
+        """
+        return self._get(_headsup_entry(hand_class(hand), hand_class(opponent)))
+
+    def multiway(self, hand, num_players: int) -> float:
+        """
+        Equity of hand against num_players - 1 random hands
+        """
+        if not 2 <= num_players <= MAX_PLAYERS:
+            raise ValueError("Number of players must be between 2 and {}".format(MAX_PLAYERS))
+        return self._get(_multiway_entry(hand_class(hand), num_players))
+
+
+_tables = {}
+
+
+def get_preflop_table(path: str = None) -> PreflopTable:
+    """
+    Return the PreflopTable for path, mapping its file only once per process
+    """
+    path = path or default_preflop_path()
+    if path not in _tables:
+        _tables[path] = PreflopTable(path)
+    return _tables[path]
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build (or resume building) the preflop equity tables")
+    parser.add_argument("path", nargs="?", default=None, help="table file, defaults to {}".format(default_preflop_path()))
+    parser.add_argument("--trials", type=int, default=20000, help="Monte Carlo trials per entry")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the simulations")
+    args = parser.parse_args()
+    target = build_preflop_tables(args.path, args.trials, args.processes, args.seed, verbose=True)
+    print("Preflop tables written to {}".format(target))
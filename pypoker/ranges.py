@@ -0,0 +1,191 @@
+import re
+
+from .card import RANKS, SUITS, CARD_TO_INDEX, parse_cards
+from .misc import HOLECARDS_COUNT
+
+# Hold'em shorthand: a pair (TT), suited (AKs), offsuit (AKo) or any (AK) two ranks, optionally followed
+# by + or by -<same shape> for a span of hands
+_SHORTHAND = re.compile(r'^([2-9TJQKA])([2-9TJQKA])([so]?)(\+|-([2-9TJQKA])([2-9TJQKA])([so]?))?$')
+
+
+def _pair_combos(rank: int) -> list:
+    """
+    The 6 combos of a pocket pair
+    """
+    return [
+        RANKS[rank] + SUITS[a] + RANKS[rank] + SUITS[b]
+        for a in range(4) for b in range(a + 1, 4)
+    ]
+
+
+def _two_rank_combos(high: int, low: int, kind: str) -> list:
+    """
+    The suited (4), offsuit (12) or all (16) combos of two different ranks
+    """
+    return [
+        RANKS[high] + SUITS[a] + RANKS[low] + SUITS[b]
+        for a in range(4) for b in range(4)
+        if (kind != 's' or a == b) and (kind != 'o' or a != b)
+    ]
+
+
+def _expand_shorthand(token: str) -> list:
+    """
+    Expand a Hold'em shorthand token (TT+, 77-TT, AKs, ATo+, A2s-A5s, KQ...) to its combos
+    """
+    match = _SHORTHAND.match(token)
+    if match is None:
+        raise ValueError("Invalid range token: {}".format(token))
+    first, second, kind, modifier, end_first, end_second, end_kind = match.groups()
+    high, low = sorted((RANKS.index(first), RANKS.index(second)), reverse=True)
+
+    if high == low:
+        if kind:
+            raise ValueError("Pairs cannot be suited or offsuit: {}".format(token))
+        if not modifier:
+            ranks = [high]
+        elif modifier == '+':
+            ranks = range(high, len(RANKS))
+        else:
+            if end_first != end_second or end_kind:
+                raise ValueError("Invalid pair span: {}".format(token))
+            end = RANKS.index(end_first)
+            ranks = range(min(high, end), max(high, end) + 1)
+        return [combo for rank in ranks for combo in _pair_combos(rank)]
+
+    if not modifier:
+        kickers = [low]
+    elif modifier == '+':
+        # The kicker goes up to just below the high card: ATs+ is ATs, AJs, AQs, AKs
+        kickers = range(low, high)
+    else:
+        end_high, end_low = sorted((RANKS.index(end_first), RANKS.index(end_second)), reverse=True)
+        if end_high != high or end_kind != kind or end_low == end_high:
+            raise ValueError("Invalid span: {}".format(token))
+        kickers = range(min(low, end_low), max(low, end_low) + 1)
+    return [combo for kicker in kickers for combo in _two_rank_combos(high, kicker, kind)]
+
+
+def _combo_key(combo: str) -> tuple:
+    """
+    Order independent key of a combo
+    """
+    return tuple(sorted(CARD_TO_INDEX[combo[i: i + 2]] for i in range(0, len(combo), 2)))
+
+
+class Range(object):
+    """
+    Weighted set of hole card combos
+
+    A range is a list of (combo, weight) pairs where combo is a string of hole cards. Weights are relative
+    frequencies: a combo of weight 0.5 is dealt half as often as a combo of weight 1.
+    """
+
+    def __init__(self, combos, game_type: str = 'nlh') -> None:
+        """
+        Initialize the range from (combo, weight) pairs, or bare combos of weight 1
+
+        A combo listed twice keeps its last weight, combos of weight 0 are dropped
+        """
+        if game_type not in HOLECARDS_COUNT:
+            raise ValueError("Unknown game type: {}".format(game_type))
+        self.game_type = game_type
+        num_cards = HOLECARDS_COUNT[game_type]
+
+        weights = {}
+        for item in combos:
+            combo, weight = (item, 1.0) if isinstance(item, str) else item
+            if len(combo) != 2 * num_cards:
+                raise ValueError("Invalid hole cards for {}: {}".format(game_type, combo))
+            key = _combo_key(combo)
+            if len(set(key)) != num_cards:
+                raise ValueError("Duplicate cards in combo: {}".format(combo))
+            if weight < 0:
+                raise ValueError("Negative weight for {}: {}".format(combo, weight))
+            weights[key] = (combo, float(weight))
+        self.combos = [(combo, weight) for combo, weight in weights.values() if weight > 0]
+
+    @classmethod
+    def from_string(cls, text: str, game_type: str = 'nlh') -> 'Range':
+        """
+        Parse a range
+
+        Tokens are separated by commas or whitespace and may end with :weight. Hold'em tokens can use the
+        usual shorthand (TT+, 77-TT, AKs, AKo, AK, ATs+, A2s-A5s) or explicit combos (AsKs), Omaha ranges
+        are lists of explicit hands (AsAdKsQh:0.5, ...).
+
+        e.g. Range.from_string("TT+, AKs, KQo:0.5")
+        """
+        num_cards = HOLECARDS_COUNT.get(game_type)
+        combos = []
+        for token in re.split(r'[,\s]+', text.strip()):
+            if not token:
+                continue
+            weight = 1.0
+            if ':' in token:
+                token, weight = token.split(':', 1)
+                try:
+                    weight = float(weight)
+                except ValueError:
+                    raise ValueError("Invalid weight: {}".format(weight))
+            if num_cards is not None and len(token) == 2 * num_cards and _is_cards(token):
+                combos.append((token, weight))
+            elif game_type == 'nlh':
+                combos += [(combo, weight) for combo in _expand_shorthand(token)]
+            else:
+                raise ValueError("Invalid hand for {}: {}".format(game_type, token))
+        return cls(combos, game_type)
+
+    def __len__(self) -> int:
+        return len(self.combos)
+
+    def __iter__(self):
+        return iter(self.combos)
+
+    def __repr__(self) -> str:
+        return "Range({} combos, {})".format(len(self.combos), self.game_type)
+
+    def total_weight(self) -> float:
+        """
+        Sum of the weights of the combos
+        """
+        return sum(weight for _, weight in self.combos)
+
+    def without(self, cards) -> 'Range':
+        """
+        Range of the combos that do not use any of the given cards (card removal)
+        """
+        blocked = set(CARD_TO_INDEX[c] for c in _split_cards(cards))
+        return Range(
+            [(combo, weight) for combo, weight in self.combos if not blocked.intersection(_combo_key(combo))],
+            self.game_type
+        )
+
+
+def _is_cards(token: str) -> bool:
+    """
+    True if token is a string of concatenated cards
+    """
+    try:
+        parse_cards(token)
+    except ValueError:
+        return False
+    return True
+
+
+def _split_cards(cards) -> list:
+    """
+    Card strings of a string of concatenated cards or a list of card strings
+    """
+    if isinstance(cards, str):
+        return [cards[i: i + 2] for i in range(0, len(cards), 2)]
+    return list(cards)
+
+
+def parse_range(text, game_type: str = 'nlh') -> Range:
+    """
+    Build a Range from a range string (see Range.from_string) or return an existing Range unchanged
+    """
+    if isinstance(text, Range):
+        return text
+    return Range.from_string(text, game_type)
@@ -0,0 +1,117 @@
+from .card import INDEX_TO_INT, card_index, cards_to_str
+
+
+class ShowdownResult(object):
+    """
+    Compact result of Evaluator.declare_winner(..., return_type='compact')
+
+    Only the winners, the hand strengths and a bitmask of the cards used by every player are computed.
+    Names of the combinations and the cards used are derived on demand.
+    """
+
+    __slots__ = (
+        'players', 'holecards', 'community_cards', 'game_type',
+        'strengths', 'used_cards', 'winners', '_evaluator'
+    )
+
+    def __init__(self, evaluator, players: list, holecards: list, community_cards: list, game_type: str,
+                 strengths, used_cards: list, winners: tuple) -> None:
+        """
+        Inputs:
+            evaluator: Evaluator that produced the result
+            players: Player names (p1, p2... pn)
+            holecards: Encoded hole cards of every player
+            community_cards: Encoded community cards
+            game_type: String type of game
+            strengths: Hand strength of every player (1 - 7462)
+            used_cards: Bitmask of the cards in every player's best combination, bit i is card_index i
+            winners: Indexes of the winning players
+        """
+        self.players = players
+        self.holecards = holecards
+        self.community_cards = community_cards
+        self.game_type = game_type
+        self.strengths = strengths
+        self.used_cards = used_cards
+        self.winners = winners
+        self._evaluator = evaluator
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def __repr__(self) -> str:
+        return "ShowdownResult(players={}, strengths={}, winners={})".format(
+            list(self.players), list(self.strengths), self.winners)
+
+    def is_winner(self, i: int) -> bool:
+        """
+        Whether player i holds the best hand
+        """
+        return i in self.winners
+
+    def winner_names(self) -> list:
+        """
+        Names of the winning players
+        """
+        return [self.players[i] for i in self.winners]
+
+    def _used(self, i: int, cards: list) -> list:
+        """
+        Cards out of cards that are part of player i's best combination
+        """
+        mask = self.used_cards[i]
+        return sorted(
+            [card for card in cards if mask >> card_index(card) & 1],
+            key=self._evaluator.display_order.__getitem__
+        )
+
+    def best_combo(self, i: int) -> str:
+        """
+        Best combination of player i
+        """
+        mask = self.used_cards[i]
+        cards = [INDEX_TO_INT[j] for j in range(52) if mask >> j & 1]
+        return cards_to_str(sorted(cards, key=self._evaluator.display_order.__getitem__))
+
+    def holecards_used(self, i: int) -> str:
+        """
+        Hole cards used by player i
+        """
+        return cards_to_str(self._used(i, self.holecards[i]))
+
+    def community_cards_used(self, i: int) -> str:
+        """
+        Community cards used by player i
+        """
+        return cards_to_str(self._used(i, self.community_cards))
+
+    def describe(self, i: int) -> tuple:
+        """
+        Describe player i's hand the same way as Evaluator.card_strength_evaluator
+        """
+        return self._evaluator._get_five_card().describe(self.strengths[i])
+
+    def to_dict(self) -> dict:
+        """
+        Expand the result to the dictionary returned by declare_winner(..., return_type='dict')
+        """
+        community_cards = cards_to_str(self.community_cards)
+        return_dict = {}
+        for i, player in enumerate(self.players):
+            name, combo_rank, high_rank, high_rank_card = self.describe(i)
+            return_dict[player] = {
+                'best_combo': self.best_combo(i),
+                'best_combo_rank': combo_rank,
+                'best_combo_name': name,
+                'holecards': cards_to_str(self.holecards[i]),
+                'community_cards': community_cards,
+                'holecards_used': self.holecards_used(i),
+                'community_cards_used': self.community_cards_used(i),
+                'high_rank': high_rank,
+                'high_rank_card': high_rank_card,
+                'strength': self.strengths[i],
+                'game_type': self.game_type,
+                'player': player,
+                'winner': i in self.winners
+            }
+        return return_dict
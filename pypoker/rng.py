@@ -0,0 +1,91 @@
+import hashlib
+import random
+import secrets
+
+
+class SeedSequence(object):
+    """
+    Source of reproducible and statistically independent random streams
+
+    Modelled after numpy.random.SeedSequence: a root sequence is created from a seed (or fresh entropy)
+    and spawns child sequences identified by their spawn key. Every sequence hashes its entropy and
+    spawn key into the seed of its own stream, so workers can be given independent streams that are
+    reproduced exactly from the root seed and the worker number.
+    """
+
+    def __init__(self, entropy: int = None, spawn_key: tuple = ()) -> None:
+        """
+        Initialize the sequence, entropy defaults to 128 fresh random bits
+        """
+        if entropy is None:
+            entropy = secrets.randbits(128)
+        self.entropy = entropy
+        self.spawn_key = tuple(spawn_key)
+        self.n_children_spawned = 0
+
+    def __repr__(self) -> str:
+        return "SeedSequence(entropy={}, spawn_key={})".format(self.entropy, self.spawn_key)
+
+    def generate_state(self) -> int:
+        """
+        256 bit seed derived from the entropy and the spawn key
+        """
+        data = "{}/{}".format(self.entropy, "/".join(str(k) for k in self.spawn_key)).encode()
+        return int.from_bytes(hashlib.blake2b(data, digest_size=32).digest(), 'little')
+
+    def spawn(self, n: int) -> list:
+        """
+        Create n child sequences, successive calls never return the same child twice
+        """
+        children = [
+            SeedSequence(self.entropy, self.spawn_key + (self.n_children_spawned + i,))
+            for i in range(n)
+        ]
+        self.n_children_spawned += n
+        return children
+
+    def child(self, i: int) -> 'SeedSequence':
+        """
+        Child sequence number i, e.g. to replay a single hand or worker of a run
+        """
+        return SeedSequence(self.entropy, self.spawn_key + (i,))
+
+    def rng(self) -> random.Random:
+        """
+        Random number generator seeded from this sequence
+        """
+        return random.Random(self.generate_state())
+
+
+def make_rng(rng=None):
+    """
+    Build a random number generator
+
+    rng can be:
+        None: the global random module (seeded with random.seed)
+        'secure': a cryptographically secure generator backed by the operating system (secrets)
+        an integer seed
+        a SeedSequence
+        any object with a random() method such as random.Random
+    """
+    if rng is None:
+        return random
+    if isinstance(rng, str):
+        if rng == 'secure':
+            return secrets.SystemRandom()
+        raise ValueError("Unknown random generator: {}".format(rng))
+    if isinstance(rng, SeedSequence):
+        return rng.rng()
+    if isinstance(rng, int):
+        return random.Random(rng)
+    if hasattr(rng, 'random'):
+        return rng
+    raise ValueError("Unknown random generator: {}".format(rng))
+
+
+def spawn_rngs(seed, n: int) -> list:
+    """
+    Create n independent random number generators from an integer seed or a SeedSequence
+    """
+    sequence = seed if isinstance(seed, SeedSequence) else SeedSequence(seed)
+    return [child.rng() for child in sequence.spawn(n)]
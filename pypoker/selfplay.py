@@ -0,0 +1,313 @@
+import json
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from multiprocessing import Pool
+from statistics import NormalDist
+
+from .rng import SeedSequence
+from .table import Dealer
+
+# Hands played by one worker task, a fixed size keeps seeded runs reproducible on any pool size
+SHARD_HANDS = 1000
+# Hands played before early stopping is considered
+MIN_HANDS = 10000
+
+
+class Policy(ABC):
+    """
+    Base class of the bot policies
+
+    SelfPlay accepts any object with an act method, subclassing Policy is optional. act is called with
+    the TableState of the hand, the legal actions of the seat to act (see Dealer.legal_actions) and a
+    random.Random generator, and returns (action, amount). The state holds every player's cards, a fair
+    policy only looks at state.holecards[legal['seat']] and state.board. Policies are sent to the worker
+    processes, so they must be picklable. The name is used in the results.
+    """
+
+    name = 'policy'
+
+    @abstractmethod
+    def act(self, state, legal: dict, rng) -> tuple:
+        """
+        Action of the seat to act: ('fold' | 'check' | 'call', None) or ('bet' | 'raise', amount)
+        """
+
+
+class CallingStation(Policy):
+    """
+    Checks when possible, calls everything otherwise
+    """
+
+    name = 'call'
+
+    def act(self, state, legal: dict, rng) -> tuple:
+        return ('check', None) if legal['check'] else ('call', None)
+
+
+class RandomPolicy(Policy):
+    """
+    Folds, raises (a random amount) or calls with fixed probabilities, never folds when it can check
+    """
+
+    name = 'random'
+
+    def __init__(self, fold: float = 0.2, raise_: float = 0.2) -> None:
+        self.fold = fold
+        self.raise_ = raise_
+
+    def act(self, state, legal: dict, rng) -> tuple:
+        r = rng.random()
+        if (legal['bet'] or legal['raise']) and r < self.raise_:
+            action = 'bet' if legal['bet'] else 'raise'
+            low, high = legal[action]
+            return action, rng.randint(low, high)
+        if legal['check']:
+            return 'check', None
+        if r < self.raise_ + self.fold:
+            return 'fold', None
+        return 'call', None
+
+
+class AggressivePolicy(Policy):
+    """
+    Bets or raises whenever it can, size is the fraction of the way from the smallest to the largest raise
+    """
+
+    name = 'aggressive'
+
+    def __init__(self, size: float = 0.5) -> None:
+        self.size = size
+
+    def act(self, state, legal: dict, rng) -> tuple:
+        if legal['bet'] or legal['raise']:
+            action = 'bet' if legal['bet'] else 'raise'
+            low, high = legal[action]
+            return action, low + int((high - low) * self.size)
+        return ('check', None) if legal['check'] else ('call', None)
+
+
+POLICIES = {cls.name: cls for cls in (CallingStation, RandomPolicy, AggressivePolicy)}
+
+
+def parse_policy(spec: str) -> Policy:
+    """
+    Create a policy from a name of POLICIES followed by its parameters, separated by colons
+
+    e.g. 'call', 'random:0.1:0.3' (fold and raise probabilities) or 'aggressive:1.0' (raise size)
+    """
+    name, *params = spec.split(':')
+    if name not in POLICIES:
+        raise ValueError("Unknown policy {!r}, expected one of {}".format(name, ", ".join(sorted(POLICIES))))
+    try:
+        return POLICIES[name](*map(float, params))
+    except TypeError:
+        raise ValueError("Too many parameters for policy {!r}".format(name)) from None
+
+
+def _play_shard(args: tuple) -> dict:
+    """
+    Play a shard of hands, executed in the worker processes
+
+    Every policy keeps its seat while the button moves every hand, and the stacks are reset every hand.
+    Returns the number of hands, the sum and the sum of squares of the result of every seat in big
+    blinds, and the hand logs if requested
+    """
+    game_type, policies, options, stack, first_hand, num_hands, seed, log_hands = args
+    dealer = Dealer(game_type, rng=seed.child(0), **options)
+    rng = seed.child(1).rng()
+    num_players = len(policies)
+    stacks = [stack * dealer.big_blind] * num_players
+    net = [0] * num_players
+    net_sq = [0] * num_players
+    logs = [] if log_hands else None
+
+    for hand in range(first_hand, first_hand + num_hands):
+        state = dealer.start_hand(stacks, hand % num_players)
+        while state.to_act is not None:
+            action, amount = policies[state.to_act].act(state, dealer.legal_actions(state), rng)
+            dealer.act(state, action, amount)
+        for seat in range(num_players):
+            chips = state.net(seat)
+            net[seat] += chips
+            net_sq[seat] += chips * chips
+        if log_hands:
+            logs.append({
+                'hand': hand,
+                'button': state.button,
+                'holecards': state.holecards,
+                'board': state.board,
+                'actions': state.actions,
+                'winnings': state.winnings,
+                'net': [state.net(seat) for seat in range(num_players)],
+            })
+
+    big_blind = dealer.big_blind
+    return {
+        'hands': num_hands,
+        'net': [chips / big_blind for chips in net],
+        'net_sq': [chips / big_blind ** 2 for chips in net_sq],
+        'logs': logs,
+    }
+
+
+class SelfPlay(object):
+    """
+    Play hands between bot policies on a process pool
+
+    The hands are played in shards of shard_hands hands, every shard with its own random streams derived
+    from the seed, and the shards are merged in order. A seeded run therefore gives the same results,
+    early stopping included, whatever the number of processes.
+    """
+
+    def __init__(self, game_type: str, policies: list, small_blind: int = 1, big_blind: int = 2, stack: int = 100,
+                 ante: int = 0, betting: str = None, engine: str = 'lookup', processes: int = None, seed=None) -> None:
+        """
+        Initialize the harness
+
+        Inputs:
+            game_type: 'nlh', 'plo4', 'plo5' or 'plo6'
+            policies: One policy per seat, or policy specifications such as 'random:0.1:0.3' (see parse_policy)
+            small_blind, big_blind, ante, betting, engine: Rules of the tables (see Dealer)
+            stack: Starting stack of every player in big blinds, reset every hand
+            processes: Number of worker processes, defaults to the number of CPUs
+            seed: Integer or SeedSequence making the run reproducible
+        """
+        self.game_type = game_type
+        self.policies = [parse_policy(p) if isinstance(p, str) else p for p in policies]
+        self.options = {'small_blind': small_blind, 'big_blind': big_blind, 'ante': ante, 'betting': betting,
+                        'engine': engine}
+        self.stack = stack
+        # Checks the rules and the number of players before starting the workers
+        dealer = Dealer(game_type, **self.options)
+        if not 2 <= len(self.policies) <= dealer.max_players:
+            raise ValueError("Number of players must be between 2 and {}".format(dealer.max_players))
+        self.processes = processes or os.cpu_count() or 1
+        if seed is None or isinstance(seed, int):
+            seed = SeedSequence(seed)
+        self.seed_sequence = seed
+
+    def _summary(self, totals: dict, z: float, hero: int, start: float) -> dict:
+        """
+        Results of the hands played so far
+        """
+        hands = totals['hands']
+        players = []
+        for seat, policy in enumerate(self.policies):
+            mean = totals['net'][seat] / hands
+            variance = max(totals['net_sq'][seat] / hands - mean * mean, 0.0)
+            half_width = z * math.sqrt(variance / hands) if hands > 1 else float('inf')
+            players.append({
+                'seat': seat,
+                'policy': getattr(policy, 'name', type(policy).__name__),
+                'net': totals['net'][seat],
+                'bb_per_100': 100 * mean,
+                'ci': 100 * half_width,
+                'low': 100 * (mean - half_width),
+                'high': 100 * (mean + half_width),
+                'significant': abs(mean) > half_width,
+            })
+        return {
+            'hands': hands,
+            'players': players,
+            'significant': players[hero]['significant'],
+            'elapsed': time.perf_counter() - start,
+        }
+
+    def iter_play(self, num_hands: int, shard_hands: int = SHARD_HANDS, confidence: float = 0.95,
+                  early_stop: bool = False, hero: int = 0, min_hands: int = MIN_HANDS, log: str = None):
+        """
+        Play up to num_hands hands and yield the results after every shard
+
+        Inputs:
+            num_hands: Number of hands to play
+            shard_hands: Hands per worker task
+            confidence: Confidence level of the intervals
+            early_stop: Stop as soon as the interval of the hero excludes 0 (after min_hands hands), see below
+            hero: Seat whose result decides early stopping
+            min_hands: Hands played before early stopping is considered
+            log: File the hands are written to as JSON lines
+
+        Every result is a dictionary with following keys
+            'hands': Number of hands played
+            'players': For every seat, its 'policy', 'net' result and 'bb_per_100' with the half width of
+                its confidence interval 'ci', the interval bounds 'low' and 'high' (all in bb/100) and
+                whether the interval excludes 0 ('significant')
+            'significant': Whether the result of the hero is significant
+            'elapsed': Seconds since the start
+
+        With early_stop the result is looked at after every shard from min_hands hands on, and testing a
+        fixed level interval at every look would stop on noise far more often than 1 - confidence. The
+        error rate 1 - confidence is therefore split evenly between the looks (Bonferroni): with K looks
+        every interval has the confidence level 1 - (1 - confidence) / K, so that the intervals hold at
+        every look at once and a run with no edge stops with a probability of at most 1 - confidence.
+        """
+        start = time.perf_counter()
+        alpha = 1 - confidence
+        if early_stop:
+            # Number of shards merged once min_hands hands are played, the last one included
+            first = max(min(min_hands, num_hands), 1)
+            alpha /= math.ceil(num_hands / shard_hands) - math.ceil(first / shard_hands) + 1
+        z = NormalDist().inv_cdf(1 - alpha / 2)
+        root = self.seed_sequence.spawn(1)[0]
+        submitted = [0, 0]  # shards, hands
+
+        def next_task():
+            size = min(shard_hands, num_hands - submitted[1])
+            task = (self.game_type, self.policies, self.options, self.stack, submitted[1], size,
+                    root.child(submitted[0]), log is not None)
+            submitted[0] += 1
+            submitted[1] += size
+            return task
+
+        totals = {'hands': 0, 'net': [0.0] * len(self.policies), 'net_sq': [0.0] * len(self.policies)}
+        log_file = open(log, "w") if log is not None else None
+
+        def add(shard) -> dict:
+            totals['hands'] += shard['hands']
+            for seat in range(len(self.policies)):
+                totals['net'][seat] += shard['net'][seat]
+                totals['net_sq'][seat] += shard['net_sq'][seat]
+            if log_file is not None:
+                for hand in shard['logs']:
+                    log_file.write(json.dumps(hand) + "\n")
+                log_file.flush()
+            return self._summary(totals, z, hero, start)
+
+        def done(summary) -> bool:
+            return early_stop and summary['hands'] >= min(min_hands, num_hands) and summary['significant']
+
+        try:
+            if self.processes == 1:
+                while submitted[1] < num_hands:
+                    summary = add(_play_shard(next_task()))
+                    yield summary
+                    if done(summary):
+                        return
+                return
+
+            with Pool(self.processes) as pool:
+                # A couple of shards queued per worker, results are consumed in order
+                pending = deque()
+                while pending or submitted[1] < num_hands:
+                    while submitted[1] < num_hands and len(pending) < 2 * self.processes:
+                        pending.append(pool.apply_async(_play_shard, (next_task(),)))
+                    summary = add(pending.popleft().get())
+                    yield summary
+                    if done(summary):
+                        # Leaving the pool terminates the shards still running
+                        return
+        finally:
+            if log_file is not None:
+                log_file.close()
+
+    def play(self, num_hands: int, **options) -> dict:
+        """
+        Play up to num_hands hands (see iter_play) and return the final results
+        """
+        summary = None
+        for summary in self.iter_play(num_hands, **options):
+            pass
+        return summary
@@ -0,0 +1,353 @@
+import asyncio
+import json
+import math
+import os
+import signal
+from fractions import Fraction
+from multiprocessing import Pool
+
+from .evaluator import Evaluator
+from .lookup import get_lookup_evaluator
+from .simulator import Simulator
+
+# Requests waiting for a batch, a connection stops being read while the queue is full
+MAX_PENDING = 1024
+# Largest number of requests of the same method sent to a worker at once
+MAX_BATCH = 64
+# Seconds the dispatcher waits for more requests before sending an incomplete batch
+BATCH_WINDOW = 0.002
+# Default seconds before a request is answered with a timeout error
+REQUEST_TIMEOUT = 10.0
+# Longest accepted request line
+MAX_LINE = 1 << 20
+
+_worker = {}
+
+
+def _init_worker(engine: str) -> None:
+    """
+    Load the lookup table and create the evaluator once per worker process
+    """
+    # The workers are forked from the event loop which handles these signals, the pool terminates them
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    get_lookup_evaluator()
+    _worker['evaluator'] = Evaluator(engine)
+    _worker['simulators'] = {}
+
+
+def _simulator(game_type: str) -> Simulator:
+    """
+    Single process simulator of the worker for a game type, the matchup cache is kept between requests
+    """
+    simulators = _worker['simulators']
+    if game_type not in simulators:
+        simulators[game_type] = Simulator(game_type, processes=1)
+    return simulators[game_type]
+
+
+def _jsonable(value):
+    """
+    Convert a result to JSON types: tuples to lists and Fractions to strings
+    """
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, Fraction):
+        return str(value)
+    return value
+
+
+def _declare_winner(params: dict):
+    return_type = params.get('return_type', 'dict')
+    result = _worker['evaluator'].declare_winner(
+        params['player_cards'], params.get('community_cards', ''), return_type
+    )
+    if return_type == 'compact':
+        return {'winners': result.winner_names(), 'strengths': list(result.strengths)}
+    return result
+
+
+def _equity(params: dict):
+    simulator = _simulator(params.get('game_type', 'nlh'))
+    options = {k: params[k] for k in ('board', 'dead_cards') if k in params}
+    if params.get('exact'):
+        return simulator.enumerate_equity(params['holecards'], **options)
+    options.update({
+        k: params[k] for k in ('num_trials', 'target_stderr', 'half_width', 'confidence', 'time_budget')
+        if k in params
+    })
+    return simulator.run(params['holecards'], **options)
+
+
+def _range_equity(params: dict):
+    simulator = _simulator(params.get('game_type', 'nlh'))
+    options = {
+        k: params[k] for k in ('board', 'dead_cards', 'num_trials', 'exact', 'target_stderr', 'half_width',
+                               'confidence', 'time_budget')
+        if k in params
+    }
+    return simulator.range_equity(params['ranges'], **options)
+
+
+def _preflop_equity(params: dict):
+    return _worker['evaluator'].preflop_equity(
+        params['holecards'], params.get('opponent'), params.get('num_players', 2)
+    )
+
+
+METHODS = {
+    'declare_winner': _declare_winner,
+    'equity': _equity,
+    'range_equity': _range_equity,
+    'preflop_equity': _preflop_equity,
+}
+
+# Cheap methods coalesced into batches, the others (simulations) are sent to the workers one by one so a
+# long request does not hold up the requests batched with it
+BATCHED_METHODS = ('declare_winner', 'preflop_equity')
+
+
+def _run_batch(method: str, batch: list) -> list:
+    """
+    Run a batch of requests of the same method, executed in the worker processes
+
+    Returns a list of (True, result) or (False, error message) in the order of the batch
+    """
+    handler = METHODS[method]
+    results = []
+    for params in batch:
+        try:
+            results.append((True, _jsonable(handler(params))))
+        except Exception as e:
+            results.append((False, "{}: {}".format(type(e).__name__, e)))
+    return results
+
+
+class Server(object):
+    """
+    asyncio server answering evaluation and equity requests in JSON lines
+
+    Every request is a line {"id": ..., "method": ..., "params": {...}, "timeout": seconds} and gets a
+    line {"id": ..., "result": ...} or {"id": ..., "error": ...}, in completion order. Requests from all
+    the connections are queued, grouped by method into batches and run on a process pool, so the event
+    loop only parses and routes lines.
+    """
+
+    def __init__(self, processes: int = None, engine: str = 'lookup', max_pending: int = MAX_PENDING,
+                 max_batch: int = MAX_BATCH, batch_window: float = BATCH_WINDOW,
+                 timeout: float = REQUEST_TIMEOUT) -> None:
+        """
+        Initialize the server, the worker processes start with serve_tcp or serve_unix
+        """
+        if engine not in Evaluator.engines:
+            raise ValueError("Unknown engine: {}".format(engine))
+        self.processes = processes or os.cpu_count() or 1
+        self.engine = engine
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.pool = None
+        self.queue = None
+        self.slots = None
+        self.dispatcher = None
+        self.stats = {'requests': 0, 'batches': 0, 'errors': 0, 'timeouts': 0}
+
+    async def _start(self) -> None:
+        """
+        Start the worker processes and the dispatcher
+        """
+        # Build the lookup table once before the workers map it, every worker loads it as it starts
+        get_lookup_evaluator()
+        self.pool = Pool(self.processes, initializer=_init_worker, initargs=(self.engine,))
+        self.queue = asyncio.Queue(self.max_pending)
+        # Batches in flight, two per worker keeps the workers busy without queueing in the pool
+        self.slots = asyncio.Semaphore(2 * self.processes)
+        self.dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def close(self) -> None:
+        """
+        Stop the dispatcher and the worker processes
+        """
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+        if self.pool is not None:
+            # Running simulations are abandoned
+            self.pool.terminate()
+            self.pool.join()
+
+    async def _dispatch(self) -> None:
+        """
+        Collect queued requests into batches and send them to the process pool
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(items) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            groups = []
+            batches = {}
+            for method, params, future in items:
+                if future.done():
+                    continue
+                if method not in BATCHED_METHODS:
+                    groups.append((method, [(params, future)]))
+                elif method in batches:
+                    batches[method].append((params, future))
+                else:
+                    batches[method] = [(params, future)]
+                    groups.append((method, batches[method]))
+            for method, group in groups:
+                await self.slots.acquire()
+                self.stats['batches'] += 1
+                # The pool calls back from its result thread, the results are handed over to the loop
+                self.pool.apply_async(
+                    _run_batch, (method, [params for params, _ in group]),
+                    callback=lambda results, group=group: loop.call_soon_threadsafe(self._resolve, group, results),
+                    error_callback=lambda error, group=group: loop.call_soon_threadsafe(self._resolve, group, error)
+                )
+
+    def _resolve(self, group: list, results) -> None:
+        """
+        Hand the results of a batch, or the exception that stopped it, to the waiting requests
+        """
+        self.slots.release()
+        for i, (_, future) in enumerate(group):
+            if future.done():
+                continue
+            if isinstance(results, BaseException):
+                future.set_result((False, "Worker error: {}".format(results)))
+            else:
+                future.set_result(results[i])
+
+    async def _answer(self, request_id, future, timeout: float, writer, lock) -> None:
+        """
+        Wait for the result of a queued request and write the response
+        """
+        response = {'id': request_id}
+        try:
+            ok, value = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            # The batch may still run, its result is dropped
+            future.cancel()
+            self.stats['timeouts'] += 1
+            ok, value = False, "Timeout"
+        response['result' if ok else 'error'] = value
+        if not ok:
+            self.stats['errors'] += 1
+        async with lock:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+    async def handle(self, reader, writer) -> None:
+        """
+        Serve one connection
+        """
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Line longer than the stream limit
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                self.stats['requests'] += 1
+                request = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Request must be a JSON object")
+                    if request.get('method') not in METHODS:
+                        raise ValueError("Unknown method: {}".format(request.get('method')))
+                    timeout = request.get('timeout', self.timeout)
+                    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not 0 < timeout < math.inf:
+                        raise ValueError("Invalid timeout: {}".format(timeout))
+                    params = request.get('params', {})
+                    if not isinstance(params, dict):
+                        raise ValueError("Params must be a JSON object")
+                except ValueError as e:
+                    self.stats['errors'] += 1
+                    request_id = request.get('id') if isinstance(request, dict) else None
+                    async with lock:
+                        writer.write(json.dumps({'id': request_id, 'error': str(e)}).encode() + b"\n")
+                        await writer.drain()
+                    continue
+                # Waiting for room in the queue stops reading this connection, which pushes back on the client
+                future = asyncio.get_running_loop().create_future()
+                await self.queue.put((request['method'], params, future))
+                task = asyncio.ensure_future(self._answer(request.get('id'), future, timeout, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, asyncio.CancelledError):
+            # Client gone or server shutting down
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _serve_forever(self, start) -> None:
+        """
+        Start the workers, then the asyncio server returned by the start coroutine, and serve until
+        cancelled or terminated
+        """
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, task.cancel)
+            except (NotImplementedError, RuntimeError):
+                # Signal handlers are only available in the main thread on Unix
+                pass
+        await self._start()
+        try:
+            server = await start
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self.close()
+
+    async def serve_tcp(self, host: str = '127.0.0.1', port: int = 7462) -> None:
+        """
+        Serve on a TCP socket until cancelled
+        """
+        await self._serve_forever(asyncio.start_server(self.handle, host, port, limit=MAX_LINE))
+
+    async def serve_unix(self, path: str) -> None:
+        """
+        Serve on a Unix socket until cancelled
+        """
+        await self._serve_forever(asyncio.start_unix_server(self.handle, path, limit=MAX_LINE))
+
+
+def serve(host: str = '127.0.0.1', port: int = 7462, unix_socket: str = None, **options) -> None:
+    """
+    Run a Server on a TCP port, or on a Unix socket if unix_socket is given, until interrupted
+    """
+    server = Server(**options)
+    try:
+        if unix_socket:
+            asyncio.run(server.serve_unix(unix_socket))
+        else:
+            asyncio.run(server.serve_tcp(host, port))
+    except KeyboardInterrupt:
+        pass
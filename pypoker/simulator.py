@@ -0,0 +1,808 @@
+import os
+import time
+from bisect import bisect_right
+from collections import deque
+from fractions import Fraction
+from itertools import combinations, product
+from math import comb, lcm, sqrt
+from multiprocessing import Pool, RawValue, TimeoutError
+from statistics import NormalDist
+
+from .cache import LRUCache
+from .card import CARD_TO_INDEX, INDEX_TO_INT, card_index, cards_to_str, parse_cards
+from .columnar import ColumnReader, ColumnWriter, records_to_columns
+from .deck import Deck
+from .evaluator import Evaluator
+from .isomorphism import canonicalize
+from .lookup import get_lookup_evaluator
+from .misc import HOLECARDS_COUNT, fuzzy_match_game_name
+from .ranges import Range, parse_range
+from .rng import SeedSequence
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# Number of trials per shard, shards do not depend on the number of processes so that seeded
+# simulations give the same results on any pool size
+SHARD_TRIALS = 5000
+# Adaptive runs check the stopping rule after every shard, smaller shards stop closer to the target
+ADAPTIVE_SHARD_TRIALS = 500
+# Fewest trials before an adaptive run may stop, the variance estimate is unreliable below
+MIN_ADAPTIVE_TRIALS = 1000
+# Consecutive conflicting range draws before the ranges are considered incompatible
+MAX_REJECTIONS = 1000
+# Time budgets (seconds) too short to start worker processes, such runs stay in process unless the
+# simulator already has a running pool
+MIN_POOL_BUDGET = 0.2
+# Trials between two checks of the deadline and of the cancellation of a shard
+CHECK_TRIALS = 10
+# Seconds a run waits past its deadline for the trials of the shards cut short by it
+DEADLINE_GRACE = 0.02
+# Largest number of board evaluations (matchups x boards) for which range_equity enumerates by default
+EXACT_RANGE_EVALUATIONS = 2000000
+
+
+# Number of the adaptive run the workers of a Simulator pool work for, set by _init_worker
+_active_run = None
+
+
+def _init_worker(active_run) -> None:
+    global _active_run
+    _active_run = active_run
+
+
+def _run_shard(args: tuple) -> dict:
+    """
+    Run the trials of one shard, executed in the worker processes
+
+    A player's hole cards are a list of cards, an empty list for a random hand or a Range. Range combos
+    are drawn with probability proportional to their weight, draws where two players' combos share a
+    card are rejected and drawn again.
+
+    Adaptive runs give a deadline (a time.perf_counter value, the clock is shared by the processes of a
+    machine) and the number of the run: the shard stops early, with the trials run so far, once the
+    deadline passes or once the pool has moved on to another run.
+
+    Returns a dictionary with the per player counts of the shard (see Simulator.run)
+    """
+    game_type, num_decks, holecards, board, dead_cards, num_trials, seed, record_trials, deadline, run = args
+
+    num_players = len(holecards)
+    num_holecards = HOLECARDS_COUNT[game_type]
+    evaluator = Evaluator('lookup')
+    strength = evaluator._player_strength
+
+    deck = Deck(num_decks, seed)
+    for card in dead_cards + board + [c for hand in holecards if isinstance(hand, list) for c in hand]:
+        deck._remove_index(card_index(card))
+    base = deck.dealt
+
+    # Combos of the range players as card indexes, card bitmasks and cumulative weights
+    range_players = []
+    for i, hand in enumerate(holecards):
+        if isinstance(hand, Range):
+            indexes, masks, cum_weights = [], [], []
+            total = 0.0
+            for combo, weight in hand:
+                combo_indexes = [CARD_TO_INDEX[combo[j: j + 2]] for j in range(0, len(combo), 2)]
+                indexes.append(combo_indexes)
+                masks.append(sum(1 << k for k in combo_indexes))
+                total += weight
+                cum_weights.append(total)
+            range_players.append((i, indexes, masks, cum_weights, total))
+    rand = deck.rng.random
+
+    # Cards dealt on every trial: the hole cards of the random players, then the rest of the board
+    random_players = [i for i, hand in enumerate(holecards) if isinstance(hand, list) and not hand]
+    num_board = 5 - len(board)
+    num_cards = len(random_players) * num_holecards + num_board
+
+    wins = [0] * num_players
+    ties = [0] * num_players
+    shares = [0.0] * num_players
+    shares_sq = [0.0] * num_players
+    records = [] if record_trials else None
+
+    hands = [list(hand) if isinstance(hand, list) and hand else None for hand in holecards]
+    check = deadline is not None or (run is not None and _active_run is not None)
+    trials = num_trials
+    for trial in range(num_trials):
+        if check and trial % CHECK_TRIALS == 0 and (
+                deadline is not None and time.perf_counter() >= deadline
+                or run is not None and _active_run is not None and _active_run.value != run):
+            trials = trial
+            break
+        if range_players:
+            for _ in range(MAX_REJECTIONS):
+                used = 0
+                chosen = []
+                for i, indexes, masks, cum_weights, total in range_players:
+                    k = min(bisect_right(cum_weights, rand() * total), len(masks) - 1)
+                    if masks[k] & used:
+                        break
+                    used |= masks[k]
+                    chosen.append((i, indexes[k]))
+                else:
+                    break
+            else:
+                raise ValueError("The ranges have no compatible combos")
+            deck.dealt = base
+            for i, combo_indexes in chosen:
+                hands[i] = [INDEX_TO_INT[k] for k in combo_indexes]
+                for k in combo_indexes:
+                    deck._remove_index(k)
+
+        drawn = deck._draw_ints(num_cards)
+        for j, i in enumerate(random_players):
+            hands[i] = drawn[j * num_holecards: (j + 1) * num_holecards]
+        full_board = board + drawn[num_cards - num_board:]
+
+        strengths = [strength(hand, full_board, game_type, 'lookup') for hand in hands]
+        top = max(strengths)
+        winners = [i for i, s in enumerate(strengths) if s == top]
+        if len(winners) == 1:
+            wins[winners[0]] += 1
+        else:
+            for i in winners:
+                ties[i] += 1
+        share = 1 / len(winners)
+        for i in winners:
+            shares[i] += share
+            shares_sq[i] += share * share
+
+        if record_trials:
+            records.append((full_board, [hand[:] for hand in hands], strengths))
+
+    return {
+        'trials': trials,
+        'wins': wins,
+        'ties': ties,
+        'shares': shares,
+        'shares_sq': shares_sq,
+        'records': records
+    }
+
+
+def _enumerate_shard(args: tuple) -> dict:
+    """
+    Evaluate every board completion starting with remaining[first], executed in the worker processes
+
+    Pot shares are counted in units of 1 / lcm(1... number of players) so that they stay exact
+    """
+    game_type, holecards, board, remaining, first, num_cards = args
+
+    num_players = len(holecards)
+    unit = lcm(*range(1, num_players + 1))
+    evaluator = Evaluator('lookup')
+    strength = evaluator._player_strength
+
+    if num_cards == 0:
+        completions = [()]
+    else:
+        completions = (
+            (remaining[first],) + rest
+            for rest in combinations(remaining[first + 1:], num_cards - 1)
+        )
+
+    boards = 0
+    wins = [0] * num_players
+    ties = [0] * num_players
+    shares = [0] * num_players
+
+    for completion in completions:
+        full_board = board + list(completion)
+        # The Omaha board data is built once per board and shared by every player
+        strengths = [strength(hand, full_board, game_type, 'lookup') for hand in holecards]
+        top = max(strengths)
+        winners = [i for i, s in enumerate(strengths) if s == top]
+        if len(winners) == 1:
+            wins[winners[0]] += 1
+        else:
+            for i in winners:
+                ties[i] += 1
+        for i in winners:
+            shares[i] += unit // len(winners)
+        boards += 1
+
+    return {
+        'trials': boards,
+        'wins': wins,
+        'ties': ties,
+        'shares': shares,
+        'records': None
+    }
+
+
+def _enumerate_matchup(args: tuple) -> tuple:
+    """
+    Exact equities of one matchup of known hands, executed in the worker processes
+    """
+    game_type, num_decks, hands, board, dead_cards = args
+    simulator = Simulator(game_type, num_decks, processes=1)
+    return tuple(simulator.enumerate_equity(hands, board, dead_cards)['exact_equity'])
+
+
+def merge_shards(shards: list) -> dict:
+    """
+    Add up the counts of several shards
+    """
+    num_players = len(shards[0]['wins'])
+    merged = {
+        'trials': 0,
+        'wins': [0] * num_players,
+        'ties': [0] * num_players,
+        'shares': [0] * num_players,
+        'records': [] if shards[0]['records'] is not None else None
+    }
+    if 'shares_sq' in shards[0]:
+        merged['shares_sq'] = [0] * num_players
+    for shard in shards:
+        merged['trials'] += shard['trials']
+        for i in range(num_players):
+            merged['wins'][i] += shard['wins'][i]
+            merged['ties'][i] += shard['ties'][i]
+            merged['shares'][i] += shard['shares'][i]
+            if 'shares_sq' in merged:
+                merged['shares_sq'][i] += shard['shares_sq'][i]
+        if merged['records'] is not None:
+            merged['records'] += shard['records']
+    return merged
+
+
+def _empty_counts(num_players: int) -> dict:
+    """
+    Counts of a simulation without any trial
+    """
+    return {
+        'trials': 0,
+        'wins': [0] * num_players,
+        'ties': [0] * num_players,
+        'shares': [0] * num_players,
+        'shares_sq': [0] * num_players,
+        'records': None,
+    }
+
+
+def standard_errors(merged: dict) -> list:
+    """
+    Standard error of the equity estimate of every player, from the merged counts of a simulation
+    """
+    n = merged['trials']
+    if n < 2:
+        return [float('inf')] * len(merged['shares'])
+    errors = []
+    for total, total_sq in zip(merged['shares'], merged['shares_sq']):
+        mean = total / n
+        variance = max(0.0, (total_sq - n * mean * mean) / (n - 1))
+        errors.append(sqrt(variance / n))
+    return errors
+
+
+class Simulator(object):
+    """
+    Monte Carlo equity simulations built on Deck and Evaluator
+
+    Trials are split in shards that run on a process pool, every shard gets its own random stream
+    spawned from the simulator seed so a seeded simulation is reproducible whatever the pool size.
+    """
+
+    def __init__(self, game_type: str, num_decks: int = 1, processes: int = None, seed=None,
+                 cache_size: int = 65536) -> None:
+        """
+        Initialize the simulator
+
+        processes: Number of worker processes, defaults to the number of CPUs (1 runs in process)
+        seed: Integer seed or SeedSequence for reproducible simulations
+        cache_size: Number of exact matchup results kept by range_equity
+        """
+        self.game_type = fuzzy_match_game_name(game_type)
+        self.num_decks = num_decks
+        self.processes = processes or os.cpu_count() or 1
+        self.seed_sequence = seed if isinstance(seed, SeedSequence) else SeedSequence(seed)
+        self.matchup_cache = LRUCache(cache_size)
+        # Worker pool of the adaptive runs, started on first use and kept between runs, and the number of
+        # the run its workers work for: shards of a finished run see it change and stop
+        self._pool = None
+        self._pool_size = 0
+        self._active_run = None
+
+    def __enter__(self) -> 'Simulator':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __getstate__(self) -> dict:
+        # A running pool cannot be sent to another process
+        return dict(self.__dict__, _pool=None, _pool_size=0, _active_run=None)
+
+    def _get_pool(self, processes: int):
+        """
+        Worker pool of processes workers, reused by the next adaptive runs
+        """
+        if self._pool is None or self._pool_size != processes:
+            self.close()
+            self._active_run = RawValue('q', 0)
+            self._pool = Pool(processes, initializer=_init_worker, initargs=(self._active_run,))
+            self._pool_size = processes
+        return self._pool
+
+    def close(self) -> None:
+        """
+        Stop the worker pool kept by adaptive runs, a new one is started when needed
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            self._pool_size = 0
+            self._active_run = None
+
+    def _parse_holecards(self, holecards: list) -> list:
+        """
+        Parse the hole cards of every player
+
+        An empty string stands for a random hand. A Range, or a string that is not a single hand
+        (e.g. 'TT+, AKs'), is parsed as a range (see pypoker.ranges).
+        """
+        num_holecards = HOLECARDS_COUNT[self.game_type]
+        parsed = []
+        for hand in holecards:
+            if isinstance(hand, Range):
+                if hand.game_type != self.game_type:
+                    raise ValueError("Range of {} used in {}".format(hand.game_type, self.game_type))
+                parsed.append(hand)
+                continue
+            try:
+                cards = parse_cards(hand) if hand else []
+            except ValueError:
+                cards = None
+            if cards is None or (cards and len(cards) != num_holecards):
+                if not isinstance(hand, str):
+                    raise ValueError("Invalid hole cards for {}: {}".format(self.game_type, hand))
+                parsed.append(parse_range(hand, self.game_type))
+            else:
+                parsed.append(cards)
+        if len(parsed) < 2:
+            raise ValueError("At least two players are needed")
+        return parsed
+
+    def _remove_blocked(self, holecards: list, board: list, dead_cards: list) -> list:
+        """
+        Remove the range combos that use a known card (board, dead cards or another player's hole cards)
+        """
+        cards = board + dead_cards + [c for hand in holecards if isinstance(hand, list) for c in hand]
+        for card in set(cards):
+            if cards.count(card) > self.num_decks:
+                raise ValueError("Card used more than once: {}".format(cards_to_str([card])))
+        known = cards_to_str(cards)
+        players = []
+        for hand in holecards:
+            if isinstance(hand, Range):
+                hand = hand.without(known)
+                if not len(hand):
+                    raise ValueError("Every combo of a range is blocked by the known cards")
+            players.append(hand)
+        return players
+
+    def _shards(self, num_trials: int) -> list:
+        """
+        Split the trials in shards of about SHARD_TRIALS trials
+        """
+        num_shards = max(1, -(-num_trials // SHARD_TRIALS))
+        sizes = [num_trials // num_shards] * num_shards
+        for i in range(num_trials % num_shards):
+            sizes[i] += 1
+        return sizes
+
+    def run(self, holecards: list, num_trials: int = 10000, board: str = '', dead_cards: str = '',
+            processes: int = None, record_trials: bool = False, target_stderr: float = None,
+            half_width: float = None, confidence: float = 0.95, time_budget: float = None,
+            output: str = None) -> dict:
+        """
+        Run random completions of the board
+
+        Inputs:
+            holecards: List of hole cards or range of every player, an empty string deals a random hand on
+                every trial
+            num_trials: Number of trials, the maximum number of trials of an adaptive run
+            board: Community cards already dealt (nothing, flop or flop + turn)
+            dead_cards: Cards known to be out of the deck
+            processes: Number of worker processes, overrides the simulator setting
+            record_trials: Keep the board, hands and strengths of every trial
+            target_stderr: Stop once the standard error of every player's equity is at most this value
+            half_width: Stop once the confidence interval of every player's equity is at most +/- this value
+            confidence: Confidence level of the intervals
+            time_budget: Stop after this many seconds and return the best estimate so far, the equities
+                are NaN if not a single shard finished in time
+            output: Directory of a columnar store (see pypoker.columnar) the trials are appended to shard
+                by shard instead of being kept in memory
+
+        Giving any of target_stderr, half_width or time_budget makes the run adaptive: trials are run in
+        small shards and the stopping rule is checked after each of them. Adaptive runs keep their worker
+        pool for the next runs until close() is called (or the simulator is used in a with block), and
+        budgets shorter than MIN_POOL_BUDGET run in process unless a pool is already running.
+
+        Returns a dictionary with following keys
+            'trials': Number of trials
+            'wins': List of the number of trials won outright by every player
+            'ties': List of the number of trials split by every player
+            'shares': List of the pot shares won by every player
+            'equity': List of the equity of every player (shares / trials)
+            'stderr': List of the standard error of the equity of every player
+            'half_width': List of the confidence interval half-width of the equity of every player
+            'converged': True if the error target was met (always True for a fixed number of trials)
+            'elapsed': Wall time of the run in seconds
+            'records': List of (board, hands, strengths) of every trial if record_trials (and no output),
+                None otherwise
+        """
+        holecards = self._parse_holecards(holecards)
+        board = parse_cards(board)
+        dead_cards = parse_cards(dead_cards)
+        if len(board) not in (0, 3, 4, 5):
+            raise ValueError("Board must have 0, 3, 4 or 5 cards")
+        if not 0 < confidence < 1:
+            raise ValueError("Confidence must be between 0 and 1")
+        holecards = self._remove_blocked(holecards, board, dead_cards)
+
+        start = time.perf_counter()
+        # Build or load the lookup table once, before the workers need it
+        get_lookup_evaluator()
+
+        processes = processes or self.processes
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        task = (self.game_type, self.num_decks, holecards, board, dead_cards)
+
+        writer = ColumnWriter(output) if output is not None else None
+        record_trials = record_trials or writer is not None
+        shape = (len(holecards), HOLECARDS_COUNT[self.game_type])
+
+        def emit(shard: dict) -> dict:
+            # Stream the records of a shard to the store as soon as it is finished
+            if writer is not None:
+                writer.append(records_to_columns(shard['records'], *shape))
+                shard['records'] = None
+            return shard
+
+        if target_stderr is None and half_width is None and time_budget is None:
+            sizes = self._shards(num_trials)
+            seeds = self.seed_sequence.spawn(len(sizes))
+            tasks = [task + (size, seed, record_trials, None, None) for size, seed in zip(sizes, seeds)]
+            if processes == 1 or len(tasks) == 1:
+                shards = [emit(_run_shard(t)) for t in tasks]
+            else:
+                with Pool(min(processes, len(tasks))) as pool:
+                    shards = [emit(shard) for shard in pool.imap(_run_shard, tasks)]
+            result = merge_shards(shards)
+            converged = True
+        else:
+            # The tightest of the two targets, expressed as a standard error
+            targets = [t for t in (target_stderr, None if half_width is None else half_width / z) if t is not None]
+            target = min(targets) if targets else None
+            deadline = start + time_budget if time_budget is not None else None
+            result, converged = self._run_adaptive(task, num_trials, record_trials, processes, target, deadline,
+                                                   emit)
+
+        if writer is not None and writer.index['columns'] is None:
+            # No trial was run, the store still gets its columns
+            writer.append(records_to_columns([], *shape))
+
+        errors = standard_errors(result)
+        del result['shares_sq']
+        # A time budget can run out before the first shard is finished
+        result['equity'] = [share / result['trials'] if result['trials'] else float('nan') for share in result['shares']]
+        result['stderr'] = errors
+        result['half_width'] = [z * error for error in errors]
+        result['converged'] = converged
+        result['elapsed'] = time.perf_counter() - start
+        return result
+
+    def _run_adaptive(self, task: tuple, max_trials: int, record_trials: bool, processes: int,
+                      target: float, deadline: float, emit) -> tuple:
+        """
+        Run shards of ADAPTIVE_SHARD_TRIALS trials until every standard error is at most target, the
+        deadline (a time.perf_counter value) passes or max_trials trials are run
+
+        emit is called with every shard as it is merged
+
+        Shards are merged in submission order, so a seeded run stopped by its error target is reproducible.
+        Shards stop at the deadline, and the shards still queued on the pool when a run stops are cancelled
+        so that the next run does not wait behind them.
+
+        Returns (merged counts, whether the target was met)
+        """
+        root = self.seed_sequence.spawn(1)[0]
+        submitted = [0, 0]  # shards, trials
+        run = None
+
+        def next_task():
+            size = min(ADAPTIVE_SHARD_TRIALS, max_trials - submitted[1])
+            seed = root.child(submitted[0])
+            submitted[0] += 1
+            submitted[1] += size
+            return task + (size, seed, record_trials, deadline, run)
+
+        def done(merged) -> bool:
+            if target is None or merged['trials'] < min(MIN_ADAPTIVE_TRIALS, max_trials):
+                return False
+            return max(standard_errors(merged)) <= target
+
+        shards = []
+        totals = None
+        converged = False
+
+        def add(shard) -> bool:
+            # Running totals for the stopping rule, the records are only merged once at the end
+            nonlocal totals
+            shards.append(emit(shard))
+            counts = dict(shard, records=None)
+            totals = merge_shards([totals, counts]) if totals else counts
+            return done(totals)
+
+        # Starting the workers would take most of a very short budget
+        if deadline is not None and self._pool is None and deadline - time.perf_counter() < MIN_POOL_BUDGET:
+            processes = 1
+
+        if processes == 1:
+            while submitted[1] < max_trials:
+                if add(_run_shard(next_task())):
+                    converged = True
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+            return merge_shards(shards), converged
+
+        # The pool is kept for the next runs
+        pool = self._get_pool(processes)
+        run = self._active_run.value
+        pending = deque()
+        def open_() -> bool:
+            return submitted[1] < max_trials and (deadline is None or time.perf_counter() < deadline)
+
+        try:
+            while pending or open_():
+                # Keep a couple of shards queued per worker, results are consumed in order
+                while len(pending) < 2 * processes and open_():
+                    pending.append(pool.apply_async(_run_shard, (next_task(),)))
+                try:
+                    if deadline is None:
+                        shard = pending[0].get()
+                    else:
+                        # Past the deadline the shards return what they ran so far
+                        shard = pending[0].get(max(0.0, deadline + DEADLINE_GRACE - time.perf_counter()))
+                except TimeoutError:
+                    break
+                pending.popleft()
+                if add(shard):
+                    converged = True
+                    break
+        finally:
+            # The shards still queued or running see the change and return at once, their results are dropped
+            self._active_run.value = run + 1
+        if not shards:
+            return _empty_counts(len(task[2])), False
+        return merge_shards(shards), converged
+
+    def enumerate_equity(self, holecards: list, board: str = '', dead_cards: str = '',
+                         processes: int = None) -> dict:
+        """
+        Compute exact equities by walking every completion of the board
+
+        Inputs:
+            holecards: List of hole cards of every player, all of them must be known
+            board: Community cards already dealt (nothing, flop, flop + turn or the full board)
+            dead_cards: Cards known to be out of the deck
+            processes: Number of worker processes, overrides the simulator setting
+
+        The completions are split by their first card and spread over the process pool.
+
+        Returns a dictionary with following keys
+            'boards': Number of boards evaluated
+            'wins': List of the number of boards won outright by every player
+            'ties': List of the number of boards split by every player
+            'win': List of the fraction of boards won outright by every player
+            'tie': List of the fraction of boards split by every player
+            'loss': List of the fraction of boards lost by every player
+            'equity': List of the equity of every player
+            'exact_equity': List of the equity of every player as a Fraction
+        """
+        holecards = self._parse_holecards(holecards)
+        if not all(isinstance(hand, list) and hand for hand in holecards):
+            raise ValueError("Every player's hole cards must be known for an exact enumeration")
+        board = parse_cards(board)
+        dead_cards = parse_cards(dead_cards)
+        if len(board) not in (0, 3, 4, 5):
+            raise ValueError("Board must have 0, 3, 4 or 5 cards")
+
+        get_lookup_evaluator()
+
+        deck = Deck(self.num_decks)
+        for card in dead_cards + board + [c for hand in holecards for c in hand]:
+            deck._remove_index(card_index(card))
+        remaining = deck._draw_ints(len(deck))
+        remaining.sort()
+
+        num_cards = 5 - len(board)
+        firsts = range(len(remaining) - num_cards + 1) if num_cards else [0]
+        tasks = [
+            (self.game_type, holecards, board, remaining, first, num_cards)
+            for first in firsts
+        ]
+
+        processes = processes or self.processes
+        if processes == 1 or len(tasks) == 1:
+            shards = [_enumerate_shard(task) for task in tasks]
+        else:
+            with Pool(min(processes, len(tasks))) as pool:
+                shards = list(pool.imap_unordered(_enumerate_shard, tasks))
+
+        merged = merge_shards(shards)
+        boards = merged['trials']
+        unit = lcm(*range(1, len(holecards) + 1))
+        exact_equity = [Fraction(share, unit * boards) for share in merged['shares']]
+
+        return {
+            'boards': boards,
+            'wins': merged['wins'],
+            'ties': merged['ties'],
+            'win': [w / boards for w in merged['wins']],
+            'tie': [t / boards for t in merged['ties']],
+            'loss': [(boards - w - t) / boards for w, t in zip(merged['wins'], merged['ties'])],
+            'equity': [float(e) for e in exact_equity],
+            'exact_equity': exact_equity
+        }
+
+    def range_equity(self, ranges: list, board: str = '', dead_cards: str = '', num_trials: int = 10000,
+                     exact: bool = None, processes: int = None, **stopping) -> dict:
+        """
+        Equity of ranges against each other
+
+        Inputs:
+            ranges: List of the range (Range or range string such as 'TT+, AKs') or hole cards of every player
+            board: Community cards already dealt
+            dead_cards: Cards known to be out of the deck
+            num_trials: Number of trials when sampling
+            exact: Enumerate every matchup of combos and every board (True) or sample (False), by default
+                matchups are enumerated on the flop and later when it takes at most EXACT_RANGE_EVALUATIONS
+                board evaluations
+            processes: Number of worker processes, overrides the simulator setting
+
+        Combos that conflict with the known cards are removed, and matchups where two players share a card
+        are skipped. Every matchup counts with the product of its combo weights.
+
+        Exact matchup results are cached by their suit isomorphism class, so a matchup seen in an earlier
+        query (or the same matchup with the suits renamed) is not evaluated again. Sampling accepts the
+        stopping rule keywords of run.
+
+        Returns a dictionary with following keys
+            'equity': List of the equity of every player
+            'exact': True if the matchups were enumerated
+            'matchups': Number of compatible matchups (exact only)
+            'evaluated': Number of matchup classes evaluated, the others came from the cache (exact only)
+            and the keys returned by run when sampling
+        """
+        holecards = self._parse_holecards(ranges)
+        board = parse_cards(board)
+        dead_cards = parse_cards(dead_cards)
+        if len(board) not in (0, 3, 4, 5):
+            raise ValueError("Board must have 0, 3, 4 or 5 cards")
+        holecards = self._remove_blocked(holecards, board, dead_cards)
+
+        known = all(isinstance(hand, Range) or hand for hand in holecards)
+        if exact is None:
+            num_hole = HOLECARDS_COUNT[self.game_type] * len(holecards)
+            live = 52 * self.num_decks - len(board) - len(dead_cards) - num_hole
+            evaluations = comb(live, 5 - len(board))
+            for hand in holecards:
+                if isinstance(hand, Range):
+                    evaluations *= len(hand)
+            exact = known and len(board) >= 3 and evaluations <= EXACT_RANGE_EVALUATIONS
+        if not exact:
+            result = self.run(holecards, num_trials, board=board, dead_cards=dead_cards,
+                              processes=processes, **stopping)
+            result['exact'] = False
+            return result
+        if not known:
+            raise ValueError("Random hands cannot be enumerated, use a range instead")
+        players = [
+            hand if isinstance(hand, Range) else Range([cards_to_str(hand)], self.game_type)
+            for hand in holecards
+        ]
+
+        # Weight of every matchup class, keyed by the canonical hands and board
+        board_str = cards_to_str(board)
+        dead_str = cards_to_str(dead_cards)
+        num_cards = HOLECARDS_COUNT[self.game_type] * len(players)
+        classes = {}
+        matchups = 0
+        for combos in product(*players):
+            hands = [combo for combo, _ in combos]
+            if len(set("".join(hands)[i: i + 2] for i in range(0, 2 * num_cards, 2))) != num_cards:
+                continue
+            weight = 1.0
+            for _, combo_weight in combos:
+                weight *= combo_weight
+            canonical_hands, canonical_board, _ = canonicalize(hands + [dead_str], board_str)
+            key = (self.game_type, self.num_decks, tuple(canonical_hands), canonical_board)
+            classes[key] = classes.get(key, 0.0) + weight
+            matchups += 1
+        if not classes:
+            raise ValueError("The ranges have no compatible combos")
+
+        values = {}
+        missing = []
+        for key in classes:
+            cached = self.matchup_cache.get(key)
+            if cached is None:
+                missing.append(key)
+            else:
+                values[key] = cached
+        # The last canonical group holds the dead cards
+        tasks = [(self.game_type, self.num_decks, list(groups[:-1]), canonical_board, groups[-1])
+                 for _, _, groups, canonical_board in missing]
+        processes = processes or self.processes
+        if processes == 1 or len(tasks) <= 1:
+            results = [_enumerate_matchup(task) for task in tasks]
+        else:
+            with Pool(min(processes, len(tasks))) as pool:
+                results = pool.map(_enumerate_matchup, tasks)
+        for key, equities in zip(missing, results):
+            values[key] = equities
+            self.matchup_cache.put(key, equities)
+
+        total = sum(classes.values())
+        equity = [0.0] * len(players)
+        for key, weight in classes.items():
+            for i, value in enumerate(values[key]):
+                equity[i] += weight * float(value)
+
+        return {
+            'equity': [value / total for value in equity],
+            'exact': True,
+            'matchups': matchups,
+            'evaluated': len(missing)
+        }
+
+    def results_frame(self, records: list):
+        """
+        Convert trial records to a pandas DataFrame with one row per trial
+        """
+        if pd is None:
+            raise ImportError("pandas is required for the results frame, install it with 'pip install pandas'")
+        rows = []
+        for board, hands, strengths in records:
+            row = {'board': cards_to_str(board)}
+            top = max(strengths)
+            num_winners = strengths.count(top)
+            for i, (hand, strength) in enumerate(zip(hands, strengths)):
+                row['p{}'.format(i + 1)] = cards_to_str(hand)
+                row['p{}_strength'.format(i + 1)] = strength
+                row['p{}_share'.format(i + 1)] = 1 / num_winners if strength == top else 0.0
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def simulate(self, *args, board: str = '', dead_cards: str = '', processes: int = None,
+                 record_trials: bool = True, output: str = None, **stopping) -> tuple:
+        """
+        Simulate the equity of the given hands
+
+        Usage: simulate(holecards_1, holecards_2, ..., num_trials)
+
+        The stopping rule keywords of run (target_stderr, half_width, confidence, time_budget) are passed on.
+
+        Returns a tuple with the equity of every player followed by a pandas DataFrame of the trials
+        (None if record_trials is False), or a ColumnReader of the trials when they are written to output
+        """
+        holecards = list(args)
+        num_trials = 10000
+        if holecards and isinstance(holecards[-1], int):
+            num_trials = holecards.pop()
+
+        result = self.run(holecards, num_trials, board=board, dead_cards=dead_cards,
+                          processes=processes, record_trials=record_trials, output=output, **stopping)
+        if output is not None:
+            return tuple(result['equity']) + (ColumnReader(output),)
+        frame = self.results_frame(result['records']) if record_trials else None
+        return tuple(result['equity']) + (frame,)
@@ -0,0 +1,409 @@
+from .deck import Deck
+from .evaluator import Evaluator
+from .misc import HOLECARDS_COUNT, fuzzy_match_game_name
+
+STREETS = ('preflop', 'flop', 'turn', 'river', 'showdown')
+# Number of community cards visible on every street
+BOARD_CARDS = (0, 3, 4, 5, 5)
+SHOWDOWN = 4
+
+ACTIONS = ('fold', 'check', 'call', 'bet', 'raise')
+BETTING = ('no-limit', 'pot-limit')
+
+
+class TableState(object):
+    """
+    State of the hand played at one table
+
+    Seats are numbered from 0, chip amounts are integers. The whole runout is dealt when the hand starts
+    and revealed street by street, so a state is self contained: copy() snapshots it and the copy can be
+    played on independently (e.g. to explore both sides of a decision).
+
+        button: Seat of the button
+        street: 0 - 3 for preflop to river, 4 once the hand reached showdown
+        holecards: Hole cards of every seat ('AsKd')
+        runout: The five community cards, see board for the visible ones
+        stacks: Chips behind of every seat
+        bets: Chips put in the pot on the current street by every seat
+        contributed: Chips put in the pot during the whole hand by every seat, antes included
+        folded, all_in: Flags of every seat
+        current_bet: Highest bet of the street, the amount to call up to
+        last_raise: Size of the last full bet or raise, the smallest raise allowed
+        to_act: Seat to act, None once the hand is over
+        needs_action: Bitmask of the seats which still have to act on this street
+        can_raise: Bitmask of the seats allowed to raise, an incomplete all-in raise does not reopen the
+            betting for the seats which already acted
+        actions: List of (street, seat, action, chips put in the pot) of the hand
+        winnings: Chips won from the pot by every seat, None until the hand is over
+    """
+
+    __slots__ = (
+        'button', 'street', 'holecards', 'runout', 'stacks', 'bets', 'contributed', 'folded', 'all_in',
+        'current_bet', 'last_raise', 'to_act', 'needs_action', 'can_raise', 'actions', 'winnings'
+    )
+
+    def copy(self) -> 'TableState':
+        """
+        Independent copy of the state
+        """
+        state = TableState.__new__(TableState)
+        state.button = self.button
+        state.street = self.street
+        state.holecards = self.holecards
+        state.runout = self.runout
+        state.stacks = list(self.stacks)
+        state.bets = list(self.bets)
+        state.contributed = list(self.contributed)
+        state.folded = list(self.folded)
+        state.all_in = list(self.all_in)
+        state.current_bet = self.current_bet
+        state.last_raise = self.last_raise
+        state.to_act = self.to_act
+        state.needs_action = self.needs_action
+        state.can_raise = self.can_raise
+        state.actions = list(self.actions)
+        state.winnings = None if self.winnings is None else list(self.winnings)
+        return state
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo) -> 'TableState':
+        # Every mutable field is a list of immutable values
+        return self.copy()
+
+    def __repr__(self) -> str:
+        return "TableState(street={}, board='{}', pot={}, stacks={}, to_act={})".format(
+            STREETS[self.street], self.board, self.pot, self.stacks, self.to_act
+        )
+
+    @property
+    def num_players(self) -> int:
+        return len(self.stacks)
+
+    @property
+    def board(self) -> str:
+        """
+        Community cards visible on the current street
+        """
+        return self.runout[:2 * BOARD_CARDS[self.street]]
+
+    @property
+    def pot(self) -> int:
+        """
+        Chips in the pot, current street included
+        """
+        return sum(self.contributed)
+
+    @property
+    def hand_over(self) -> bool:
+        return self.winnings is not None
+
+    def net(self, seat: int) -> int:
+        """
+        Chips won or lost by a seat in the hand, once it is over
+        """
+        return self.winnings[seat] - self.contributed[seat]
+
+
+class Dealer(object):
+    """
+    Betting engine running hands of Hold'em (nlh) and Omaha (plo4, plo5, plo6)
+
+    The dealer holds the rules, the deck and the evaluator and is shared by any number of tables, the
+    tables themselves are TableState objects. start_hand deals a new hand and posts the antes and the
+    blinds, act applies the action of the seat to act and moves the hand on: next seat, next street,
+    all-in runout, showdown and payouts.
+    """
+
+    def __init__(self, game_type: str, small_blind: int = 1, big_blind: int = 2, ante: int = 0,
+                 betting: str = None, engine: str = 'lookup', rng=None) -> None:
+        """
+        Initialize the dealer
+
+        Inputs:
+            game_type: 'nlh', 'plo4', 'plo5' or 'plo6' (or any name fuzzy_match_game_name understands)
+            small_blind, big_blind, ante: Forced bets in chips
+            betting: 'no-limit' or 'pot-limit', defaults to no-limit for nlh and pot-limit for Omaha
+            engine: Evaluator engine used at showdown
+            rng: Source of randomness of the deck (see pypoker.rng.make_rng)
+        """
+        self.game_type = fuzzy_match_game_name(game_type)
+        if betting is None:
+            betting = 'no-limit' if self.game_type == 'nlh' else 'pot-limit'
+        if betting not in BETTING:
+            raise ValueError("Unknown betting structure: {}".format(betting))
+        if not 0 < small_blind <= big_blind:
+            raise ValueError("Blinds must satisfy 0 < small_blind <= big_blind")
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.ante = ante
+        self.pot_limit = betting == 'pot-limit'
+        self.deck = Deck(rng=rng)
+        self.evaluator = Evaluator(engine)
+        self.max_players = min(9, (52 - 5) // HOLECARDS_COUNT[self.game_type])
+
+    def start_hand(self, stacks: list, button: int = 0) -> TableState:
+        """
+        Deal a new hand to the players with the given stacks, post the antes and the blinds
+
+        Heads-up the button posts the small blind and acts first preflop.
+
+        Returns the TableState of the hand
+        """
+        num_players = len(stacks)
+        if not 2 <= num_players <= self.max_players:
+            raise ValueError("Number of players must be between 2 and {}".format(self.max_players))
+        if any(stack <= 0 for stack in stacks):
+            raise ValueError("Every player must have chips")
+
+        deal = self.deck.deal_poker_hands(self.game_type, num_players)
+        player_cards = deal['player_cards']
+
+        state = TableState()
+        state.button = button % num_players
+        state.street = 0
+        state.holecards = [player_cards['p{}'.format(i + 1)] for i in range(num_players)]
+        state.runout = deal['community_cards']
+        state.stacks = list(stacks)
+        state.bets = [0] * num_players
+        state.contributed = [0] * num_players
+        state.folded = [False] * num_players
+        state.all_in = [False] * num_players
+        state.actions = []
+        state.winnings = None
+
+        if self.ante:
+            for seat in range(num_players):
+                self._put(state, seat, min(self.ante, state.stacks[seat]))
+            state.bets = [0] * num_players
+
+        if num_players == 2:
+            small, big = state.button, 1 - state.button
+        else:
+            small, big = (state.button + 1) % num_players, (state.button + 2) % num_players
+        self._put(state, small, min(self.small_blind, state.stacks[small]))
+        self._put(state, big, min(self.big_blind, state.stacks[big]))
+        state.current_bet = self.big_blind
+        state.last_raise = self.big_blind
+
+        able = self._able(state)
+        state.needs_action = state.can_raise = able
+        # Nobody left to bet against: the only player with chips behind has nothing to call
+        if bin(able).count('1') == 1:
+            seat = able.bit_length() - 1
+            if state.bets[seat] >= max(state.bets):
+                state.needs_action = 0
+        state.to_act = big
+        self._advance(state)
+        return state
+
+    def _able(self, state: TableState) -> int:
+        """
+        Bitmask of the seats still in the hand with chips behind
+        """
+        mask = 0
+        for seat, (folded, all_in) in enumerate(zip(state.folded, state.all_in)):
+            if not folded and not all_in:
+                mask |= 1 << seat
+        return mask
+
+    def _put(self, state: TableState, seat: int, chips: int) -> None:
+        """
+        Move chips from the stack of a seat to the pot
+        """
+        state.stacks[seat] -= chips
+        state.bets[seat] += chips
+        state.contributed[seat] += chips
+        if state.stacks[seat] == 0:
+            state.all_in[seat] = True
+
+    def raise_range(self, state: TableState) -> tuple:
+        """
+        Smallest and largest amounts the seat to act can bet or raise to (its total bet on the street)
+
+        Returns None when the seat cannot raise
+        """
+        seat = state.to_act
+        if seat is None or not state.can_raise >> seat & 1:
+            return None
+        stack = state.stacks[seat]
+        to_call = state.current_bet - state.bets[seat]
+        if stack <= to_call:
+            return None
+        # Raising is pointless when nobody else has chips to call it
+        if not self._able(state) & ~(1 << seat):
+            return None
+
+        all_in = state.bets[seat] + stack
+        low = state.current_bet + state.last_raise
+        if self.pot_limit:
+            # Pot sized raise: call first, then raise the size of the pot
+            high = state.current_bet + state.pot + to_call
+        else:
+            high = all_in
+        # A player short of the minimum can still go all-in
+        return min(low, all_in), min(high, all_in)
+
+    def legal_actions(self, state: TableState) -> dict:
+        """
+        Actions available to the seat to act
+
+        Returns a dictionary with following keys
+            'seat': Seat to act
+            'to_call': Chips to put in to call (0 when checking is possible)
+            'check': Whether the seat can check
+            'bet': (min, max) amounts to bet, None if somebody already bet on the street or the seat cannot bet
+            'raise': (min, max) amounts to raise to, None if nobody bet on the street (the blinds are a bet)
+                or the seat cannot raise
+        """
+        seat = state.to_act
+        if seat is None:
+            raise ValueError("The hand is over")
+        to_call = min(state.current_bet - state.bets[seat], state.stacks[seat])
+        limits = self.raise_range(state)
+        return {
+            'seat': seat,
+            'to_call': to_call,
+            'check': to_call <= 0,
+            'bet': None if state.current_bet else limits,
+            'raise': limits if state.current_bet else None,
+        }
+
+    def act(self, state: TableState, action: str, amount: int = None) -> TableState:
+        """
+        Apply the action of the seat to act
+
+        Inputs:
+            state: State of the hand, updated in place
+            action: 'fold', 'check', 'call', 'bet' (nobody bet on the street yet) or 'raise'
+            amount: For bets and raises, the total bet of the seat on the street after the action
+                ('raise', 300 raises to 300 chips), see raise_range
+
+        Returns the state
+        """
+        seat = state.to_act
+        if seat is None:
+            raise ValueError("The hand is over")
+        to_call = state.current_bet - state.bets[seat]
+        bit = 1 << seat
+        chips = 0
+
+        if action == 'fold':
+            state.folded[seat] = True
+        elif action == 'check':
+            if to_call > 0:
+                raise ValueError("Cannot check facing a bet, {} to call".format(to_call))
+        elif action == 'call':
+            if to_call <= 0:
+                raise ValueError("Nothing to call, check instead")
+            chips = min(to_call, state.stacks[seat])
+            self._put(state, seat, chips)
+        elif action in ('bet', 'raise'):
+            if action == 'bet' and state.current_bet:
+                raise ValueError("Cannot bet facing a bet of {}, raise instead".format(state.current_bet))
+            if action == 'raise' and not state.current_bet:
+                raise ValueError("Nothing to raise, bet instead")
+            limits = self.raise_range(state)
+            if limits is None:
+                raise ValueError("Seat {} cannot {}".format(seat, action))
+            if amount is None or not limits[0] <= amount <= limits[1]:
+                raise ValueError("Raise amount must be between {} and {}, got {}".format(limits[0], limits[1], amount))
+            raise_size = amount - state.current_bet
+            chips = amount - state.bets[seat]
+            self._put(state, seat, chips)
+            state.current_bet = amount
+            able = self._able(state)
+            if raise_size >= state.last_raise:
+                state.last_raise = raise_size
+                state.can_raise = able
+            # Every other player with chips has to respond, even to an incomplete raise
+            state.needs_action = able
+        else:
+            raise ValueError("Unknown action: {}".format(action))
+
+        state.needs_action &= ~bit
+        state.can_raise &= ~bit
+        state.actions.append((state.street, seat, action, chips))
+        self._advance(state)
+        return state
+
+    def _next_seat(self, state: TableState, seat: int) -> int:
+        """
+        First seat after seat (clockwise) which has to act
+        """
+        num_players = len(state.stacks)
+        for offset in range(1, num_players + 1):
+            candidate = (seat + offset) % num_players
+            if state.needs_action >> candidate & 1:
+                return candidate
+        return None
+
+    def _advance(self, state: TableState) -> None:
+        """
+        Move the hand on after an action: next seat, next street or end of the hand
+        """
+        if state.folded.count(False) == 1:
+            self._return_uncalled(state)
+            winner = state.folded.index(False)
+            winnings = [0] * len(state.stacks)
+            winnings[winner] = state.pot
+            self._pay(state, winnings)
+        elif state.needs_action:
+            state.to_act = self._next_seat(state, state.to_act)
+        else:
+            self._end_street(state)
+
+    def _end_street(self, state: TableState) -> None:
+        """
+        Close the betting round, deal the next street or go to showdown when no more betting is possible
+        """
+        self._return_uncalled(state)
+        able = self._able(state)
+        if state.street == 3 or bin(able).count('1') <= 1:
+            state.street = SHOWDOWN
+            self._showdown(state)
+            return
+        state.street += 1
+        state.bets = [0] * len(state.stacks)
+        state.current_bet = 0
+        state.last_raise = self.big_blind
+        state.needs_action = state.can_raise = able
+        state.to_act = self._next_seat(state, state.button)
+
+    def _return_uncalled(self, state: TableState) -> None:
+        """
+        Give back the part of the largest bet of the street nobody matched
+        """
+        bets = state.bets
+        top = max(bets)
+        seat = bets.index(top)
+        second = max(bets[:seat] + bets[seat + 1:])
+        if top > second:
+            excess = top - second
+            bets[seat] -= excess
+            state.contributed[seat] -= excess
+            state.stacks[seat] += excess
+            state.all_in[seat] = False
+
+    def _showdown(self, state: TableState) -> None:
+        """
+        Split the main pot and the side pots between the best hands eligible to each of them
+        """
+        num_players = len(state.stacks)
+        contenders = {seat: state.holecards[seat] for seat in range(num_players) if not state.folded[seat]}
+        # The odd chips go to the winners closest to the left of the button
+        order = [(state.button + 1 + i) % num_players for i in range(num_players)]
+        result = self.evaluator.showdown(
+            contenders, state.runout, dict(enumerate(state.contributed)),
+            folded=[seat for seat in range(num_players) if state.folded[seat]], order=order,
+            game_type=self.game_type
+        )
+        winnings = result['winnings']
+        self._pay(state, [winnings[seat] for seat in range(num_players)])
+
+    def _pay(self, state: TableState, winnings: list) -> None:
+        for seat, chips in enumerate(winnings):
+            state.stacks[seat] += chips
+        state.winnings = winnings
+        state.to_act = None
+        state.needs_action = state.can_raise = 0
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from pypoker import Simulator
+from pypoker.columnar import ColumnReader, ColumnWriter, decode_cards, encode_cards
+
+
+def test_append_and_read(tmp_path):
+    writer = ColumnWriter(str(tmp_path))
+    writer.append({'a': np.arange(3), 'b': np.ones((3, 2), dtype=np.uint8)})
+    writer.append({'a': np.arange(3, 5), 'b': np.zeros((2, 2), dtype=np.uint8)})
+    reader = ColumnReader(str(tmp_path))
+    assert len(reader) == 5
+    assert reader['a'].tolist() == [0, 1, 2, 3, 4]
+    assert reader['b'].shape == (5, 2)
+    assert [len(chunk['a']) for chunk in reader.iter_chunks(['a'])] == [3, 2]
+
+
+def test_reopen_appends(tmp_path):
+    ColumnWriter(str(tmp_path)).append({'a': np.arange(2)})
+    ColumnWriter(str(tmp_path)).append({'a': np.arange(2)})
+    assert len(ColumnReader(str(tmp_path))) == 4
+
+
+def test_schema_mismatch(tmp_path):
+    writer = ColumnWriter(str(tmp_path))
+    writer.append({'a': np.arange(2)})
+    with pytest.raises(ValueError):
+        writer.append({'a': np.arange(2, dtype=np.float32)})
+
+
+def test_new_store_is_readable(tmp_path):
+    ColumnWriter(str(tmp_path))
+    reader = ColumnReader(str(tmp_path))
+    assert len(reader) == 0
+    assert reader.columns == []
+
+
+def test_empty_append_sets_columns(tmp_path):
+    ColumnWriter(str(tmp_path)).append({'a': np.empty((0, 5), dtype=np.uint8)})
+    reader = ColumnReader(str(tmp_path))
+    assert reader.columns == ['a']
+    assert reader['a'].shape == (0, 5)
+
+
+def test_simulate_without_trials(tmp_path):
+    output = str(tmp_path / 'store')
+    equity_1, equity_2, reader = Simulator('nlh', processes=1).simulate('AsAh', 'KsKh', 0, output=output)
+    assert len(reader) == 0
+    assert reader['holecards'].shape == (0, 2, 2)
+
+
+def test_simulate_writes_trials(tmp_path):
+    output = str(tmp_path / 'store')
+    _, _, reader = Simulator('nlh', processes=1, seed=1).simulate('AsAh', 'KsKh', 200, output=output)
+    assert len(reader) == 200
+    assert np.allclose(reader['shares'].sum(axis=1), 1)
+
+
+def test_encode_round_trip():
+    cards = decode_cards(np.arange(52, dtype=np.uint8))
+    assert encode_cards(cards).tolist() == list(range(52))
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from pypoker import Deck
+from pypoker.card import parse_cards
+
+
+def test_deal_poker_hands_unique_cards():
+    deal = Deck(rng=1).deal_poker_hands('plo6', 6)
+    cards = deal['community_cards'] + ''.join(deal['player_cards'].values())
+    assert len(deal['player_cards']) == 6
+    assert len(cards) == 2 * (5 + 36)
+    assert len(set(cards[i: i + 2] for i in range(0, len(cards), 2))) == 41
+
+
+def test_seeded_decks_deal_the_same_cards():
+    assert Deck(rng=5).deal_poker_hands('nlh', 9) == Deck(rng=5).deal_poker_hands('nlh', 9)
+
+
+def test_knocked_out_cards_are_not_dealt():
+    deck = Deck(rng=2)
+    deck.knockout_cards('AsKsQsJs')
+    deals = deck.deal_batch('nlh', 2, 1000)
+    assert not np.isin(deals, parse_cards('AsKsQsJs')).any()
+
+
+def test_deal_batch_rows_are_unique_cards():
+    deals = Deck(rng=3).deal_batch('plo4', 3, 500)
+    assert deals.shape == (500, 17)
+    assert all(len(set(row)) == 17 for row in deals.tolist())
+
+
+def test_iter_deals_sizes():
+    chunks = list(Deck(rng=1).iter_deals('nlh', 2, 4, n=10))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    assert list(Deck(rng=1).iter_deals('nlh', 2, 4, n=0)) == []
+
+
+@pytest.mark.parametrize('chunk_size, n', [(0, 10), (-1, 10), (4, -1)])
+def test_iter_deals_rejects_invalid_sizes(chunk_size, n):
+    with pytest.raises(ValueError):
+        Deck(rng=1).iter_deals('nlh', 2, chunk_size, n=n)
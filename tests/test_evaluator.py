@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from pypoker import Deck, Evaluator
+from pypoker.lookup import NUM_CLASSES, FiveCardEvaluator
+
+
+@pytest.mark.parametrize('cards, name', [
+    ('AsKsQsJsTs', 'Royal Flush'),
+    ('9h8h7h6h5h', 'Straight Flush'),
+    ('7c7d7h7s2c', 'Four of a Kind'),
+    ('KcKdKh2s2c', 'Full House'),
+    ('As9s7s4s2s', 'Flush'),
+    ('5c4d3h2sAc', 'Straight'),
+    ('QcQdQh9s2c', 'Three of a Kind'),
+    ('JcJd4h4s2c', 'Two Pair'),
+    ('TcTd8h4s2c', 'One Pair'),
+    ('Kc9d8h4s2c', 'High Card'),
+])
+def test_categories(cards, name):
+    assert Evaluator().card_strength_evaluator(cards)[0] == name
+
+
+def test_strength_order():
+    evaluator = Evaluator()
+    assert evaluator.hand_strength('AsKsQsJsTs') == NUM_CLASSES
+    assert evaluator.hand_strength('7c5d4h3s2c') == 1
+    # Kickers decide
+    assert evaluator.hand_strength('AcAdKh9s2c') > evaluator.hand_strength('AhAsQh9s2c')
+    # The wheel is the lowest straight
+    assert evaluator.hand_strength('5c4d3h2sAc') < evaluator.hand_strength('6c5d4h3s2c')
+    # Suits do not matter without a flush
+    assert evaluator.hand_strength('AcAdKh9s2c') == evaluator.hand_strength('AhAsKd9c2d')
+
+
+def test_seven_cards():
+    evaluator = Evaluator()
+    assert evaluator.hand_strength('AsKsQsJsTs9d8d') == NUM_CLASSES
+    assert evaluator.hand_strength('2c2d2h7s7c9dKd') == evaluator.hand_strength('2c2d2h7s7c')
+
+
+def test_default_engine_does_not_touch_the_disk(tmp_path, monkeypatch):
+    directory = tmp_path / 'tables'
+    monkeypatch.setenv('PYPOKER_TABLE_DIR', str(directory))
+    evaluator = Evaluator()
+    deal = Deck(rng=1).deal_poker_hands('plo4', 3)
+    evaluator.declare_winner(deal['player_cards'], deal['community_cards'])
+    evaluator.hand_strength('AsKsQsJsTs9d8d')
+    evaluator.strength_evaluation('AsKs', 'QsJsTs2d3d', 'nlh')
+    assert not os.path.exists(str(directory))
+
+
+@pytest.mark.parametrize('variant', ['nlh', 'plo4', 'plo5', 'plo6'])
+def test_engines_agree(variant):
+    default, lookup = Evaluator(), Evaluator('lookup')
+    deck = Deck(rng=4)
+    for _ in range(200):
+        deal = deck.deal_poker_hands(variant, 4)
+        for holecards in deal['player_cards'].values():
+            assert (default.strength_evaluation(holecards, deal['community_cards'], variant)
+                    == lookup.strength_evaluation(holecards, deal['community_cards'], variant))
+
+
+def test_five_card_evaluator_covers_every_class():
+    evaluator = FiveCardEvaluator()
+    assert len(evaluator.products) + len(evaluator.flushes) == NUM_CLASSES
+
+
+def test_omaha_uses_two_hole_cards():
+    # Four spades in hand and one on the board is not a flush in Omaha
+    assert Evaluator().strength_evaluation('AsKsQsJs', 'Ts2d3c7h9h', 'plo4')[1] != 'Flush'
+
+
+def test_declare_winner():
+    result = Evaluator().declare_winner({'p1': 'AsKd', 'p2': 'AhKc', 'p3': '2d2h'}, '2c3c4h9sTd')
+    assert [player['winner'] for player in result] == [False, False, True]
+    assert result[2]['best_combo_name'] == 'Three of a Kind'
+
+
+def test_declare_winner_split():
+    result = Evaluator().declare_winner({'p1': 'AsKd', 'p2': 'AhKc'}, '2c3c4h9sTd')
+    assert [player['winner'] for player in result] == [True, True]
+    compact = Evaluator().declare_winner({'p1': 'AsKd', 'p2': 'AhKc'}, '2c3c4h9sTd', return_type='compact')
+    assert compact.winner_names() == ['p1', 'p2']
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        Evaluator('fast')
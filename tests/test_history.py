@@ -0,0 +1,153 @@
+import random
+
+import pytest
+
+from pypoker import Dealer
+from pypoker.history import HandStats, analyze, analyze_file, iter_hand_lines, parse_hand, starting_hand
+from pypoker.selfplay import AggressivePolicy, CallingStation, RandomPolicy
+
+STREET_NAMES = ('FLOP', 'TURN', 'RIVER')
+
+
+def _cards(cards: str) -> str:
+    return ' '.join(cards[i: i + 2] for i in range(0, len(cards), 2))
+
+
+def _write_hand(hand_id: int, dealer: Dealer, stacks: list, button: int, rng) -> tuple:
+    """
+    Play a hand with the Dealer and write it as PokerStars style text
+
+    Returns the lines and the final TableState
+    """
+    policies = [RandomPolicy(0.3, 0.2), AggressivePolicy(0.3), CallingStation()][:len(stacks)]
+    state = dealer.start_hand(stacks, button)
+    names = ['Player{}'.format(seat + 1) for seat in range(len(stacks))]
+    lines = ["PokerStars Hand #{}: Hold'em No Limit (1/2) - 2026/01/01 12:00:00".format(hand_id)]
+    put = list(state.contributed)
+    for seat, ante in enumerate(c - b for c, b in zip(state.contributed, state.bets)):
+        if ante:
+            lines.append("{}: posts the ante {}".format(names[seat], ante))
+    big = (button + 1 if len(stacks) == 2 else button + 2) % len(stacks)
+    for seat, blind in enumerate(state.bets):
+        if blind:
+            lines.append("{}: posts {} {}".format(names[seat], 'big blind' if seat == big else 'small blind', blind))
+    lines.append("*** HOLE CARDS ***")
+    lines.append("Dealt to {} [{}]".format(names[0], _cards(state.holecards[0])))
+
+    street = 0
+    totals = list(state.bets)
+    while not state.hand_over:
+        action, amount = policies[state.to_act].act(state, dealer.legal_actions(state), rng)
+        dealer.act(state, action, amount)
+        logged_street, seat, logged_action, chips = state.actions[-1]
+        if logged_street != street:
+            street = logged_street
+            totals = [0] * len(stacks)
+            lines.append("*** {} *** [{}]".format(STREET_NAMES[street - 1], _cards(state.runout[:2 * (street + 2)])))
+        put[seat] += chips
+        totals[seat] += chips
+        if logged_action == 'raise':
+            lines.append("{}: raises {} to {}".format(names[seat], chips, totals[seat]))
+        elif logged_action in ('bet', 'call'):
+            lines.append("{}: {}s {}".format(names[seat], logged_action, chips))
+        else:
+            lines.append("{}: {}s".format(names[seat], logged_action))
+
+    for seat, name in enumerate(names):
+        if put[seat] > state.contributed[seat]:
+            lines.append("Uncalled bet ({}) returned to {}".format(put[seat] - state.contributed[seat], name))
+    contenders = [seat for seat in range(len(stacks)) if not state.folded[seat]]
+    if len(contenders) > 1:
+        lines.append("*** SHOW DOWN ***")
+        for seat in contenders:
+            lines.append("{}: shows [{}]".format(names[seat], _cards(state.holecards[seat])))
+    for seat, name in enumerate(names):
+        if state.winnings[seat]:
+            lines.append("{} collected {} from pot".format(name, state.winnings[seat]))
+    lines.append("*** SUMMARY ***")
+    if len(contenders) > 1:
+        lines.append("Board [{}]".format(_cards(state.runout)))
+    return [line + "\n" for line in lines] + ["\n"], state
+
+
+def _hands(count: int, seed: int = 1):
+    dealer = Dealer('nlh', 1, 2, ante=1, rng=seed)
+    rng = random.Random(seed)
+    for hand_id in range(count):
+        num_players = rng.choice((2, 3))
+        stacks = [rng.randint(10, 200) for _ in range(num_players)]
+        yield _write_hand(1000 + hand_id, dealer, stacks, hand_id % num_players, rng)
+
+
+def test_parse_round_trip():
+    for lines, state in _hands(300):
+        hand = parse_hand(lines)
+        for seat in range(len(state.stacks)):
+            assert hand.net('Player{}'.format(seat + 1)) == pytest.approx(state.net(seat))
+        assert hand.holecards['Player1'] == state.holecards[0]
+        assert hand.game_type == 'nlh'
+        folded_preflop = {'Player{}'.format(seat + 1) for street, seat, action, _ in state.actions
+                          if street == 0 and action == 'fold'}
+        assert hand.preflop_folds == folded_preflop
+        if len(hand.shown) > 1:
+            assert hand.board == state.runout
+
+
+def _write_file(path, count: int) -> list:
+    states = []
+    with open(path, 'w') as f:
+        for lines, state in _hands(count, seed=2):
+            f.writelines(lines)
+            states.append(state)
+    return states
+
+
+def test_iter_hand_lines_ranges(tmp_path):
+    path = str(tmp_path / 'hands.txt')
+    _write_file(path, 50)
+    whole = list(iter_hand_lines(path))
+    assert len(whole) == 50
+    size = (tmp_path / 'hands.txt').stat().st_size
+    pieces = []
+    for start in range(0, size, 1000):
+        pieces += list(iter_hand_lines(path, start, start + 1000))
+    assert pieces == whole
+    assert list(iter_hand_lines(path, use_mmap=True)) == whole
+
+
+def test_analyze_matches_single_pass(tmp_path):
+    path = str(tmp_path / 'hands.txt')
+    states = _write_file(path, 200)
+    single = analyze_file(path)
+    assert single.num_hands == 200 and single.errors == 0
+    for processes, chunk_bytes, use_mmap in ((1, 4096, False), (2, 4096, True), (2, 1 << 20, False)):
+        stats = analyze(path, processes, chunk_bytes, use_mmap)
+        assert stats.num_hands == 200
+        assert stats.stats.keys() == single.stats.keys()
+        for key, row in single.stats.items():
+            assert stats.stats[key] == pytest.approx(row)
+
+    # The cards of Player1 and of the players at showdown are known, their results add up per starting hand
+    expected = 0
+    for state in states:
+        contenders = [seat for seat, folded in enumerate(state.folded) if not folded]
+        known = {0} | (set(contenders) if len(contenders) > 1 else set())
+        expected += sum(state.net(seat) for seat in known)
+    assert sum(row['net'] for row in single.to_dict()['nlh'].values()) == pytest.approx(expected)
+
+
+def test_merge():
+    first, second = HandStats(), HandStats()
+    first.stats[('nlh', 'AKs')] = [1, 1, 1, 0, 5.0, 0, 0, 0]
+    second.stats[('nlh', 'AKs')] = [2, 0, 0, 0, -3.0, 3.0, 1, 3.0]
+    second.stats[('nlh', '72o')] = [1, 0, 0, 0, -1.0, 1.0, 1, 1.0]
+    merged = first + second
+    assert merged.stats[('nlh', 'AKs')] == [3, 1, 1, 0, 2.0, 3.0, 1, 3.0]
+    assert ('nlh', '72o') in merged.stats
+    assert first.stats[('nlh', 'AKs')][0] == 1
+
+
+def test_starting_hand():
+    assert starting_hand('AsKs', 'nlh') == 'AKs'
+    assert starting_hand('Kd7c', 'nlh') == 'K7o'
+    assert starting_hand('AsAhKsKh', 'plo4') == starting_hand('AdAcKdKc', 'plo4')
@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pytest
+
+from pypoker import Deck, Evaluator, Poker, metrics
+from pypoker.card import parse_cards
+
+
+@pytest.fixture
+def enabled():
+    collector = metrics.enable()
+    metrics.reset()
+    yield collector
+    metrics.disable()
+    metrics.reset()
+
+
+def test_disable_restores_methods():
+    original = Evaluator.declare_winner
+    metrics.enable()
+    assert Evaluator.declare_winner is not original
+    metrics.disable()
+    assert Evaluator.declare_winner is original
+
+
+def test_counts_hands(enabled):
+    poker = Poker('plo5', 3, rng=1)
+    cards = poker.deal()
+    poker.declare_winner(cards['player_cards'], cards['community_cards'])
+    assert enabled.counters['hands_evaluated'] == 3
+    assert enabled.counters['five_card_evaluations'] > 0
+    assert 'Poker.declare_winner[plo5,3p]' in metrics.snapshot()['methods']
+
+
+def test_counts_after_reset(enabled):
+    poker = Poker('nlh', 2, rng=1)
+    cards = poker.deal()
+    poker.declare_winner(cards['player_cards'], cards['community_cards'])
+    metrics.reset()
+    assert enabled.counters['hands_evaluated'] == 0
+    poker.declare_winner(cards['player_cards'], cards['community_cards'])
+    assert enabled.counters['hands_evaluated'] == 2
+    assert metrics.snapshot()['counters']['hands_evaluated'] == 2
+
+
+def test_showdown_is_timed(enabled):
+    Evaluator().showdown({'a': 'AsKs', 'b': 'QhQd'}, '2s3s4s5h9d', {'a': 5, 'b': 5, 'c': 2}, folded=['c'])
+    assert enabled.counters['hands_evaluated'] == 2
+    assert metrics.snapshot()['methods']['Evaluator.showdown[nlh,3p]']['count'] == 1
+
+
+def test_batch_accepts_lists(enabled):
+    board = [parse_cards('2s3s4s5h9d')]
+    players = [[parse_cards('AsKs'), parse_cards('QhQd')]]
+    winners = Evaluator('lookup').declare_winner_batch(board, players)
+    assert np.asarray(winners).tolist() == [[True, False]]
+    assert enabled.counters['hands_evaluated'] == 2
+    assert 'Evaluator.declare_winner_batch[nlh,2p]' in metrics.snapshot()['methods']
+
+
+def test_results_do_not_change(enabled):
+    deck = Deck(rng=3)
+    deal = deck.deal_poker_hands('plo4', 4)
+    evaluator = Evaluator()
+    on = evaluator.declare_winner(deal['player_cards'], deal['community_cards'])
+    metrics.disable()
+    off = evaluator.declare_winner(deal['player_cards'], deal['community_cards'])
+    assert on == off
+
+
+def test_exporter(enabled, tmp_path):
+    path = str(tmp_path / 'metrics.jsonl')
+    metrics.disable()
+    metrics.enable(metrics.JsonLinesExporter(path), export_interval=0)
+    Poker('nlh', 2, rng=1).deal()
+    Poker('nlh', 2, rng=1).deal()
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert lines and 'counters' in lines[-1]
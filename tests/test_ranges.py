@@ -0,0 +1,53 @@
+import pytest
+
+from pypoker import Range, canonicalize
+from pypoker.isomorphism import apply_permutation, invert_permutation
+
+
+@pytest.mark.parametrize('text, count', [
+    ('AA', 6), ('AKs', 4), ('AKo', 12), ('AK', 16), ('TT+', 30), ('77-TT', 24), ('ATs+', 16), ('A2s-A5s', 16),
+    ('AsKs, AKs', 4), ('TT+, AKs, KQo', 46),
+])
+def test_shorthand_counts(text, count):
+    assert len(Range.from_string(text)) == count
+
+
+def test_weights_and_card_removal():
+    hands = Range.from_string("AA, KK:0.5, QQ:0")
+    assert len(hands) == 12
+    assert hands.total_weight() == 9.0
+    # As blocks 3 of the aces and the duplicate combo keeps its last weight
+    assert len(hands.without('As')) == 9
+    assert dict(Range(['AsKs', ('KsAs', 0.25)]).combos) == {'KsAs': 0.25}
+
+
+@pytest.mark.parametrize('text, game_type', [
+    ('AKx', 'nlh'), ('AsAs', 'nlh'), ('AA:x', 'nlh'), ('AKs-QJs', 'nlh'), ('AA', 'plo4'), ('AsKs', 'stud'),
+])
+def test_invalid_ranges(text, game_type):
+    with pytest.raises(ValueError):
+        Range.from_string(text, game_type)
+
+
+def _cards(cards):
+    return sorted(cards[i: i + 2] for i in range(0, len(cards), 2))
+
+
+def test_canonicalize_suit_renamings():
+    first = canonicalize(['AsKs', 'QhQd'], '2s7h9d')
+    second = canonicalize(['AhKh', 'QsQc'], '2h7s9c')
+    assert first[:2] == second[:2]
+    hands, board, permutation = first
+    # The canonical form sorts the cards of every group
+    assert [_cards(hand) for hand in apply_permutation(['AsKs', 'QhQd'], permutation)] == [_cards(h) for h in hands]
+    assert _cards(apply_permutation(board, invert_permutation(permutation))) == _cards('2s7h9d')
+
+
+def test_canonicalize_keeps_structure():
+    # The same ranks with different suit structures are different situations
+    assert canonicalize('AsKs')[0] != canonicalize('AsKh')[0]
+    assert canonicalize('AsKs', '2s3s4h')[:2] != canonicalize('AsKs', '2h3h4s')[:2]
+    with pytest.raises(ValueError):
+        canonicalize('AsKs', '2s3s')
+    with pytest.raises(ValueError):
+        canonicalize('AsKs', game_type='plo4')
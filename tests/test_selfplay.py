@@ -0,0 +1,43 @@
+import pytest
+
+from pypoker import SelfPlay
+from pypoker.selfplay import Policy, AggressivePolicy, RandomPolicy, parse_policy
+
+
+def test_parse_policy():
+    policy = parse_policy('random:0.1:0.3')
+    assert isinstance(policy, RandomPolicy)
+    assert isinstance(parse_policy('aggressive:1.0'), AggressivePolicy)
+    for spec in ('bluff', 'call:1', 'random:x'):
+        with pytest.raises(ValueError):
+            parse_policy(spec)
+    with pytest.raises(TypeError):
+        Policy()
+
+
+def test_play_is_zero_sum():
+    summary = SelfPlay('nlh', ['random', 'call', 'aggressive'], processes=1, seed=3).play(300, shard_hands=100)
+    assert summary['hands'] == 300
+    assert sum(player['net'] for player in summary['players']) == pytest.approx(0)
+
+
+def test_seeded_runs_do_not_depend_on_processes():
+    def play(processes):
+        summary = SelfPlay('plo4', ['random', 'aggressive'], processes=processes, seed=11).play(400, shard_hands=50)
+        return [player['net'] for player in summary['players']]
+
+    assert play(1) == play(2)
+
+
+def test_early_stop():
+    # Folding half the time against a pot sized bettor loses fast enough to stop well before the end
+    harness = SelfPlay('nlh', ['aggressive:1.0', 'random:0.5:0.1'], processes=1, seed=5)
+    summary = harness.play(20000, shard_hands=250, early_stop=True, min_hands=500)
+    assert summary['significant']
+    assert 500 <= summary['hands'] < 20000
+    assert summary['players'][0]['low'] > 0
+
+
+def test_invalid_number_of_players():
+    with pytest.raises(ValueError):
+        SelfPlay('nlh', ['call'])
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from pypoker.server import Server
+
+
+async def _exchange(path: str, requests: list, **options) -> list:
+    """
+    Start a Server on a Unix socket, send the request lines and return the responses by id
+    """
+    server = Server(processes=1, **options)
+    task = asyncio.ensure_future(server.serve_unix(path))
+    try:
+        for _ in range(500):
+            if os.path.exists(path):
+                break
+            await asyncio.sleep(0.01)
+        reader, writer = await asyncio.open_unix_connection(path)
+        for request in requests:
+            line = request if isinstance(request, str) else json.dumps(request)
+            writer.write(line.encode() + b"\n")
+        await writer.drain()
+        responses = [json.loads(await asyncio.wait_for(reader.readline(), 30)) for _ in requests]
+        writer.close()
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    return {response['id']: response for response in responses}
+
+
+def exchange(tmp_path, requests: list, **options) -> dict:
+    return asyncio.run(_exchange(str(tmp_path / 'pypoker.sock'), requests, **options))
+
+
+def test_declare_winner(tmp_path):
+    responses = exchange(tmp_path, [
+        {'id': 1, 'method': 'declare_winner',
+         'params': {'player_cards': {'p1': 'AsKs', 'p2': 'QhQd'}, 'community_cards': '2s3s4s5h9d'}},
+        {'id': 2, 'method': 'declare_winner', 'params': {
+            'player_cards': {'p1': 'AsKd', 'p2': 'AhKc'}, 'community_cards': '2c3c4h9sTd',
+            'return_type': 'compact'}},
+    ])
+    result = responses[1]['result']
+    assert result['p1']['winner'] and not result['p2']['winner']
+    assert result['p1']['best_combo_name'] == 'Flush'
+    assert responses[2]['result']['winners'] == ['p1', 'p2']
+
+
+def test_exact_equity(tmp_path):
+    responses = exchange(tmp_path, [
+        {'id': 'e', 'method': 'equity',
+         'params': {'holecards': ['AsAd', 'KsKd'], 'board': '2c3c4hKh', 'exact': True}},
+    ])
+    assert responses['e']['result']['exact_equity'] == ['3/22', '19/22']
+
+
+def test_errors(tmp_path):
+    responses = exchange(tmp_path, [
+        {'id': 1, 'method': 'shuffle'},
+        {'id': 2, 'method': 'declare_winner', 'params': [], 'timeout': 1},
+        {'id': 3, 'method': 'declare_winner', 'params': {}, 'timeout': 0},
+        {'id': 4, 'method': 'declare_winner', 'params': {}, 'timeout': True},
+        {'id': 5, 'method': 'declare_winner', 'params': {}},
+    ])
+    assert 'Unknown method' in responses[1]['error']
+    assert 'Params' in responses[2]['error']
+    assert 'Invalid timeout' in responses[3]['error']
+    assert 'Invalid timeout' in responses[4]['error']
+    # Errors raised by the workers are reported with their type
+    assert responses[5]['error'].startswith('KeyError')
+
+
+def test_timeout(tmp_path):
+    responses = exchange(tmp_path, [
+        {'id': 1, 'method': 'equity', 'params': {'holecards': ['AsAd', ''], 'num_trials': 10 ** 8},
+         'timeout': 0.2},
+        {'id': 2, 'method': 'preflop_equity', 'params': {'holecards': 'AsKs', 'opponent': 'QQ'}, 'timeout': 0.2},
+    ])
+    assert responses[1]['error'] == 'Timeout'
+    # The long request does not hold up the other one
+    assert 2 in responses
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        Server(engine='fast')
@@ -0,0 +1,68 @@
+import time
+from fractions import Fraction
+
+import pytest
+
+from pypoker import Simulator
+
+
+def test_exact_equity_on_the_turn():
+    # Aces win with one of the two aces left or a five (wheel) against a set of kings
+    result = Simulator('nlh', processes=1).enumerate_equity(['AsAd', 'KsKd'], board='2c3c4hKh')
+    assert result['boards'] == 44
+    assert result['exact_equity'] == [Fraction(3, 22), Fraction(19, 22)]
+
+
+def test_exact_equity_split():
+    result = Simulator('nlh', processes=1).enumerate_equity(['AsKd', 'AhKc'], board='2c3c4h9s')
+    assert result['exact_equity'] == [Fraction(1, 2), Fraction(1, 2)]
+    assert result['ties'] == [44, 44]
+
+
+def test_monte_carlo_close_to_exact():
+    result = Simulator('nlh', processes=1, seed=1).run(['AsAd', 'KsKd'], 20000, board='2c3c4hKh')
+    assert result['trials'] == 20000
+    assert abs(result['equity'][0] - 3 / 22) < 4 * result['stderr'][0]
+    assert sum(result['equity']) == pytest.approx(1)
+
+
+def test_seeded_runs_do_not_depend_on_processes():
+    results = [
+        Simulator('plo4', processes=processes, seed=7).run(['AsAhKsKh', ''], 12000)
+        for processes in (1, 2)
+    ]
+    assert results[0]['shares'] == results[1]['shares']
+
+
+def test_adaptive_seeded_runs_do_not_depend_on_processes():
+    results = []
+    for processes in (1, 2):
+        with Simulator('nlh', processes=processes, seed=3) as simulator:
+            results.append(simulator.run(['AsKs', 'QhQd'], 100000, target_stderr=0.01))
+    assert results[0]['converged'] and results[1]['converged']
+    assert results[0]['trials'] == results[1]['trials']
+    assert results[0]['shares'] == results[1]['shares']
+
+
+def test_time_budget_in_process():
+    start = time.perf_counter()
+    result = Simulator('plo6', processes=1).run(['AsAhKsKhQdJd', '', '', ''], 10 ** 7, time_budget=0.02)
+    assert time.perf_counter() - start < 0.1
+    assert 0 < result['trials'] < 10 ** 7
+    assert not result['converged']
+
+
+def test_time_budget_on_pool_does_not_delay_next_run():
+    with Simulator('plo6', processes=2, seed=1) as simulator:
+        simulator.run(['', ''], 10 ** 7, time_budget=0.3)
+        simulator.run(['AsAhKsKhQdJd', '', '', ''], 10 ** 7, time_budget=0.2)
+        start = time.perf_counter()
+        result = simulator.run(['AsAhKsKhQdJd', ''], 10 ** 7, time_budget=0.1)
+        assert time.perf_counter() - start < 0.3
+        assert result['trials'] > 0
+
+
+def test_zero_trials():
+    result = Simulator('nlh', processes=1).run(['AsAd', 'KsKd'], 0)
+    assert result['trials'] == 0
+    assert all(equity != equity for equity in result['equity'])
@@ -0,0 +1,129 @@
+import random
+
+import pytest
+
+from pypoker import Dealer
+from pypoker.selfplay import AggressivePolicy, CallingStation, RandomPolicy
+
+
+def _play(dealer, state, policies, rng):
+    while not state.hand_over:
+        action, amount = policies[state.to_act].act(state, dealer.legal_actions(state), rng)
+        dealer.act(state, action, amount)
+    return state
+
+
+@pytest.mark.parametrize('game_type', ['nlh', 'plo4', 'plo6'])
+def test_chips_are_conserved(game_type):
+    dealer = Dealer(game_type, 1, 2, ante=1, rng=1)
+    rng = random.Random(1)
+    policies = [RandomPolicy(0.2, 0.3), AggressivePolicy(1.0), CallingStation(), RandomPolicy(0.1, 0.5)]
+    for hand in range(300):
+        stacks = [rng.randint(1, 150) for _ in policies]
+        state = _play(dealer, dealer.start_hand(stacks, hand % len(stacks)), policies, rng)
+        assert sum(state.winnings) == sum(state.contributed)
+        assert sum(state.net(seat) for seat in range(len(stacks))) == 0
+        assert [stack + net for stack, net in zip(stacks, (state.net(s) for s in range(len(stacks))))] == state.stacks
+        assert min(state.stacks) >= 0
+
+
+def _all_in_hand(holecards, runout, stacks):
+    dealer = Dealer('nlh', 1, 2, rng=1)
+    state = dealer.start_hand(stacks, button=0)
+    state.holecards = holecards
+    state.runout = runout
+    while not state.hand_over:
+        legal = dealer.legal_actions(state)
+        if legal['raise']:
+            dealer.act(state, 'raise', legal['raise'][1])
+        elif legal['check']:
+            dealer.act(state, 'check')
+        else:
+            dealer.act(state, 'call')
+    return state
+
+
+def test_side_pots():
+    # The short stack has the best hand and wins the main pot only, the side pot goes to the second best
+    state = _all_in_hand(['2c2d', 'AsAd', 'KsKd'], '7c2h9sJd3s', [50, 100, 200])
+    assert state.winnings == [150, 100, 0]
+    assert state.stacks == [150, 100, 100]
+
+
+def test_split_pot_with_odd_chip():
+    # Both straights split, the odd chip goes to the first seat left of the button
+    dealer = Dealer('nlh', 1, 2, ante=1, rng=1)
+    state = dealer.start_hand([100, 100, 100], button=0)
+    state.holecards = ['2c2d', 'AsKd', 'AhKc']
+    state.runout = 'QsJhTd3c4c'
+    dealer.act(state, 'fold')
+    dealer.act(state, 'call')
+    dealer.act(state, 'check')
+    for _ in range(3):
+        dealer.act(state, 'check')
+        dealer.act(state, 'check')
+    assert state.hand_over
+    pot = sum(state.contributed)
+    assert pot % 2 == 1
+    assert state.winnings[1] == state.winnings[2] + 1
+    assert sum(state.winnings) == pot
+
+
+def test_uncalled_bet_is_returned():
+    dealer = Dealer('nlh', 1, 2, rng=1)
+    state = dealer.start_hand([100, 100], button=0)
+    dealer.act(state, 'raise', 100)
+    dealer.act(state, 'fold')
+    assert state.hand_over
+    assert state.stacks == [102, 98]
+
+
+def test_bet_and_raise_are_distinct():
+    dealer = Dealer('nlh', 1, 2, rng=1)
+    state = dealer.start_hand([100, 100], button=0)
+    legal = dealer.legal_actions(state)
+    # The blinds are a bet
+    assert legal['bet'] is None and legal['raise'] == (4, 100)
+    with pytest.raises(ValueError):
+        dealer.act(state, 'bet', 6)
+    dealer.act(state, 'call')
+    dealer.act(state, 'check')
+    legal = dealer.legal_actions(state)
+    assert legal['raise'] is None and legal['bet'] == (2, 98)
+    with pytest.raises(ValueError):
+        dealer.act(state, 'raise', 10)
+    dealer.act(state, 'bet', 10)
+    assert dealer.legal_actions(state)['bet'] is None
+    with pytest.raises(ValueError):
+        dealer.act(state, 'bet', 30)
+    dealer.act(state, 'raise', 30)
+    assert [action[2] for action in state.actions] == ['call', 'check', 'bet', 'raise']
+
+
+def test_illegal_actions():
+    dealer = Dealer('nlh', 1, 2, rng=1)
+    state = dealer.start_hand([100, 100], button=0)
+    with pytest.raises(ValueError):
+        dealer.act(state, 'check')
+    with pytest.raises(ValueError):
+        dealer.act(state, 'raise', 3)
+    with pytest.raises(ValueError):
+        dealer.act(state, 'shove')
+
+
+def test_pot_limit():
+    dealer = Dealer('plo4', 1, 2, rng=1)
+    state = dealer.start_hand([200, 200, 200], button=0)
+    # Call 2, then raise the pot of 5: raise to 7
+    assert dealer.legal_actions(state)['raise'] == (4, 7)
+
+
+def test_copy_is_independent():
+    dealer = Dealer('nlh', 1, 2, rng=1)
+    state = dealer.start_hand([100, 100], button=0)
+    snapshot = state.copy()
+    dealer.act(state, 'fold')
+    assert not snapshot.hand_over and state.hand_over
+    dealer.act(snapshot, 'call')
+    dealer.act(snapshot, 'check')
+    assert snapshot.street == 1